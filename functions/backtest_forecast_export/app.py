@@ -0,0 +1,100 @@
+"""
+Backtest the forecast export of the previous run against the actuals in the latest target time series,
+and post the accuracy metrics to CloudWatch.
+"""
+import json
+from os import environ
+# From Lambda Layers
+from clients import client  # pylint: disable=import-error
+from config import load_config  # pylint: disable=import-error
+from storage import get_storage, source_key  # pylint: disable=import-error
+from lambda_handler_logger import lambda_handler_logger  # pylint: disable=import-error
+from claim_check import claim_check  # pylint: disable=import-error
+from aws_lambda_powertools import Logger  # pylint: disable=import-error
+
+BACKTEST_REPORT_KEY = '{folder}/{export_job_name}.backtest.json'
+BACKTEST_METRICS_KEY = '{folder}/{export_job_name}.backtest.csv'
+
+logger = Logger()
+cloudwatch_client = client('cloudwatch')
+
+
+def post_metric(project_name, report):
+    """
+    Post backtest accuracy metrics to CloudWatch
+    """
+    dimensions = [{'Name': 'ProjectName', 'Value': project_name}]
+    metric_data = [
+        {
+            'Dimensions': dimensions + [{'Name': 'Quantile', 'Value': column}],
+            'MetricName': 'BacktestWQL',
+            'Unit': 'None',
+            'Value': value
+        } for column, value in report['WQL'].items() if value is not None
+    ] + [
+        {
+            'Dimensions': dimensions + [{'Name': 'Quantile', 'Value': column}],
+            'MetricName': 'BacktestCoverage',
+            'Unit': 'None',
+            'Value': value
+        } for column, value in report['Coverage'].items()
+    ] + [
+        {
+            'Dimensions': dimensions,
+            'MetricName': 'Backtest{}'.format(name),
+            'Unit': 'None',
+            'Value': report[name]
+        } for name in ['RMSE', 'MAPE'] if report[name] is not None
+    ]
+    cloudwatch_client.put_metric_data(Namespace='FORECAST', MetricData=metric_data)
+
+
+@lambda_handler_logger(logger=logger, lambda_name='backtest_forecast_export')
+@claim_check
+def lambda_handler(event, _):
+    """
+    Lambda function handler
+    """
+    if event.get('PreviousForecastExportManifestKey') is None:
+        logger.info({
+            'message': 'no previous forecast export to backtest'
+        })
+        return event
+
+    # Imported after the check above: the first run has nothing to backtest and does not need numpy.
+    from backtest import backtest_file  # pylint: disable=import-error,import-outside-toplevel
+    storage = get_storage()
+    manifest = json.loads(storage.get_bytes(event['PreviousForecastExportManifestKey']).decode('utf-8'))
+    config = load_config()
+    job = config.import_job('TARGET_TIME_SERIES')
+    metrics_key = BACKTEST_METRICS_KEY.format(
+        folder=environ['MERGED_S3_FOLDER'],
+        export_job_name=manifest['ForecastExportJobName']
+    )
+    report = backtest_file(
+        storage, source_key(job['Filename']), manifest['Key'],
+        config.dataset('TARGET_TIME_SERIES'),
+        event['DatasetTimestampFormat'], metrics_key
+    )
+    report.update({
+        'ForecastExportJobName': manifest['ForecastExportJobName'],
+        'MetricsKey': metrics_key
+    })
+
+    report_key = BACKTEST_REPORT_KEY.format(
+        folder=environ['MERGED_S3_FOLDER'],
+        export_job_name=manifest['ForecastExportJobName']
+    )
+    storage.put_bytes(report_key, json.dumps(report).encode('utf-8'))
+    logger.info({
+        'message': 'backtest report was written',
+        'report_key': report_key,
+        'report': report
+    })
+
+    # Post accuracy information to CloudWatch Metrics
+    if report['Rows'] > 0:
+        post_metric(event['ProjectName'], report)
+
+    event['BacktestReportKey'] = report_key
+    return event
@@ -0,0 +1,31 @@
+"""
+Take a snapshot of the Amazon Forecast resources of the project for the steps which delete outdated resources.
+"""
+# From Lambda Layers
+from clients import client  # pylint: disable=import-error
+from inventory import build_inventory, save_inventory, RESOURCE_TYPES, INVENTORY_NAME  # pylint: disable=import-error
+from storage import get_storage, work_key  # pylint: disable=import-error
+from lambda_handler_logger import lambda_handler_logger  # pylint: disable=import-error
+from claim_check import claim_check  # pylint: disable=import-error
+from aws_lambda_powertools import Logger  # pylint: disable=import-error
+
+logger = Logger()
+forecast_client = client('forecast')
+
+
+@lambda_handler_logger(logger=logger, lambda_name='build_resource_inventory')
+@claim_check
+def lambda_handler(event, _):
+    """
+    Lambda function handler
+    """
+    inventory = build_inventory(forecast_client, event['ProjectName'])
+    event['InventoryKey'] = work_key(INVENTORY_NAME.format(date=event['TriggeredAt']))
+    save_inventory(get_storage(), event['InventoryKey'], inventory)
+
+    logger.info({
+        'message': 'resource inventory was saved',
+        'inventory_key': event['InventoryKey'],
+        'counts': {resource_type: len(inventory[resource_type]) for resource_type in RESOURCE_TYPES}
+    })
+    return event
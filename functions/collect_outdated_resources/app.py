@@ -0,0 +1,88 @@
+"""
+Delete outdated Amazon Forecast resources of the project in the order of their dependencies.
+"""
+import json
+# From Lambda Layers
+from clients import client  # pylint: disable=import-error
+import actions  # pylint: disable=import-error
+from inventory import load_inventory  # pylint: disable=import-error
+from garbage_collector import GarbageCollector, LevelPending, SKIPPED  # pylint: disable=import-error
+from storage import get_storage, work_key  # pylint: disable=import-error
+from lambda_handler_logger import lambda_handler_logger  # pylint: disable=import-error
+from claim_check import claim_check, expire_claims  # pylint: disable=import-error
+from staging import expire_staged  # pylint: disable=import-error
+from task_callback import task_callback  # pylint: disable=import-error
+from aws_lambda_powertools import Logger  # pylint: disable=import-error
+
+PROGRESS_NAME = 'inventory/{date}_{scope}.progress.json'
+
+logger = Logger()
+forecast_client = client('forecast')
+
+
+@task_callback
+@lambda_handler_logger(logger=logger, lambda_name='collect_outdated_resources')
+@claim_check
+def lambda_handler(event, context):
+    """
+    Lambda function handler
+    """
+    storage = get_storage()
+    inventory = load_inventory(storage, event['InventoryKey'])
+    plan = inventory.deletion_plan(event['CleanupScope'])
+    logger.info({
+        'message': 'deletion plan was made from the inventory',
+        'cleanup_scope': event['CleanupScope'],
+        'plan': plan
+    })
+
+    # Levels which have been deleted by the previous attempts are skipped, and so are the resources of the next level
+    # which have been processed
+    progress_key = work_key(PROGRESS_NAME.format(
+        date=event['TriggeredAt'], scope=event['CleanupScope']))
+    progress = {'CompletedLevels': 0, 'LevelStates': {}}
+    if storage.stat(progress_key) is not None:
+        progress.update(json.loads(storage.get_bytes(progress_key).decode('utf-8')))
+
+    def save_progress(levels, level_states):
+        storage.put_bytes(progress_key, json.dumps({
+            'CompletedLevels': levels,
+            'LevelStates': level_states
+        }).encode('utf-8'))
+        logger.info({
+            'message': 'progress of the deletion plan was saved',
+            'completed_levels': levels,
+            'processed_resources': len(level_states)
+        })
+
+    # The collector stops issuing calls before the timeout of this function (see garbage_collector)
+    collector = GarbageCollector(forecast_client, plan, context=context)
+    try:
+        states = collector.run(progress['CompletedLevels'], save_progress, progress['LevelStates'])
+    except LevelPending as e:
+        # ResourcePending exception will be thrown and this Lambda function will be resumed once the resources are
+        # deleted.
+        logger.info({
+            'message': 'some resources are deleting.',
+            'detail': str(e)
+        })
+        raise actions.ResourcePending(e.resources)
+
+    logger.info({
+        'message': 'outdated resources deleted',
+        'skipped_arns': [arn for (_, arn), state in states.items() if state == SKIPPED]
+    })
+
+    # The claim checks are shared by the executions, so only the ones no execution has written for a while are deleted.
+    expired = expire_claims(storage)
+    logger.info({
+        'message': 'expired claim checks deleted',
+        'count': len(expired)
+    })
+    # Staged dataset files are deleted once they are imported. The ones of failed runs are deleted here.
+    expired = expire_staged(storage)
+    logger.info({
+        'message': 'expired staged dataset files deleted',
+        'keys': expired
+    })
+    return event
@@ -0,0 +1,64 @@
+"""
+Convert dataset files in S3 from CSV to typed, compressed Parquet before dataset import jobs are created.
+"""
+# From Lambda Layers
+from config import load_config  # pylint: disable=import-error
+from storage import get_storage, source_key  # pylint: disable=import-error
+from staging import staging_key  # pylint: disable=import-error
+from lambda_handler_logger import lambda_handler_logger  # pylint: disable=import-error
+from claim_check import claim_check  # pylint: disable=import-error
+from aws_lambda_powertools import Logger  # pylint: disable=import-error
+
+STAGED_FILE_NAME = '{dataset_type}.parquet'
+
+logger = Logger()
+
+
+@lambda_handler_logger(logger=logger, lambda_name='convert_dataset_files')
+@claim_check
+def lambda_handler(event, _):
+    """
+    Lambda function handler
+    """
+    if event.get('DatasetImportFormat', 'CSV') != 'PARQUET':
+        logger.info({
+            'message': 'skip converting dataset files',
+            'dataset_import_format': event.get('DatasetImportFormat', 'CSV')
+        })
+        return event
+
+    # pyarrow is imported here so that the CSV format does not load it on cold starts.
+    from parquet_converter import convert_file  # pylint: disable=import-error,import-outside-toplevel
+    storage = get_storage()
+    config = load_config()
+
+    for job in event['DatasetImportJobs']:
+        # The file has already been imported (see init_update_forecast_flow).
+        if job.get('Unchanged', False):
+            continue
+        dataset = config.dataset(job['DatasetType'])
+        # Files regularized by regularize_dataset_files are converted instead of the source files.
+        src_key = job.get('StagedKey', source_key(job['Filename']))
+        dst_key = staging_key(event['TriggeredAt'], STAGED_FILE_NAME.format(dataset_type=job['DatasetType']))
+
+        logger.info({
+            'message': 'converting dataset file',
+            'src_key': src_key,
+            'dst_key': dst_key
+        })
+        result = convert_file(
+            storage, src_key, dst_key, dataset, event['DatasetTimestampFormat'])
+        logger.info({
+            'message': 'dataset file converted',
+            'result': result,
+            'dst_key': dst_key
+        })
+
+        # create_dataset_import_job imports this file instead of the source CSV.
+        job['StagedKey'] = dst_key
+        job['Format'] = 'PARQUET'
+
+    logger.info({
+        'message': 'all dataset files were converted'
+    })
+    return event
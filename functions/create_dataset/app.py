@@ -1,80 +1,92 @@
 """
 Create an Amazon Forecast dataset. This function is called in update model flow.
 """
-import boto3
 # From Lambda Layers
+from clients import client  # pylint: disable=import-error
 import actions  # pylint: disable=import-error
+from concurrent_creation import create_concurrently  # pylint: disable=import-error
 from lambda_handler_logger import lambda_handler_logger  # pylint: disable=import-error
+from claim_check import claim_check  # pylint: disable=import-error
+from task_callback import task_callback  # pylint: disable=import-error
 from aws_lambda_powertools import Logger  # pylint: disable=import-error
 
 DATASET_NAME = '{project_name}_{dataset_type}_{date}'
 DATASET_ARN = 'arn:aws:forecast:{region}:{account}:dataset/{dataset_name}'
+# Number of datasets created at the same time unless CreateConcurrency.Datasets is set in params.json
+DEFAULT_CONCURRENCY = 3
 
 logger = Logger()
-forecast_client = boto3.client('forecast')
+forecast_client = client('forecast')
 
 
+@task_callback
 @lambda_handler_logger(logger=logger, lambda_name='create_dataset')
+@claim_check
 def lambda_handler(event, _):
     """
     Lambda function handler
     """
-    # Create datasets
+    datasets = {}
     for dataset in event['Datasets']:
         dataset_name = DATASET_NAME.format(
             project_name=event['ProjectName'],
             dataset_type=dataset['DatasetType'],
             date=event['TriggeredAt']
         )
-
         dataset_arn = DATASET_ARN.format(
             region=event['Region'],
             account=event['AccountID'],
             dataset_name=dataset_name
         )
+        datasets[dataset_arn] = dict(dataset)
+        dataset['DatasetName'] = dataset_name
+        dataset['DatasetArn'] = dataset_arn
 
+    def describe(dataset_arn):
         try:
             response = forecast_client.describe_dataset(
                 DatasetArn=dataset_arn
             )
-            logger.info({
-                'message': 'forecast_client.describe_dataset called',
-                'response': response,
-                'dataset_arn': dataset_arn
-            })
-
         except forecast_client.exceptions.ResourceNotFoundException:
-            logger.info({
-                'message': 'creating new dataset',
-                'dataset_arn': dataset_arn
-            })
-            response = forecast_client.create_dataset(
-                **dataset,
-                DatasetName=dataset_name
-            )
-            logger.info({
-                'message': 'forecast_client.create_dataset called',
-                'response': response,
-                'dataset_arn': dataset_arn
-            })
-
-            dataset['DatasetName'] = dataset_name
-            dataset['DatasetArn'] = dataset_arn
+            return None
+        logger.info({
+            'message': 'forecast_client.describe_dataset called',
+            'response': response,
+            'dataset_arn': dataset_arn
+        })
+        return response['Status']
 
-    # Check dataset status
-    for dataset in event['Datasets']:
-        response = forecast_client.describe_dataset(
-            DatasetArn=dataset['DatasetArn']
+    def create(dataset_arn):
+        logger.info({
+            'message': 'creating new dataset',
+            'dataset_arn': dataset_arn
+        })
+        response = forecast_client.create_dataset(
+            **datasets[dataset_arn],
+            DatasetName=dataset_arn.split('/')[-1]
         )
         logger.info({
-            'message': 'forecast_client.describe_dataset called',
+            'message': 'forecast_client.create_dataset called',
             'response': response,
             'dataset_arn': dataset_arn
         })
+        return describe(dataset_arn)
+
+    # Create datasets concurrently
+    statuses = create_concurrently(
+        list(datasets),
+        describe,
+        create,
+        event.get('CreateConcurrency', {}).get('Datasets', DEFAULT_CONCURRENCY)
+    )
+    logger.info({
+        'message': 'dataset statuses',
+        'statuses': statuses
+    })
 
-        # When the resource is in CREATE_PENDING or CREATE_IN_PROGRESS,
-        # ResourcePending exception will be thrown and this Lambda function will be retried.
-        actions.take_action(response['Status'])
+    # When a resource is in CREATE_PENDING or CREATE_IN_PROGRESS (or has not been created yet),
+    # ResourcePending exception will be thrown and this Lambda function will be retried.
+    actions.take_actions(statuses)
 
     # All datasets were create
     logger.info({
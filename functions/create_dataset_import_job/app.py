@@ -2,34 +2,60 @@
 Create dataset import jobs that upload data from S3 to Amazon Forecast's datasets.
 """
 from os import environ
-import boto3
 # From Lambda Layers
+from clients import client  # pylint: disable=import-error
 import actions  # pylint: disable=import-error
+from concurrent_creation import create_concurrently  # pylint: disable=import-error
+from content_digest import DigestLedger, LEDGER_NAME  # pylint: disable=import-error
+from config import index_by_type  # pylint: disable=import-error
+from storage import get_storage, work_key  # pylint: disable=import-error
+from staging import delete_staged  # pylint: disable=import-error
 from lambda_handler_logger import lambda_handler_logger  # pylint: disable=import-error
+from claim_check import claim_check  # pylint: disable=import-error
+from task_callback import task_callback  # pylint: disable=import-error
 from aws_lambda_powertools import Logger  # pylint: disable=import-error
 
 IMPORT_JOB_NAME = 'job_{date}'
 IMPORT_JOB_ARN = 'arn:aws:forecast:{region}:{account}:dataset-import-job/{dataset_name}' \
     '/{import_job_name}'
+# Number of dataset import jobs running at the same time unless CreateConcurrency.DatasetImportJobs is set in params.json
+DEFAULT_CONCURRENCY = 1
 
 logger = Logger()
-forecast_client = boto3.client('forecast')
+forecast_client = client('forecast')
 
 
+@task_callback
 @lambda_handler_logger(logger=logger, lambda_name='create_dataset_import_job')
+@claim_check
 def lambda_handler(event, _):
     """
     Lambda function handler
     """
 
-    import_job_arns = []
-
-    # In this sample, creating dataset import job sequentially because default limit of 'Maximum parallel running CreateDatasetImportJob tasks' is small. You should increase this limit to create dataset import job in parallel.
+    # The default limit of 'Maximum parallel running CreateDatasetImportJob tasks' is small, so dataset import jobs are
+    # created one at a time unless CreateConcurrency.DatasetImportJobs is raised in params.json with the limit.
     # https://docs.aws.amazon.com/forecast/latest/dg/limits.html
-
+    import_jobs = {}
+    jobs = index_by_type(event['DatasetImportJobs'], 'DatasetImportJobs')
     for dataset in event['Datasets']:
         dataset_name = dataset['DatasetName']
         dataset_arn = dataset['DatasetArn']
+
+        import_job = jobs.get(dataset['DatasetType'])
+        if import_job is None:
+            raise Exception(
+                'failed to find "Filename" for dataset import job.')
+
+        # init_update_forecast_flow marks the files which have already been imported to the dataset.
+        if import_job.get('Unchanged', False):
+            logger.info({
+                'message': 'skip dataset import job because the dataset file has not changed',
+                'filename': import_job['Filename'],
+                'dataset_arn': dataset_arn
+            })
+            continue
+
         import_job_name = IMPORT_JOB_NAME.format(
             date=event['TriggeredAt']
         )
@@ -39,69 +65,106 @@ def lambda_handler(event, _):
             dataset_name=dataset_name,
             import_job_name=import_job_name
         )
-        import_job_arns.append(import_job_arn)
+        import_jobs[import_job_arn] = (import_job_name, dataset_arn, import_job)
 
-        filename = ''
-        for job in event['DatasetImportJobs']:
-            if job['DatasetType'] == dataset['DatasetType']:
-                filename = job['Filename']
-        if filename == '':
-            raise Exception(
-                'failed to find "Filename" for dataset import job.')
+    def describe(import_job_arn):
         try:
             response = forecast_client.describe_dataset_import_job(
                 DatasetImportJobArn=import_job_arn
             )
-            logger.info({
-                'message': 'forecast_client.describe_dataset_import_job called',
-                'response': response,
-                'dataset_import_job_arn': import_job_arn
-            })
-
         except forecast_client.exceptions.ResourceNotFoundException:
-            logger.info({
-                'message': 'creating new dataset import job',
-                'dataset_import_job_arn': import_job_arn
-            })
+            return None
+        logger.info({
+            'message': 'forecast_client.describe_dataset_import_job called',
+            'response': response,
+            'dataset_import_job_arn': import_job_arn
+        })
+        return response['Status']
 
+    def create(import_job_arn):
+        import_job_name, dataset_arn, import_job = import_jobs[import_job_arn]
+        # Files converted by convert_dataset_files are imported instead of the source files.
+        if 'StagedKey' in import_job:
+            key = import_job['StagedKey']
+        else:
+            key = '{folder}/{file}'.format(
+                folder=environ['S3_SRC_FOLDER'],
+                file=import_job['Filename']
+            )
+        logger.info({
+            'message': 'creating new dataset import job',
+            'dataset_import_job_arn': import_job_arn
+        })
+
+        try:
             response = forecast_client.create_dataset_import_job(
                 DatasetImportJobName=import_job_name,
                 DatasetArn=dataset_arn,
                 DataSource={
                     'S3Config':
                         {'Path':
-                            's3://{bucket}/{folder}/{file}'.format(
+                            's3://{bucket}/{key}'.format(
                                 bucket=environ['S3_BUCKET_NAME'],
-                                folder=environ['S3_SRC_FOLDER'],
-                                file=filename
+                                key=key
                             ),
                             'RoleArn':
                                 environ['FORECAST_IMPORT_JOB_ROLE_ARN']
                          }
                 },
-                TimestampFormat=event['DatasetTimestampFormat']
+                TimestampFormat=event['DatasetTimestampFormat'],
+                Format=import_job.get('Format', 'CSV')
             )
+        except forecast_client.exceptions.LimitExceededException as e:
+            # The quota of parallel running import jobs is shared by the account (other projects, other executions).
+            # The job is created by the next run.
             logger.info({
-                'message': 'forecast_client.create_dataset_import_job called',
-                'response': response,
-                'dataset_import_job_arn': import_job_arn
+                'message': 'dataset import job was not created because of the limit',
+                'dataset_import_job_arn': import_job_arn,
+                'detail': str(e)
             })
+            return None
+        logger.info({
+            'message': 'forecast_client.create_dataset_import_job called',
+            'response': response,
+            'dataset_import_job_arn': import_job_arn
+        })
+        return describe(import_job_arn)
 
-            response = forecast_client.describe_dataset_import_job(
-                DatasetImportJobArn=import_job_arn
-            )
-            logger.info({
-                'message': 'forecast_client.describe_dataset_import_job called',
-                'response': response,
-                'dataset_import_job_arn': import_job_arn
-            })
+    statuses = create_concurrently(
+        list(import_jobs),
+        describe,
+        create,
+        event.get('CreateConcurrency', {}).get('DatasetImportJobs', DEFAULT_CONCURRENCY)
+    )
+    logger.info({
+        'message': 'dataset import job statuses',
+        'statuses': statuses
+    })
 
-        # When the resource is in CREATE_PENDING or CREATE_IN_PROGRESS, ResourcePending exception will be thrown and this Lambda function will be retried.
-        actions.take_action(response['Status'])
+    # When a job is in CREATE_PENDING or CREATE_IN_PROGRESS (or waits for a free slot),
+    # ResourcePending exception will be thrown and this Lambda function will be retried.
+    actions.take_actions(statuses)
+
+    # Record digests of the imported files (the entries of unchanged files keep the ends recorded with them, see
+    # regularize_dataset_files)
+    storage = get_storage()
+    ledger = DigestLedger(storage, work_key(LEDGER_NAME))
+    for dataset in event['Datasets']:
+        job = jobs.get(dataset['DatasetType'])
+        if job is not None and 'Content' in job and not job.get('Unchanged', False):
+            ledger.record(job['Filename'], job['Content'], dataset['DatasetArn'])
+    ledger.save()
+
+    # The staged files have been imported
+    staged = delete_staged(storage, event['TriggeredAt'])
+    logger.info({
+        'message': 'staged dataset files deleted',
+        'keys': staged
+    })
 
     logger.info({
         'message': 'dataset import job was created',
-        'dataset_import_job_arns': import_job_arns
+        'dataset_import_job_arns': list(import_jobs)
     })
 
     return event
@@ -1,10 +1,12 @@
 """
 Creates a forecast
 """
-import boto3
 # From Lambda Layers
+from clients import client  # pylint: disable=import-error
 import actions  # pylint: disable=import-error
 from lambda_handler_logger import lambda_handler_logger  # pylint: disable=import-error
+from claim_check import claim_check  # pylint: disable=import-error
+from task_callback import task_callback  # pylint: disable=import-error
 from aws_lambda_powertools import Logger  # pylint: disable=import-error
 
 FORECAST_NAME = '{project_name}_{date}'
@@ -12,10 +14,12 @@ FORECAST_ARN = 'arn:aws:forecast:{region}:{account}:forecast/{forecast_name}'
 
 
 logger = Logger()
-forecast_client = boto3.client('forecast')
+forecast_client = client('forecast')
 
 
+@task_callback
 @lambda_handler_logger(logger=logger, lambda_name='create_foreacast')
+@claim_check
 def lambda_handler(event, _):
     """
     Lambda function handler
@@ -67,7 +71,7 @@ def lambda_handler(event, _):
 
     # When the resource is in CREATE_PENDING or CREATE_IN_PROGRESS,
     # ResourcePending exception will be thrown and this Lambda function will be retried.
-    actions.take_action(response['Status'])
+    actions.take_action(response['Status'], event['ForecastArn'])
 
     logger.info({
         'message': 'forecast was created',
@@ -1,18 +1,22 @@
 """
 Creates an Amazon Forecast predictor(ML model).
 """
-import boto3
 # From Lambda Layers
+from clients import client  # pylint: disable=import-error
 import actions  # pylint: disable=import-error
+from predictor_registry import PredictorRegistry  # pylint: disable=import-error
+from storage import get_storage  # pylint: disable=import-error
 from lambda_handler_logger import lambda_handler_logger  # pylint: disable=import-error
+from claim_check import claim_check  # pylint: disable=import-error
+from task_callback import task_callback  # pylint: disable=import-error
 from aws_lambda_powertools import Logger  # pylint: disable=import-error
 
 PREDICTOR_NAME = '{project_name}_{date}'
 PREDICTOR_ARN = 'arn:aws:forecast:{region}:{account}:predictor/{predictor_name}'
 
 logger = Logger()
-forecast_client = boto3.client('forecast')
-cloudwatch_client = boto3.client('cloudwatch')
+forecast_client = client('forecast')
+cloudwatch_client = client('cloudwatch')
 
 
 def post_metric(metrics):
@@ -56,7 +60,9 @@ def post_metric(metrics):
         )
 
 
+@task_callback
 @lambda_handler_logger(logger=logger, lambda_name='create_predictor')
+@claim_check
 def lambda_handler(event, _):
     """
     Lambda function handler
@@ -110,7 +116,7 @@ def lambda_handler(event, _):
 
     # When the resource is in CREATE_PENDING or CREATE_IN_PROGRESS,
     # ResourcePending exception will be thrown and this Lambda function will be retried.
-    actions.take_action(response['Status'])
+    actions.take_action(response['Status'], predictor_arn)
 
     # Completed creating Predictor.
     logger.info({
@@ -118,6 +124,14 @@ def lambda_handler(event, _):
         'predictor_arn': predictor_arn
     })
 
+    # Update-forecast flow reads the latest predictor and its datasets from the registry.
+    recorded = PredictorRegistry(get_storage()).record(
+        event['ProjectName'], predictor_arn, event['TriggeredAt'], event['Datasets'])
+    logger.info({
+        'message': 'predictor registry updated' if recorded else 'a newer predictor is in the registry',
+        'predictor_arn': predictor_arn
+    })
+
     # Post accuracy information to CloudWatch Metrics
     post_metric(
         forecast_client.get_accuracy_metrics(
@@ -0,0 +1,52 @@
+"""
+Compare the merged forecast export with the one of the previous run and write the diff report.
+"""
+import json
+from os import environ
+# From Lambda Layers
+from storage import get_storage  # pylint: disable=import-error
+from lambda_handler_logger import lambda_handler_logger  # pylint: disable=import-error
+from claim_check import claim_check  # pylint: disable=import-error
+from aws_lambda_powertools import Logger  # pylint: disable=import-error
+
+DIFF_REPORT_KEY = '{folder}/{export_job_name}.diff.json'
+
+logger = Logger()
+
+
+@lambda_handler_logger(logger=logger, lambda_name='diff_forecast_export')
+@claim_check
+def lambda_handler(event, _):
+    """
+    Lambda function handler
+    """
+    if event.get('PreviousForecastExportManifestKey') is None:
+        logger.info({
+            'message': 'no previous forecast export to compare with'
+        })
+        return event
+
+    from forecast_diff import diff_exports  # pylint: disable=import-error,import-outside-toplevel
+    storage = get_storage()
+    previous = json.loads(storage.get_bytes(event['PreviousForecastExportManifestKey']).decode('utf-8'))
+    current = json.loads(storage.get_bytes(event['ForecastExportManifestKey']).decode('utf-8'))
+    report = diff_exports(storage, previous['Key'], current['Key'])
+    report.update({
+        'PreviousForecastExportJobName': previous['ForecastExportJobName'],
+        'ForecastExportJobName': current['ForecastExportJobName']
+    })
+
+    report_key = DIFF_REPORT_KEY.format(
+        folder=environ['MERGED_S3_FOLDER'],
+        export_job_name=event['ForecastExportJobName']
+    )
+    storage.put_bytes(report_key, json.dumps(report).encode('utf-8'))
+    logger.info({
+        'message': 'forecast export diff was written',
+        'report_key': report_key,
+        'counts': {k: v for k, v in report.items() if k.endswith('Rows') or k.endswith('Items')},
+        'top_movers': report['TopMovers']['Items'][:5]
+    })
+
+    event['ForecastExportDiffKey'] = report_key
+    return event
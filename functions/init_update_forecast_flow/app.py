@@ -4,53 +4,53 @@ Initialize update model flow.
 import datetime
 from os import environ
 import re
-import boto3
 # From Lambda Layers
-from load_params import load_params  # pylint: disable=import-error
+from clients import client, account_id  # pylint: disable=import-error
+from config import load_config, index_by_type  # pylint: disable=import-error
+from content_digest import DigestLedger, LEDGER_NAME  # pylint: disable=import-error
+from fanout import Fanout  # pylint: disable=import-error
+from predictor_registry import PredictorRegistry, DATASET_KEYS  # pylint: disable=import-error
+from storage import get_storage, source_key, work_key  # pylint: disable=import-error
 from lambda_handler_logger import lambda_handler_logger  # pylint: disable=import-error
+from claim_check import claim_check  # pylint: disable=import-error
 from aws_lambda_powertools import Logger  # pylint: disable=import-error
 
 PREDICTOR_PATTERN = r'^arn:aws:forecast:.+?:.+?:predictor\/(.+?)_([0-9]{4}_[0-9]{2}_[0-9]{2}_[0-9]{2}_[0-9]{2}_[0-9]{2})'
+# Resources deleted by collect_outdated_resources (see Inventory.deletion_plan)
+CLEANUP_SCOPE = 'FORECAST'
 
 logger = Logger()
-forecast_client = boto3.client('forecast')
+forecast_client = client('forecast')
 compiled_predictor_pattern = re.compile(PREDICTOR_PATTERN)
 
 
-@lambda_handler_logger(logger=logger, lambda_name='init_update_forecast_flow')
-def lambda_handler(event, _):
-    """
-    Lambda function handler
-    """
-    # Setup params
-    #   Replace hyphen of stack_name to underscore because some resource names do not support hyphen.
-    event['ProjectName'] = environ['STACK_NAME'].replace(
-        '-', '_')
-    event['AccountID'] = boto3.client(
-        'sts').get_caller_identity()['Account']
-    event['Region'] = environ['AWS_REGION']
-
-    event['TriggeredAt'] = datetime.datetime.now().strftime(
-        "%Y_%m_%d_%H_%M_%S")
-    event['TraceId'] = event['StateMachineName'] + \
-        '_' + event['TriggeredAt']
-
-    # Update trace_id of logger
-    logger.structure_logs(
-        append=True, trace_id=event['TraceId'])
-
+def describe_dataset_import_job(job_arn):
+    response = forecast_client.describe_dataset_import_job(
+        DatasetImportJobArn=job_arn
+    )
     logger.info({
-        'message': 'loading "params.json"',
+        'message': 'forecast_client.describe_dataset_import_job called',
+        'response': response
     })
-    params = load_params()
+    return response
+
+
+def describe_dataset(dataset_arn):
+    response = forecast_client.describe_dataset(
+        DatasetArn=dataset_arn
+    )
     logger.info({
-        'message': 'loaded "params.json" successfully',
-        'params': params
+        'message': 'forecast_client.describe_dataset called',
+        'response': response
     })
-    event.update(params)
+    return response
 
-    # Get the latest predictor. This is used in create_forecast Lambda function.
 
+def find_latest_predictor(project_name):
+    """
+    Return the latest ACTIVE predictor of a project and its datasets (see PredictorRegistry) by listing every predictor
+    of the account.
+    """
     # https://boto3.amazonaws.com/v1/documentation/api/latest/reference/services/forecast.html#ForecastService.Client.list_predictors
     paginator = forecast_client.get_paginator('list_predictors')
     filters = [{
@@ -65,26 +65,20 @@ def lambda_handler(event, _):
             result = compiled_predictor_pattern.match(predictor_arn)
             if result:
                 # Check if the predictor is associated to the target project.
-                project_name = result.group(1)
-                if project_name == event['ProjectName']:
+                if result.group(1) == project_name:
                     dt = datetime.datetime.strptime(
                         result.group(2), '%Y_%m_%d_%H_%M_%S')
-                    candidates.append({'arn': predictor_arn, 'dt': dt})
+                    candidates.append({'arn': predictor_arn, 'dt': dt, 'triggered_at': result.group(2)})
 
     # Get the latest predictor
-    latest_predictor_arn = ''
     sorted_candidates = sorted(candidates, key=lambda x: x['dt'])
-    if len(sorted_candidates) > 0:
-        latest_predictor_arn = sorted_candidates[-1]['arn']
-    else:
+    if len(sorted_candidates) == 0:
         # If there has not been any predictor, finish update_model_flow.
         raise Exception(
             'the latest predictor not found. the 1st execution of update-model statemachine has not been completed yet.')
+    latest_predictor_arn = sorted_candidates[-1]['arn']
 
-    event['LatestPredictorArn'] = latest_predictor_arn
-
-    # Get datasets associated to the latest predictor (predictor -> dataset import job -> datasets). This is used in create_dataset_import_job Lambda function.
-
+    # Get datasets associated to the latest predictor (predictor -> dataset import job -> datasets).
     response = forecast_client.describe_predictor(
         PredictorArn=latest_predictor_arn
     )
@@ -93,32 +87,90 @@ def lambda_handler(event, _):
         'response': response
     })
 
-    dataset_import_job_arns = response['DatasetImportJobArns']
-
-    for job_arn in dataset_import_job_arns:
-        response = forecast_client.describe_dataset_import_job(
-            DatasetImportJobArn=job_arn
-        )
-        logger.info({
-            'message': 'forecast_client.describe_dataset_import_job called',
-            'response': response
-        })
-        dataset_arn = response['DatasetArn']
-
-        response = forecast_client.describe_dataset(
-            DatasetArn=dataset_arn
-        )
-        logger.info({
-            'message': 'forecast_client.describe_dataset called',
-            'response': response
-        })
-        dataset_type = response['DatasetType']
-        dataset_name = response['DatasetName']
-
-        for dataset in event['Datasets']:
-            if dataset['DatasetType'] == dataset_type:
-                dataset['DatasetArn'] = dataset_arn
-                dataset['DatasetName'] = dataset_name
+    # The dataset import jobs are described at once, then their datasets.
+    fanout = Fanout()
+    jobs = fanout.map(describe_dataset_import_job, response['DatasetImportJobArns'])
+    dataset_arns = list(dict.fromkeys(job['DatasetArn'] for job in jobs))
+    datasets = [{key: response[key] for key in DATASET_KEYS}
+                for response in fanout.map(describe_dataset, dataset_arns)]
+
+    return {
+        'PredictorArn': latest_predictor_arn,
+        'TriggeredAt': sorted_candidates[-1]['triggered_at'],
+        'Datasets': datasets
+    }
+
+
+@lambda_handler_logger(logger=logger, lambda_name='init_update_forecast_flow')
+@claim_check
+def lambda_handler(event, _):
+    """
+    Lambda function handler
+    """
+    # Setup params
+    #   Replace hyphen of stack_name to underscore because some resource names do not support hyphen.
+    event['ProjectName'] = environ['STACK_NAME'].replace(
+        '-', '_')
+    event['AccountID'] = account_id()
+    event['Region'] = environ['AWS_REGION']
+
+    event['TriggeredAt'] = datetime.datetime.now().strftime(
+        "%Y_%m_%d_%H_%M_%S")
+    event['TraceId'] = event['StateMachineName'] + \
+        '_' + event['TriggeredAt']
+
+    # Update trace_id of logger
+    logger.structure_logs(
+        append=True, trace_id=event['TraceId'])
+
+    logger.info({
+        'message': 'loading "params.json"',
+    })
+    params = load_config().to_params()
+    logger.info({
+        'message': 'loaded "params.json" successfully',
+        'params': params
+    })
+    event.update(params)
+    datasets = index_by_type(event['Datasets'], 'Datasets')
+    event['CleanupScope'] = CLEANUP_SCOPE
+
+    # Get the latest predictor and its datasets. The predictor is used in create_forecast Lambda function, and the
+    # datasets in create_dataset_import_job Lambda function.
+    storage = get_storage()
+    registry = PredictorRegistry(storage)
+    latest = registry.latest(event['ProjectName'])
+    if latest is None:
+        # No predictor has been recorded since the registry was introduced.
+        latest = find_latest_predictor(event['ProjectName'])
+        registry.record(event['ProjectName'], latest['PredictorArn'], latest['TriggeredAt'], latest['Datasets'])
+    logger.info({
+        'message': 'the latest predictor found',
+        'latest_predictor': latest
+    })
+
+    event['LatestPredictorArn'] = latest['PredictorArn']
+    for dataset in latest['Datasets']:
+        if dataset['DatasetType'] in datasets:
+            datasets[dataset['DatasetType']]['DatasetArn'] = dataset['DatasetArn']
+            datasets[dataset['DatasetType']]['DatasetName'] = dataset['DatasetName']
+
+    # Skip dataset import jobs when every dataset file has the same content as the one imported last time.
+    ledger = DigestLedger(storage, work_key(LEDGER_NAME))
+    for job in event['DatasetImportJobs']:
+        job['Content'] = ledger.digest(
+            source_key(job['Filename']), job['Filename'])
+        dataset_arn = datasets[job['DatasetType']].get('DatasetArn')
+        job['Unchanged'] = ledger.is_imported(
+            job['Filename'], job['Content']['Digest'], dataset_arn)
+
+    event['SkipDatasetImport'] = all(
+        job['Unchanged'] for job in event['DatasetImportJobs'])
+    logger.info({
+        'message': 'checked changes of dataset files',
+        'dataset_import_jobs': event['DatasetImportJobs'],
+        'skip_dataset_import': event['SkipDatasetImport']
+    })
 
     logger.info({
         'message': 'finish initializing'
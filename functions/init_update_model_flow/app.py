@@ -3,18 +3,24 @@ Initialize update model flow.
 """
 from datetime import datetime
 from os import environ
-import boto3
 # From Lambda Layers
-from load_params import load_params  # pylint: disable=import-error
+from clients import client, account_id  # pylint: disable=import-error
+from config import load_config  # pylint: disable=import-error
+from content_digest import DigestLedger, LEDGER_NAME  # pylint: disable=import-error
+from storage import get_storage, source_key, work_key  # pylint: disable=import-error
 from lambda_handler_logger import lambda_handler_logger  # pylint: disable=import-error
+from claim_check import claim_check  # pylint: disable=import-error
 from aws_lambda_powertools import Logger  # pylint: disable=import-error
 
+# Resources deleted by collect_outdated_resources (see Inventory.deletion_plan)
+CLEANUP_SCOPE = 'MODEL'
 
 logger = Logger()
-forecast_client = boto3.client('forecast')
+forecast_client = client('forecast')
 
 
 @lambda_handler_logger(logger=logger, lambda_name='init_update_model_flow')
+@claim_check
 def lambda_handler(event, _):
     """
     Lambda function handler
@@ -23,8 +29,7 @@ def lambda_handler(event, _):
     #   Replace hyphen of stack_name to underscore because some resource names do not support hyphen.
     event['ProjectName'] = environ['STACK_NAME'].replace(
         '-', '_')
-    event['AccountID'] = boto3.client(
-        'sts').get_caller_identity()['Account']
+    event['AccountID'] = account_id()
     event['Region'] = environ['AWS_REGION']
 
     event['TriggeredAt'] = datetime.now().strftime(
@@ -39,12 +44,22 @@ def lambda_handler(event, _):
     logger.info({
         'message': 'loading "params.json"',
     })
-    params = load_params()
+    params = load_config().to_params()
     logger.info({
         'message': 'loaded "params.json" successfully',
         'params': params
     })
     event.update(params)
+    event['CleanupScope'] = CLEANUP_SCOPE
+
+    # Digests of dataset files are recorded when the files are imported, so that update-forecast flow can skip unchanged files.
+    ledger = DigestLedger(get_storage(), work_key(LEDGER_NAME))
+    for job in event['DatasetImportJobs']:
+        job['Content'] = ledger.digest(
+            source_key(job['Filename']), job['Filename'])
+
+    # Dataset files are profiled by validate_dataset_files in the same pass as their validation.
+    event['ProfileDatasets'] = True
 
     logger.info({
         'message': 'finish initializing'
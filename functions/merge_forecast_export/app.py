@@ -0,0 +1,91 @@
+"""
+Merge the parts of a forecast export into one file sorted by item_id and date, and write its item index and manifest.
+"""
+import re
+import json
+from os import environ
+# From Lambda Layers
+from export_merger import merge_export  # pylint: disable=import-error
+from storage import get_storage  # pylint: disable=import-error
+from lambda_handler_logger import lambda_handler_logger  # pylint: disable=import-error
+from claim_check import claim_check  # pylint: disable=import-error
+from aws_lambda_powertools import Logger  # pylint: disable=import-error
+
+PART_PREFIX = '{folder}/{export_job_name}_'
+PART_PATTERN = r'_part([0-9]+)\.csv$'
+MERGED_FILE_KEY = '{folder}/{export_job_name}.csv'
+INDEX_KEY = '{folder}/{export_job_name}.index.csv'
+MANIFEST_KEY = '{folder}/{export_job_name}.manifest.json'
+LATEST_MANIFEST_KEY = '{folder}/latest.json'
+
+logger = Logger()
+compiled_part_pattern = re.compile(PART_PATTERN)
+
+
+def get_part_keys(storage, export_job_name):
+    """
+    List export parts of the export job in the order of part numbers.
+    """
+    part_keys = []
+    for key in storage.list_keys(PART_PREFIX.format(
+            folder=environ['TGT_S3_FOLDER'], export_job_name=export_job_name)):
+        result = compiled_part_pattern.search(key)
+        if result:
+            part_keys.append((int(result.group(1)), key))
+    return [key for _, key in sorted(part_keys)]
+
+
+@lambda_handler_logger(logger=logger, lambda_name='merge_forecast_export')
+@claim_check
+def lambda_handler(event, _):
+    """
+    Lambda function handler
+    """
+    storage = get_storage()
+    export_job_name = event['ForecastExportJobName']
+    part_keys = get_part_keys(storage, export_job_name)
+    if len(part_keys) == 0:
+        raise Exception(
+            'export parts of {} not found.'.format(export_job_name))
+
+    merged_key = MERGED_FILE_KEY.format(
+        folder=environ['MERGED_S3_FOLDER'], export_job_name=export_job_name)
+    index_key = INDEX_KEY.format(
+        folder=environ['MERGED_S3_FOLDER'], export_job_name=export_job_name)
+    logger.info({
+        'message': 'merging export parts',
+        'part_keys': part_keys,
+        'merged_key': merged_key,
+        'index_key': index_key
+    })
+    stats = merge_export(storage, part_keys, merged_key, index_key)
+
+    manifest = dict(stats, ForecastExportJobName=export_job_name,
+                    Key=merged_key, IndexKey=index_key, Parts=part_keys)
+    manifest_key = MANIFEST_KEY.format(
+        folder=environ['MERGED_S3_FOLDER'], export_job_name=export_job_name)
+    storage.put_bytes(manifest_key, json.dumps(manifest).encode('utf-8'))
+    logger.info({
+        'message': 'export parts merged',
+        'manifest': manifest,
+        'manifest_key': manifest_key
+    })
+
+    # Keep the pointer to the latest and the previous export (used to compare runs).
+    latest_key = LATEST_MANIFEST_KEY.format(folder=environ['MERGED_S3_FOLDER'])
+    previous_manifest_key = None
+    if storage.stat(latest_key) is not None:
+        latest = json.loads(storage.get_bytes(latest_key).decode('utf-8'))
+        if latest['ManifestKey'] == manifest_key:
+            # This function has been retried.
+            previous_manifest_key = latest['PreviousManifestKey']
+        else:
+            previous_manifest_key = latest['ManifestKey']
+    storage.put_bytes(latest_key, json.dumps({
+        'ManifestKey': manifest_key,
+        'PreviousManifestKey': previous_manifest_key
+    }).encode('utf-8'))
+
+    event['ForecastExportManifestKey'] = manifest_key
+    event['PreviousForecastExportManifestKey'] = previous_manifest_key
+    return event
@@ -0,0 +1,121 @@
+"""
+Regularize time series dataset files to the DataFrequency of params.json before dataset import jobs are created.
+RELATED_TIME_SERIES is extended to the end of the forecast horizon of the target time series. The end of the target is
+taken from this run when the target is regularized, from the ledger when the file has been imported, or from a scan of
+the file otherwise. The ledger keeps the horizon end of the imported related time series, so an unchanged file is
+imported again when the horizon moves.
+"""
+# From Lambda Layers
+from config import load_config  # pylint: disable=import-error
+from content_digest import DigestLedger, LEDGER_NAME  # pylint: disable=import-error
+from dataset_schema import attributes  # pylint: disable=import-error
+from storage import get_storage, source_key, work_key  # pylint: disable=import-error
+from staging import staging_key  # pylint: disable=import-error
+from lambda_handler_logger import lambda_handler_logger  # pylint: disable=import-error
+from claim_check import claim_check  # pylint: disable=import-error
+from aws_lambda_powertools import Logger  # pylint: disable=import-error
+
+STAGED_FILE_NAME = '{dataset_type}.csv'
+
+logger = Logger()
+
+
+def target_end_of(storage, ledger, job, dataset, timestamp_format):
+    """
+    Return the last timestamp of the target time series file of a job which is not regularized in this run.
+    """
+    entry = ledger.entries.get(job['Filename'])
+    if entry is not None and 'End' in entry and entry['Digest'] == job.get('Content', {}).get('Digest'):
+        return entry['End']
+    from resampler import series_end  # pylint: disable=import-error,import-outside-toplevel
+    end = series_end(storage, job.get('StagedKey', source_key(job['Filename'])), dataset, timestamp_format)
+    if 'Content' in job:
+        # Recorded in the ledger when the file is imported (see create_dataset_import_job)
+        job['Content']['End'] = end
+    return end
+
+
+@lambda_handler_logger(logger=logger, lambda_name='regularize_dataset_files')
+@claim_check
+def lambda_handler(event, _):
+    """
+    Lambda function handler
+    """
+    settings = event.get('Regularization', {})
+    storage = get_storage()
+    config = load_config()
+    ledger = DigestLedger(storage, work_key(LEDGER_NAME))
+    target_end = None
+
+    # TARGET_TIME_SERIES is processed first because RELATED_TIME_SERIES is extended to the end of its forecast horizon.
+    jobs = sorted(event['DatasetImportJobs'],
+                  key=lambda job: job['DatasetType'] != 'TARGET_TIME_SERIES')
+    target_job = next((job for job in jobs if job['DatasetType'] == 'TARGET_TIME_SERIES'), None)
+    for job in jobs:
+        if job['DatasetType'] not in settings:
+            continue
+        dataset = config.dataset(job['DatasetType'])
+        if 'timestamp' not in [t for _, t in attributes(dataset)]:
+            continue
+        # numpy is only loaded for time series files (update-forecast flow skips this function when no file changed).
+        from resampler import regularize_file, horizon_end  # pylint: disable=import-error,import-outside-toplevel
+
+        end = None
+        if job['DatasetType'] == 'RELATED_TIME_SERIES' and target_job is not None:
+            if target_end is None:
+                target_end = target_end_of(storage, ledger, target_job, config.dataset('TARGET_TIME_SERIES'),
+                                           event['DatasetTimestampFormat'])
+            if target_end is not None:
+                end = str(horizon_end(
+                    target_end,
+                    event['Predictor']['FeaturizationConfig']['ForecastFrequency'],
+                    event['Predictor']['ForecastHorizon']
+                ))
+            entry = ledger.entries.get(job['Filename'], {})
+            if job.get('Unchanged', False) and entry.get('HorizonEnd') != end:
+                # The file has been imported, but it does not reach the end of the current forecast horizon.
+                job['Unchanged'] = False
+                logger.info({
+                    'message': 'related time series is imported again for the new forecast horizon',
+                    'filename': job['Filename'],
+                    'imported_horizon_end': entry.get('HorizonEnd'),
+                    'horizon_end': end
+                })
+            if 'Content' in job:
+                job['Content']['HorizonEnd'] = end
+
+        # The file has already been imported (see init_update_forecast_flow).
+        if job.get('Unchanged', False):
+            continue
+
+        src_key = job.get('StagedKey', source_key(job['Filename']))
+        dst_key = staging_key(event['TriggeredAt'], STAGED_FILE_NAME.format(dataset_type=job['DatasetType']))
+        logger.info({
+            'message': 'regularizing dataset file',
+            'src_key': src_key,
+            'dst_key': dst_key,
+            'settings': settings[job['DatasetType']],
+            'end': str(end)
+        })
+        result = regularize_file(
+            storage, src_key, dst_key, dataset, event['DatasetTimestampFormat'],
+            settings[job['DatasetType']]['Aggregation'],
+            settings[job['DatasetType']]['Fill'],
+            end
+        )
+        logger.info({
+            'message': 'dataset file regularized',
+            'result': result,
+            'dst_key': dst_key
+        })
+
+        job['StagedKey'] = dst_key
+        if job['DatasetType'] == 'TARGET_TIME_SERIES':
+            target_end = result['End']
+            if 'Content' in job:
+                job['Content']['End'] = target_end
+
+    logger.info({
+        'message': 'all dataset files were regularized'
+    })
+    return event
@@ -1,15 +1,39 @@
+PENDING_STATUSES = {'CREATE_PENDING', 'CREATE_IN_PROGRESS', 'UPDATE_PENDING', 'UPDATE_IN_PROGRESS'}
+
 
 class ResourcePending(Exception):
-    pass
+    """
+    `resources` are the ARNs of the resources being created or deleted (see task_callback).
+    """
+
+    def __init__(self, resources=None):
+        self.resources = list(resources or [])
+        super().__init__(self.resources)
 
 
 class ResourceFailed(Exception):
     pass
 
 
-def take_action(status):
-    if status in {'CREATE_PENDING', 'CREATE_IN_PROGRESS', 'UPDATE_PENDING', 'UPDATE_IN_PROGRESS'}:
-        raise ResourcePending
+class InvalidDatasetFile(Exception):
+    pass
+
+
+def take_action(status, arn=None):
+    if status in PENDING_STATUSES:
+        raise ResourcePending([arn] if arn else None)
     if status != 'ACTIVE':
         raise ResourceFailed
     return True
+
+
+def take_actions(statuses):
+    """
+    Check the statuses of resources created concurrently ({ARN: status}, None for resources not created yet).
+    """
+    for status in statuses.values():
+        if status is not None and status != 'ACTIVE' and status not in PENDING_STATUSES:
+            raise ResourceFailed
+    if any(status is None or status in PENDING_STATUSES for status in statuses.values()):
+        raise ResourcePending([arn for arn, status in statuses.items() if status in PENDING_STATUSES])
+    return True
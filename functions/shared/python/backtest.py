@@ -0,0 +1,265 @@
+"""
+Backtest of a past forecast export against the actuals which arrived later in the target time series.
+Forecasts and actuals are joined on (item_id, dimensions, timestamp), then WQL and coverage of every quantile,
+RMSE and MAPE are computed per item and in aggregate with NumPy (vectorized across items and quantiles).
+Both files are hash-partitioned by item into temporary files, so memory is bounded by the partition size.
+"""
+import io
+import csv
+import tempfile
+import numpy as np
+from storage import iter_lines  # pylint: disable=import-error
+from dataset_schema import attributes  # pylint: disable=import-error
+from partitioning import KEY_SEPARATOR, partition_count, partitions, open_partitions, partition_rows  # pylint: disable=import-error
+from time_series import parse_timestamps, parse_floats  # pylint: disable=import-error
+from export_merger import DATE_COLUMN  # pylint: disable=import-error
+from forecast_diff import value_columns  # pylint: disable=import-error
+
+KEY_TYPES = {'string', 'geolocation'}
+ROWS_PER_WRITE = 10000
+
+
+def quantile_level(column):
+    """
+    Return the quantile of a forecast column (p10 -> 0.1, p05 -> 0.05), or None for mean.
+    """
+    if not column.startswith('p'):
+        return None
+    return float('0.' + column[1:])
+
+
+def parse_export_dates(values):
+    """
+    Parse the date column of a forecast export (e.g. 2014-01-01T00:00:00Z) into a datetime64[s] array.
+    """
+    strings = np.char.rstrip(np.array(values, dtype=np.str_), 'Z')
+    try:
+        return strings.astype('datetime64[s]')
+    except ValueError:
+        dates = np.empty(len(strings), dtype='datetime64[s]')
+        for i, value in enumerate(strings):
+            try:
+                dates[i] = np.datetime64(value, 's')
+            except ValueError:
+                dates[i] = np.datetime64('NaT')
+        return dates
+
+
+def _join_keys(series, seconds):
+    """
+    Encode (series, seconds) pairs of several tables into int64 keys.
+    Return the sorted series names, and the series codes and the keys of each table.
+    """
+    names, codes = np.unique(np.concatenate(series), return_inverse=True)
+    all_seconds = np.concatenate(seconds)
+    base = all_seconds.min()
+    span = all_seconds.max() - base + 1
+    keys = codes.astype(np.int64) * span + (all_seconds - base)
+    boundaries = np.cumsum([len(s) for s in series[:-1]])
+    return names, np.split(codes, boundaries), np.split(keys, boundaries)
+
+
+class Backtest:
+    """
+    Errors of a forecast export against actuals, accumulated partition by partition.
+    """
+
+    def __init__(self, header, dataset, timestamp_format):
+        columns = attributes(dataset)
+        names = [name for name, _ in columns]
+        self.width = len(columns)
+        self.timestamp_format = timestamp_format
+        self.actual_key_indices = [i for i, (_, t) in enumerate(columns) if t in KEY_TYPES]
+        self.series_columns = [names[i] for i in self.actual_key_indices]
+        missing = [name for name in self.series_columns if name not in header]
+        if missing:
+            raise Exception('forecast export has no column {}'.format(missing))
+        self.actual_timestamp_index = [t for _, t in columns].index('timestamp')
+        self.actual_value_index = names.index('target_value') if 'target_value' in names else \
+            [t for _, t in columns].index('float')
+
+        self.header = header
+        self.export_key_indices = [header.index(name) for name in self.series_columns]
+        self.export_date_index = header.index(DATE_COLUMN)
+        self.quantile_columns = [name for name in value_columns(header) if quantile_level(name) is not None]
+        self.quantiles = np.array([quantile_level(name) for name in self.quantile_columns])
+        point = [name for name in ['mean', 'p50'] if name in header]
+        if not point:
+            raise Exception('forecast export has neither mean nor p50: {}'.format(header))
+        self.point_column = point[0]
+
+        n = len(self.quantiles)
+        self.totals = {'Rows': 0, 'Series': 0, 'ForecastRows': 0, 'AbsoluteActual': 0.0,
+                       'QuantileLoss': np.zeros(n), 'Covered': np.zeros(n), 'SquaredError': 0.0,
+                       'PercentageError': 0.0, 'PercentageRows': 0}
+
+    def _series(self, rows, indices):
+        return np.array([KEY_SEPARATOR.join(row[i].strip() for i in indices) for row in rows], dtype=np.str_)
+
+    def _actuals(self, rows):
+        rows = [row for row in rows if len(row) == self.width]
+        series = self._series(rows, self.actual_key_indices)
+        timestamps = parse_timestamps(
+            [row[self.actual_timestamp_index].strip() for row in rows], self.timestamp_format)
+        values = parse_floats([row[self.actual_value_index] for row in rows])
+        valid = ~np.isnat(timestamps) & ~np.isnan(values)
+        return series[valid], timestamps[valid].astype(np.int64), values[valid]
+
+    def _forecasts(self, rows):
+        rows = [row for row in rows if len(row) == len(self.header)]
+        series = self._series(rows, self.export_key_indices)
+        dates = parse_export_dates([row[self.export_date_index] for row in rows])
+        forecasts = np.column_stack(
+            [parse_floats([row[self.header.index(name)] for row in rows])
+             for name in self.quantile_columns + [self.point_column]])
+        valid = ~np.isnat(dates) & ~np.isnan(forecasts).any(axis=1)
+        return series[valid], dates[valid].astype(np.int64), forecasts[valid]
+
+    def add(self, actual_rows, forecast_rows, writer=None):
+        """
+        Add a partition. All rows of an item must be in the same partition of both files.
+        Per-series metrics are written to the csv writer when it is given.
+        """
+        actual_series, actual_seconds, actual_values = self._actuals(actual_rows)
+        forecast_series, forecast_seconds, forecasts = self._forecasts(forecast_rows)
+        self.totals['ForecastRows'] += len(forecast_series)
+        if len(actual_series) == 0 or len(forecast_series) == 0:
+            return
+        names, (_, forecast_codes), (actual_keys, forecast_keys) = _join_keys(
+            [actual_series, forecast_series], [actual_seconds, forecast_seconds])
+
+        # Actuals of the same series and timestamp are summed up
+        actual_keys, inverse = np.unique(actual_keys, return_inverse=True)
+        actual_values = np.bincount(inverse, actual_values)
+        _, actual_indices, forecast_indices = np.intersect1d(
+            actual_keys, forecast_keys, assume_unique=False, return_indices=True)
+        if len(forecast_indices) == 0:
+            return
+
+        y = actual_values[actual_indices]
+        predictions = forecasts[forecast_indices]
+        quantile_forecasts = predictions[:, :-1]
+        point = predictions[:, -1]
+        codes = forecast_codes[forecast_indices]
+
+        # Errors of every row (n,) and of every row and quantile (n, Q)
+        difference = y[:, None] - quantile_forecasts
+        losses = 2 * np.maximum(self.quantiles * difference, (self.quantiles - 1) * difference)
+        covered = (y[:, None] <= quantile_forecasts).astype(np.float64)
+        squared = np.square(y - point)
+        nonzero = y != 0
+        with np.errstate(invalid='ignore', divide='ignore'):
+            percentage = np.where(nonzero, np.abs(y - point) / np.abs(y), 0.0)
+
+        # Sums per series: rows are sorted by series, then reduced at the first row of each series
+        order = np.argsort(codes, kind='stable')
+        codes = codes[order]
+        starts = np.flatnonzero(np.r_[True, codes[1:] != codes[:-1]])
+        rows = np.diff(np.r_[starts, len(codes)])
+        sums = np.add.reduceat(np.column_stack([
+            np.abs(y), squared, percentage, nonzero.astype(np.float64)
+        ])[order], starts, axis=0)
+        loss_sums = np.add.reduceat(losses[order], starts, axis=0)
+        covered_sums = np.add.reduceat(covered[order], starts, axis=0)
+
+        self.totals['Rows'] += len(y)
+        self.totals['Series'] += len(starts)
+        self.totals['AbsoluteActual'] += float(sums[:, 0].sum())
+        self.totals['SquaredError'] += float(sums[:, 1].sum())
+        self.totals['PercentageError'] += float(sums[:, 2].sum())
+        self.totals['PercentageRows'] += int(sums[:, 3].sum())
+        self.totals['QuantileLoss'] += loss_sums.sum(axis=0)
+        self.totals['Covered'] += covered_sums.sum(axis=0)
+
+        if writer is None:
+            return
+        with np.errstate(invalid='ignore', divide='ignore'):
+            wql = loss_sums / sums[:, [0]]
+            rmse = np.sqrt(sums[:, 1] / rows)
+            mape = sums[:, 2] / sums[:, 3]
+            coverage = covered_sums / rows[:, None]
+        series_names = names[codes[starts]]
+        for start in range(0, len(starts), ROWS_PER_WRITE):
+            end = start + ROWS_PER_WRITE
+            writer.writerows(
+                key.split(KEY_SEPARATOR) + [n] + _round(w) + _round([r, m]) + _round(c)
+                for key, n, w, r, m, c in zip(
+                    series_names[start:end].tolist(), rows[start:end].tolist(), wql[start:end].tolist(),
+                    rmse[start:end].tolist(), mape[start:end].tolist(), coverage[start:end].tolist()))
+
+    def metric_names(self):
+        """
+        Return the header of the per-series metrics.
+        """
+        return self.series_columns + ['rows'] + \
+            ['wql_{}'.format(name) for name in self.quantile_columns] + ['rmse', 'mape'] + \
+            ['coverage_{}'.format(name) for name in self.quantile_columns]
+
+    def to_dict(self):
+        totals = self.totals
+        result = {
+            'Rows': totals['Rows'],
+            'Series': totals['Series'],
+            'ForecastRows': totals['ForecastRows'],
+            'PointForecast': self.point_column
+        }
+        if totals['Rows'] == 0:
+            return result
+        result.update({
+            'WQL': {name: float(loss / totals['AbsoluteActual']) if totals['AbsoluteActual'] > 0 else None
+                    for name, loss in zip(self.quantile_columns, totals['QuantileLoss'])},
+            'RMSE': (totals['SquaredError'] / totals['Rows']) ** 0.5,
+            'MAPE': totals['PercentageError'] / totals['PercentageRows'] if totals['PercentageRows'] > 0 else None,
+            'Coverage': {name: float(covered / totals['Rows'])
+                         for name, covered in zip(self.quantile_columns, totals['Covered'])}
+        })
+        return result
+
+
+def _round(values):
+    # Metrics are undefined (NaN or inf) e.g. for WQL of a series whose actuals are all zero
+    return ['{:.6g}'.format(v) if np.isfinite(v) else '' for v in values]
+
+
+def backtest_file(storage, actual_key, export_key, dataset, timestamp_format, metrics_key=None):
+    """
+    Backtest a merged forecast export in the storage against a target time series file.
+    Per-series metrics are written to metrics_key as CSV when it is given. Return the aggregate metrics.
+    """
+    names = [name for name, _ in attributes(dataset)]
+    item_index = names.index('item_id') if 'item_id' in names else \
+        [t for _, t in attributes(dataset)].index('string')
+    count = partition_count(storage.stat(actual_key)['Size'] + storage.stat(export_key)['Size'])
+
+    with tempfile.TemporaryDirectory() as actual_directory, \
+            tempfile.TemporaryDirectory() as export_directory:
+        header, export_partitions = open_partitions(storage, export_key, count, export_directory)
+        stream = storage.open_read(actual_key)
+        try:
+            actual_partitions = partitions(iter_lines(stream), item_index, count, actual_directory)
+        finally:
+            stream.close()
+
+        backtest = Backtest(header, dataset, timestamp_format)
+        dst = storage.open_write(metrics_key) if metrics_key else None
+        try:
+            buffer = io.StringIO()
+            writer = csv.writer(buffer, lineterminator='\n')
+            writer.writerow(backtest.metric_names())
+            for actual_partition, export_partition in zip(actual_partitions, export_partitions):
+                backtest.add(partition_rows(actual_partition), partition_rows(export_partition), writer)
+                if dst is not None:
+                    dst.write(buffer.getvalue().encode('utf-8'))
+                buffer.seek(0)
+                buffer.truncate()
+        except Exception as e:
+            # Do not leave a partial object in S3
+            if dst is not None:
+                getattr(dst, 'abort', dst.close)()
+            raise e
+        if dst is not None:
+            dst.close()
+
+    result = backtest.to_dict()
+    result.update({'ActualKey': actual_key, 'ExportKey': export_key, 'Partitions': count})
+    return result
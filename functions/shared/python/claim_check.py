@@ -0,0 +1,164 @@
+"""
+Claim checks of the bulky fields of the events passed between the states of a flow.
+The Datasets list with its schemas, the other parts of params.json and the ARNs derived from them travel through every
+state, and Step Functions limits the input and output of a state to 256 KB. The claim_check decorator stores each
+list or dict field of the result of a Lambda function which is serialized into MIN_CLAIM_BYTES or more in the work
+folder, and passes {"ClaimCheck": <key>} instead. The keys are digests of the contents, so a field which is not
+changed by a function is stored once.
+The next function gets a ClaimCheckEvent, which loads a field from the reference only when the field is read. The
+contents are cached for the life of the execution environment (up to MAX_CACHE_BYTES).
+Claims are shared by the executions, so they are expired by age rather than deleted when a flow finishes: a claim is
+written again when it is checked in REFRESH_SECONDS after it was written, and expire_claims() (called at the end of
+the flows) deletes the claims which have not been written for CLAIM_TTL seconds. The bucket is given to the stack, so
+its lifecycle rules are left to the owner of the bucket.
+Scalar fields (TraceId, SkipDatasetImport etc.) stay in the event, so Choice states and the logs can read them.
+"""
+import json
+import time
+import hashlib
+import functools
+import collections
+from storage import get_storage, work_key  # pylint: disable=import-error
+
+CLAIM_FOLDER = 'claims'
+REFERENCE_KEY = 'ClaimCheck'
+MIN_CLAIM_BYTES = 512
+MAX_CACHE_BYTES = 32 * 1024 * 1024
+# A claim is written again after REFRESH_SECONDS, so the claims referenced by an execution shorter than
+# CLAIM_TTL - REFRESH_SECONDS are not expired.
+REFRESH_SECONDS = 24 * 60 * 60
+CLAIM_TTL = 7 * 24 * 60 * 60
+
+# key -> (JSON text of a claimed value, time when this environment wrote it or None), least recently used first
+_cache = collections.OrderedDict()
+_cache_bytes = 0
+
+
+def is_reference(value):
+    return isinstance(value, dict) and len(value) == 1 and REFERENCE_KEY in value
+
+
+def claim_key(text):
+    return work_key(CLAIM_FOLDER, hashlib.sha256(text.encode('utf-8')).hexdigest() + '.json')
+
+
+def _cache_text(key, text, written_at=None):
+    global _cache_bytes  # pylint: disable=global-statement
+    if key in _cache:
+        _cache.move_to_end(key)
+        if written_at is not None:
+            _cache[key] = (text, written_at)
+        return
+    _cache[key] = (text, written_at)
+    _cache_bytes += len(text)
+    while _cache_bytes > MAX_CACHE_BYTES and len(_cache) > 1:
+        _, (evicted, _) = _cache.popitem(last=False)
+        _cache_bytes -= len(evicted)
+
+
+def _discard(key):
+    global _cache_bytes  # pylint: disable=global-statement
+    if key in _cache:
+        text, _ = _cache.pop(key)
+        _cache_bytes -= len(text)
+
+
+def check_in(storage, value, now=None):
+    """
+    Store a value and return a reference to it. Return the value itself when it is small or not a list or dict.
+    """
+    if not isinstance(value, (list, dict)) or is_reference(value):
+        return value
+    text = json.dumps(value, separators=(',', ':'), sort_keys=True)
+    if len(text) < MIN_CLAIM_BYTES:
+        return value
+    key = claim_key(text)
+    now = time.time() if now is None else now
+    _, written_at = _cache.get(key, (None, None))
+    if written_at is None or now - written_at >= REFRESH_SECONDS:
+        storage.put_bytes(key, text.encode('utf-8'))
+        written_at = now
+    _cache_text(key, text, written_at)
+    return {REFERENCE_KEY: key}
+
+
+def redeem(storage, reference):
+    """
+    Return a new copy of the value of a reference.
+    """
+    key = reference[REFERENCE_KEY]
+    text, _ = _cache.get(key, (None, None))
+    if text is None:
+        # The age of the object is unknown, so it is written again when it is checked in.
+        text = storage.get_bytes(key).decode('utf-8')
+    _cache_text(key, text)
+    return json.loads(text)
+
+
+def expire_claims(storage, now=None, ttl=CLAIM_TTL):
+    """
+    Delete the claims which have not been written for `ttl` seconds. Return the deleted keys.
+    """
+    now = time.time() if now is None else now
+    expired = sorted(key for key, modified in storage.list_modified(work_key(CLAIM_FOLDER, '')).items()
+                     if now - modified > ttl)
+    for key in expired:
+        storage.delete(key)
+        _discard(key)
+    return expired
+
+
+class ClaimCheckEvent(dict):
+    """
+    Event of which the fields passed as references are loaded when they are read (with [], get or setdefault).
+    Iterating the event (or serializing it) gives the references of the fields which have not been read.
+    """
+
+    def __init__(self, event, storage=None):
+        super().__init__(event)
+        self._storage = storage
+
+    @property
+    def storage(self):
+        if self._storage is None:
+            self._storage = get_storage()
+        return self._storage
+
+    def _redeem(self, key):
+        value = super().__getitem__(key)
+        if is_reference(value):
+            value = redeem(self.storage, value)
+            super().__setitem__(key, value)
+        return value
+
+    def __getitem__(self, key):
+        return self._redeem(key)
+
+    def get(self, key, default=None):
+        return self._redeem(key) if key in self else default
+
+    def setdefault(self, key, default=None):
+        return self._redeem(key) if key in self else super().setdefault(key, default)
+
+    def check_in(self):
+        """
+        Return a plain dict of the event with its bulky fields replaced by references.
+        """
+        return {key: check_in(self.storage, value) if isinstance(value, (list, dict)) else value
+                for key, value in self.items()}
+
+
+def claim_check(func):
+    """
+    Decorator of lambda_handler() (apply it inside lambda_handler_logger) to pass the bulky fields of events as
+    references.
+    """
+    @functools.wraps(func)
+    def wrapper(event, context):
+        result = func(ClaimCheckEvent(event), context)
+        if isinstance(result, dict):
+            if not isinstance(result, ClaimCheckEvent):
+                result = ClaimCheckEvent(result)
+            return result.check_in()
+        return result
+    return wrapper
@@ -0,0 +1,77 @@
+"""
+boto3 clients shared by Lambda functions.
+Clients are created on first use rather than at import time, once per service and execution environment, with the same
+connection pool, timeouts and retry settings.
+Retries of the client are adaptive (client-side rate limiting on throttling) and kept short, because
+long-running waits are handled by the state machines (Retry on ResourcePending, or task tokens).
+boto3 itself is imported on first use too, so importing a handler (the cold start) does not pay for it, and code paths
+which never call AWS (e.g. local runs with LOCAL_STORAGE_ROOT) never load it.
+"""
+import threading
+
+MAX_POOL_CONNECTIONS = 32
+CONNECT_TIMEOUT = 5
+READ_TIMEOUT = 60
+MAX_ATTEMPTS = 5
+
+_clients = {}
+_lock = threading.Lock()
+_account_id = None
+
+
+def client_config():
+    from botocore.config import Config  # pylint: disable=import-outside-toplevel
+    return Config(
+        max_pool_connections=MAX_POOL_CONNECTIONS,
+        connect_timeout=CONNECT_TIMEOUT,
+        read_timeout=READ_TIMEOUT,
+        retries={
+            'mode': 'adaptive',
+            'max_attempts': MAX_ATTEMPTS
+        }
+    )
+
+
+def get_client(service_name):
+    """
+    Return the client of the service, creating it on first call.
+    """
+    client = _clients.get(service_name)
+    if client is None:
+        # boto3.client() is not thread safe
+        with _lock:
+            client = _clients.get(service_name)
+            if client is None:
+                import boto3  # pylint: disable=import-outside-toplevel
+                client = boto3.client(service_name, config=client_config())
+                _clients[service_name] = client
+    return client
+
+
+class LazyClient:
+    """
+    Stand-in for a boto3 client which is created on first attribute access (e.g. forecast_client.describe_predictor).
+    """
+
+    def __init__(self, service_name):
+        self._service_name = service_name
+
+    def __getattr__(self, name):
+        return getattr(get_client(self._service_name), name)
+
+
+def client(service_name):
+    """
+    Return a lazily created client of the service. Use this at module level instead of boto3.client().
+    """
+    return LazyClient(service_name)
+
+
+def account_id():
+    """
+    Return the AWS account ID, calling STS once per execution environment (it does not change between invocations).
+    """
+    global _account_id  # pylint: disable=global-statement
+    if _account_id is None:
+        _account_id = get_client('sts').get_caller_identity()['Account']
+    return _account_id
@@ -0,0 +1,36 @@
+"""
+Concurrent creation of Amazon Forecast resources under a concurrency ceiling
+(e.g. the quota of 'Maximum parallel running CreateDatasetImportJob tasks').
+Each call describes every resource, then creates missing ones while fewer than `ceiling` resources are being created.
+Resources which cannot be created yet are created by the next call (Step Functions retries on ResourcePending).
+"""
+from concurrent.futures import ThreadPoolExecutor
+from actions import PENDING_STATUSES  # pylint: disable=import-error
+from rate_limiter import TokenBucket  # pylint: disable=import-error
+
+MAX_WORKERS = 8
+# Create calls per second
+CREATE_REQUESTS_PER_SECOND = 1
+
+
+def create_concurrently(keys, describe, create, ceiling, limiter=None):
+    """
+    describe(key) returns the status of a resource, or None when it does not exist.
+    create(key) creates a resource and returns its status.
+    Return {key: status} (None for the resources which have not been created because of the ceiling).
+    """
+    if not keys:
+        return {}
+    limiter = limiter or TokenBucket(CREATE_REQUESTS_PER_SECOND)
+
+    def limited_create(key):
+        limiter.acquire()
+        return create(key)
+
+    with ThreadPoolExecutor(max_workers=min(MAX_WORKERS, len(keys))) as executor:
+        statuses = dict(zip(keys, executor.map(describe, keys)))
+        running = len([key for key in keys if statuses[key] in PENDING_STATUSES])
+        missing = [key for key in keys if statuses[key] is None]
+        creating = missing[:max(ceiling - running, 0)]
+        statuses.update(zip(creating, executor.map(limited_create, creating)))
+    return statuses
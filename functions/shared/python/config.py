@@ -0,0 +1,142 @@
+"""
+params.json validated once per execution environment.
+load_config() parses and validates the file on the first call, and returns the same PipelineConfig on warm invocations.
+params.json of the Lambda layer is read-only, so it is not checked again; a file given by PARAMS_PATH (local runs) is
+parsed again when it changes.
+The settings of the datasets and the dataset import jobs are indexed by DatasetType and frozen (dicts become read-only
+mappings and lists become tuples), so that they are shared between invocations safely.
+to_params() returns a new copy of the parameters as plain dicts to be put into an event, made from a marshal snapshot
+of the parsed parameters (about twice as fast as parsing the JSON text again).
+"""
+import os
+import json
+import marshal
+from types import MappingProxyType
+from load_params import PARAMS_PATH  # pylint: disable=import-error
+
+REQUIRED_KEYS = ['DatasetGroup', 'Predictor', 'Forecast', 'DatasetTimestampFormat', 'Datasets', 'DatasetImportJobs']
+TARGET_DATASET_TYPE = 'TARGET_TIME_SERIES'
+DEFAULT_IMPORT_FORMAT = 'CSV'
+
+# path -> (modification time, size, PipelineConfig)
+_configs = {}
+
+
+class InvalidParams(Exception):
+    pass
+
+
+def freeze(value):
+    """
+    Return a read-only copy of a JSON value.
+    """
+    if isinstance(value, dict):
+        return MappingProxyType({key: freeze(item) for key, item in value.items()})
+    if isinstance(value, list):
+        return tuple(freeze(item) for item in value)
+    return value
+
+
+def index_by_type(items, name):
+    """
+    Return {DatasetType: item} of the dataset settings or the dataset import jobs (`name` is used in errors).
+    """
+    index = {}
+    for item in items:
+        if 'DatasetType' not in item:
+            raise InvalidParams('"DatasetType" is missing in {}: {}'.format(name, item))
+        if item['DatasetType'] in index:
+            raise InvalidParams('{} has more than one "{}".'.format(name, item['DatasetType']))
+        index[item['DatasetType']] = item
+    return index
+
+
+def validate(params):
+    """
+    Check the structure of params.json which the handlers rely on. Raise InvalidParams when it is broken.
+    """
+    missing = [key for key in REQUIRED_KEYS if key not in params]
+    if missing:
+        raise InvalidParams('params.json does not have {}.'.format(missing))
+    datasets = index_by_type(params['Datasets'], 'Datasets')
+    jobs = index_by_type(params['DatasetImportJobs'], 'DatasetImportJobs')
+    if TARGET_DATASET_TYPE not in datasets:
+        raise InvalidParams('Datasets does not have "{}".'.format(TARGET_DATASET_TYPE))
+    for dataset_type, dataset in datasets.items():
+        if not dataset.get('Schema', {}).get('Attributes'):
+            raise InvalidParams('the schema of "{}" has no attributes.'.format(dataset_type))
+        if dataset_type not in jobs:
+            raise InvalidParams('DatasetImportJobs does not have "{}".'.format(dataset_type))
+    for dataset_type, job in jobs.items():
+        if dataset_type not in datasets:
+            raise InvalidParams('Datasets does not have "{}" of DatasetImportJobs.'.format(dataset_type))
+        if not job.get('Filename'):
+            raise InvalidParams('"Filename" is missing in the dataset import job of "{}".'.format(dataset_type))
+    for name, ceiling in params.get('CreateConcurrency', {}).items():
+        # With 0, nothing would be created and the flow would wait until it times out.
+        if not isinstance(ceiling, int) or isinstance(ceiling, bool) or ceiling < 1:
+            raise InvalidParams('CreateConcurrency.{} must be a positive integer: {}'.format(name, ceiling))
+
+
+class PipelineConfig:
+    """
+    Frozen parameters of params.json.
+    datasets and dataset_import_jobs are read-only mappings {DatasetType: settings}.
+    """
+    __slots__ = ('datasets', 'dataset_import_jobs', 'timestamp_format', 'import_format', '_snapshot')
+
+    def __init__(self, params):
+        validate(params)
+        frozen = freeze(params)
+        object.__setattr__(self, 'datasets', MappingProxyType(index_by_type(frozen['Datasets'], 'Datasets')))
+        object.__setattr__(self, 'dataset_import_jobs', MappingProxyType(
+            index_by_type(frozen['DatasetImportJobs'], 'DatasetImportJobs')))
+        object.__setattr__(self, 'timestamp_format', params['DatasetTimestampFormat'])
+        object.__setattr__(self, 'import_format', params.get('DatasetImportFormat', DEFAULT_IMPORT_FORMAT))
+        object.__setattr__(self, '_snapshot', marshal.dumps(params))
+
+    def __setattr__(self, name, value):
+        raise AttributeError('PipelineConfig is read-only')
+
+    def dataset(self, dataset_type):
+        """
+        Return the settings of the dataset whose DatasetType is dataset_type.
+        """
+        try:
+            return self.datasets[dataset_type]
+        except KeyError:
+            raise Exception('failed to find dataset of type "{}".'.format(dataset_type)) from None
+
+    def import_job(self, dataset_type):
+        """
+        Return the dataset import job of the dataset whose DatasetType is dataset_type.
+        """
+        try:
+            return self.dataset_import_jobs[dataset_type]
+        except KeyError:
+            raise Exception('failed to find dataset import job of type "{}".'.format(dataset_type)) from None
+
+    def to_params(self):
+        """
+        Return a new copy of the parameters as plain dicts and lists.
+        """
+        return marshal.loads(self._snapshot)
+
+
+def load_config(path=None):
+    """
+    Return the PipelineConfig of params.json (PARAMS_PATH overrides the path like load_params()).
+    The file is parsed and validated again only when its modification time or size changes, except params.json of
+    the Lambda layer, which is never checked again.
+    """
+    path = path or os.environ.get('PARAMS_PATH', PARAMS_PATH)
+    if path == PARAMS_PATH and path in _configs:
+        return _configs[path][2]
+    stat = os.stat(path)
+    cached = _configs.get(path)
+    if cached is not None and cached[:2] == (stat.st_mtime_ns, stat.st_size):
+        return cached[2]
+    with open(path) as f:
+        config = PipelineConfig(json.load(f))
+    _configs[path] = (stat.st_mtime_ns, stat.st_size, config)
+    return config
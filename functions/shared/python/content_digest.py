@@ -0,0 +1,71 @@
+"""
+Content digests of dataset files and the ledger of digests which have already been imported.
+"""
+import json
+import hashlib
+from storage import CHUNK_SIZE  # pylint: disable=import-error
+
+DIGEST_ALGORITHM = 'sha256'
+# Key of the ledger under the work folder
+LEDGER_NAME = 'ledger/dataset_digests.json'
+
+
+def compute_digest(storage, key, chunk_size=CHUNK_SIZE):
+    """
+    Compute the digest of an object by hashing fixed-size chunks.
+    """
+    hasher = hashlib.new(DIGEST_ALGORITHM)
+    stream = storage.open_read(key)
+    try:
+        while True:
+            chunk = stream.read(chunk_size)
+            if not chunk:
+                break
+            hasher.update(chunk)
+    finally:
+        stream.close()
+    return '{}:{}'.format(DIGEST_ALGORITHM, hasher.hexdigest())
+
+
+class DigestLedger:
+    """
+    Ledger of the dataset files imported to Forecast datasets, keyed by Filename.
+    Each entry has the digest of the file, the ETag and size of the object it was computed from, and the dataset ARN.
+    """
+
+    def __init__(self, storage, key):
+        self.storage = storage
+        self.key = key
+        if storage.stat(key) is None:
+            self.entries = {}
+        else:
+            self.entries = json.loads(storage.get_bytes(key).decode('utf-8'))
+
+    def digest(self, key, filename):
+        """
+        Return the digest of a dataset file and the object metadata it was computed from.
+        The file is hashed only when its ETag or size differs from the ledger entry.
+        """
+        stat = self.storage.stat(key)
+        if stat is None:
+            raise Exception(
+                'dataset file not found: {}'.format(self.storage.uri(key)))
+        entry = self.entries.get(filename)
+        if entry is not None and entry['ETag'] == stat['ETag'] and entry['Size'] == stat['Size']:
+            digest = entry['Digest']
+        else:
+            digest = compute_digest(self.storage, key)
+        return {'Digest': digest, 'ETag': stat['ETag'], 'Size': stat['Size']}
+
+    def is_imported(self, filename, digest, dataset_arn):
+        """
+        Return True when the same content has already been imported to the dataset.
+        """
+        entry = self.entries.get(filename)
+        return entry is not None and entry['Digest'] == digest and entry['DatasetArn'] == dataset_arn
+
+    def record(self, filename, content, dataset_arn):
+        self.entries[filename] = dict(content, DatasetArn=dataset_arn)
+
+    def save(self):
+        self.storage.put_bytes(self.key, json.dumps(self.entries).encode('utf-8'))
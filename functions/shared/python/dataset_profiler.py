@@ -0,0 +1,235 @@
+"""
+Single-pass profiler of dataset files. validate_and_profile_file() validates a file in the same pass.
+Rows are parsed in batches into NumPy arrays. Memory grows with the number of items, not with the number of rows.
+"""
+import csv
+import itertools
+import numpy as np
+from storage import iter_lines, CHUNK_SIZE  # pylint: disable=import-error
+from dataset_schema import attributes  # pylint: disable=import-error
+from dataset_validator import Validator  # pylint: disable=import-error
+from time_series import parse_timestamps, parse_floats, to_periods  # pylint: disable=import-error
+
+ROWS_PER_BATCH = 100000
+# Size of the uniform sample of values used to estimate quantiles
+SAMPLE_SIZE = 10000
+QUANTILES = [0.01, 0.1, 0.5, 0.9, 0.99]
+INITIAL_ITEMS = 1024
+
+
+class _ItemStatistics:
+    """
+    Number of rows and the first and last timestamp of each item.
+    Items are mapped to array indices with a hash table.
+    """
+
+    def __init__(self):
+        self.codes = {}
+        self.counts = np.zeros(INITIAL_ITEMS, dtype=np.int64)
+        self.first = np.full(INITIAL_ITEMS, np.iinfo(np.int64).max, dtype=np.int64)
+        self.last = np.full(INITIAL_ITEMS, np.iinfo(np.int64).min, dtype=np.int64)
+
+    def _grow(self, size):
+        capacity = max(size, 2 * len(self.counts))
+        extra = capacity - len(self.counts)
+        self.counts = np.concatenate([self.counts, np.zeros(extra, dtype=np.int64)])
+        self.first = np.concatenate(
+            [self.first, np.full(extra, np.iinfo(np.int64).max, dtype=np.int64)])
+        self.last = np.concatenate(
+            [self.last, np.full(extra, np.iinfo(np.int64).min, dtype=np.int64)])
+
+    def add(self, items, seconds=None):
+        codes = np.fromiter(
+            (self.codes.setdefault(item, len(self.codes)) for item in items),
+            dtype=np.int64, count=len(items))
+        if len(self.codes) > len(self.counts):
+            self._grow(len(self.codes))
+        np.add.at(self.counts, codes, 1)
+        if seconds is not None:
+            np.minimum.at(self.first, codes, seconds)
+            np.maximum.at(self.last, codes, seconds)
+
+    def to_dict(self, frequency=None):
+        n = len(self.codes)
+        result = {'Items': n}
+        if n > 0 and frequency is not None:
+            counts = self.counts[:n]
+            result['SeriesLength'] = {
+                'Min': int(counts.min()),
+                'Median': float(np.median(counts)),
+                'Mean': float(counts.mean()),
+                'Max': int(counts.max())
+            }
+            first = self.first[:n].astype('datetime64[s]')
+            last = self.last[:n].astype('datetime64[s]')
+            expected = to_periods(last, frequency) - to_periods(first, frequency) + 1
+            missing = np.maximum(expected - counts, 0)
+            result['TimeRange'] = {
+                'Start': str(first.min()),
+                'End': str(last.max())
+            }
+            result['MissingTimestampRatio'] = float(missing.sum() / expected.sum())
+        return result
+
+
+class _ValueStatistics:
+    """
+    Moments, extremes and a uniform sample (bottom-k of random keys) of a numeric column.
+    """
+
+    def __init__(self, seed=0):
+        self.rng = np.random.RandomState(seed)
+        self.count = 0
+        self.missing = 0
+        self.zeros = 0
+        self.total = 0.0
+        self.total_squares = 0.0
+        self.minimum = np.inf
+        self.maximum = -np.inf
+        self.sample = np.empty(0, dtype=np.float64)
+        self.sample_keys = np.empty(0, dtype=np.float64)
+
+    def add(self, values):
+        valid = values[~np.isnan(values)]
+        self.missing += len(values) - len(valid)
+        if len(valid) == 0:
+            return
+        self.count += len(valid)
+        self.zeros += int(np.count_nonzero(valid == 0))
+        self.total += float(valid.sum())
+        self.total_squares += float(np.square(valid).sum())
+        self.minimum = min(self.minimum, float(valid.min()))
+        self.maximum = max(self.maximum, float(valid.max()))
+
+        sample = np.concatenate([self.sample, valid])
+        keys = np.concatenate([self.sample_keys, self.rng.random_sample(len(valid))])
+        if len(sample) > SAMPLE_SIZE:
+            kept = np.argpartition(keys, SAMPLE_SIZE)[:SAMPLE_SIZE]
+            sample, keys = sample[kept], keys[kept]
+        self.sample, self.sample_keys = sample, keys
+
+    def to_dict(self, column):
+        result = {'Column': column, 'Count': self.count, 'Missing': self.missing}
+        if self.count == 0:
+            return result
+        mean = self.total / self.count
+        result.update({
+            'Zeros': self.zeros,
+            'Min': self.minimum,
+            'Max': self.maximum,
+            'Mean': mean,
+            'Std': max(self.total_squares / self.count - mean * mean, 0.0) ** 0.5,
+            'Quantiles': {str(q): float(v)
+                          for q, v in zip(QUANTILES, np.quantile(self.sample, QUANTILES))}
+        })
+        return result
+
+
+def _column_indices(dataset):
+    columns = attributes(dataset)
+    names = [name for name, _ in columns]
+    item_index = names.index('item_id') if 'item_id' in names else \
+        [t for _, t in columns].index('string')
+    timestamp_index = None
+    value_index = None
+    for i, (name, attribute_type) in enumerate(columns):
+        if attribute_type == 'timestamp' and timestamp_index is None:
+            timestamp_index = i
+        if attribute_type in ('float', 'integer') and (value_index is None or name == 'target_value'):
+            value_index = i
+    return names, item_index, timestamp_index, value_index
+
+
+def profile_lines(lines, dataset, timestamp_format, rows_per_batch=ROWS_PER_BATCH):
+    """
+    Profile CSV lines of a dataset and return the statistics.
+    """
+    return profile_rows(csv.reader(lines), dataset, timestamp_format, rows_per_batch)
+
+
+def profile_rows(rows, dataset, timestamp_format, rows_per_batch=ROWS_PER_BATCH):
+    """
+    Profile the CSV rows (lists of values) of a dataset and return the statistics. Malformed rows are skipped.
+    """
+    names, item_index, timestamp_index, value_index = _column_indices(dataset)
+    items = _ItemStatistics()
+    values = _ValueStatistics()
+    count = 0
+    invalid_timestamps = 0
+
+    reader = (row for row in rows if len(row) == len(names))
+    while True:
+        batch = list(itertools.islice(reader, rows_per_batch))
+        if not batch:
+            break
+        count += len(batch)
+        item_column = [row[item_index].strip() for row in batch]
+        if timestamp_index is None:
+            items.add(item_column)
+            continue
+
+        timestamps = parse_timestamps(
+            [row[timestamp_index].strip() for row in batch], timestamp_format)
+        valid = ~np.isnat(timestamps)
+        invalid_timestamps += int(len(valid) - np.count_nonzero(valid))
+        items.add([item for item, v in zip(item_column, valid) if v],
+                  timestamps[valid].astype(np.int64))
+        if value_index is not None:
+            values.add(parse_floats([row[value_index] for row in batch]))
+
+    profile = {'DatasetType': dataset['DatasetType'], 'Rows': count}
+    if timestamp_index is None:
+        profile.update(items.to_dict())
+        return profile
+
+    profile.update(items.to_dict(dataset['DataFrequency']))
+    profile['InvalidTimestamps'] = invalid_timestamps
+    if value_index is not None:
+        profile['Values'] = values.to_dict(names[value_index])
+    return profile
+
+
+def profile_file(storage, key, dataset, timestamp_format, chunk_size=CHUNK_SIZE):
+    """
+    Profile a dataset file in the storage in one pass.
+    """
+    stream = storage.open_read(key)
+    try:
+        return profile_lines(iter_lines(stream, chunk_size), dataset, timestamp_format)
+    finally:
+        stream.close()
+
+
+def validate_and_profile_file(storage, key, dataset, timestamp_format, chunk_size=CHUNK_SIZE):
+    """
+    Validate (see dataset_validator) and profile a dataset file in the same pass. Return (report, profile).
+    """
+    validator = Validator(dataset, timestamp_format)
+    stream = storage.open_read(key)
+    try:
+        profile = profile_rows(validator.check(csv.reader(iter_lines(stream, chunk_size))),
+                               dataset, timestamp_format)
+    finally:
+        stream.close()
+    report = validator.report()
+    report['Key'] = key
+    return report, profile
+
+
+def check_profile(profile, limits):
+    """
+    Return the violations of limits (e.g. {"MinItems": 1, "MaxMissingTimestampRatio": 0.5}) found in a profile.
+    """
+    violations = []
+    if 'MinItems' in limits and profile.get('Items', 0) < limits['MinItems']:
+        violations.append('{} has {} items (MinItems: {})'.format(
+            profile['DatasetType'], profile.get('Items', 0), limits['MinItems']))
+    if 'MinSeriesLength' in limits and 'SeriesLength' in profile and \
+            profile['SeriesLength']['Min'] < limits['MinSeriesLength']:
+        violations.append('{} has a series of {} rows (MinSeriesLength: {})'.format(
+            profile['DatasetType'], profile['SeriesLength']['Min'], limits['MinSeriesLength']))
+    if 'MaxMissingTimestampRatio' in limits and \
+            profile.get('MissingTimestampRatio', 0) > limits['MaxMissingTimestampRatio']:
+        violations.append('{} has missing timestamp ratio {:.3f} (MaxMissingTimestampRatio: {})'.format(
+            profile['DatasetType'], profile['MissingTimestampRatio'], limits['MaxMissingTimestampRatio']))
+    return violations
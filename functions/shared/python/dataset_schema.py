@@ -0,0 +1,45 @@
+"""
+Helpers for reading the dataset settings of params.json (schemas, timestamp format).
+"""
+import re
+
+# Amazon Forecast uses Java style timestamp formats (e.g. "yyyy-MM-dd HH:mm:ss").
+# Forecast accepts both "HH" and "hh" as 24-hour clock.
+JAVA_TIMESTAMP_TOKENS = {
+    'yyyy': '%Y',
+    'MM': '%m',
+    'dd': '%d',
+    'HH': '%H',
+    'hh': '%H',
+    'mm': '%M',
+    'ss': '%S',
+}
+compiled_java_timestamp_token_pattern = re.compile(
+    '|'.join(sorted(JAVA_TIMESTAMP_TOKENS, key=len, reverse=True)))
+
+
+def to_strptime_format(timestamp_format):
+    """
+    Convert a Forecast timestamp format (e.g. "yyyy-MM-dd hh:mm:ss") to a strptime format.
+    """
+    return compiled_java_timestamp_token_pattern.sub(
+        lambda m: JAVA_TIMESTAMP_TOKENS[m.group(0)], timestamp_format)
+
+
+def find_dataset(datasets, dataset_type):
+    """
+    Return the dataset whose DatasetType is dataset_type.
+    """
+    for dataset in datasets:
+        if dataset['DatasetType'] == dataset_type:
+            return dataset
+    raise Exception(
+        'failed to find dataset of type "{}".'.format(dataset_type))
+
+
+def attributes(dataset):
+    """
+    Return the (AttributeName, AttributeType) pairs of a dataset in file column order.
+    """
+    return [(attribute['AttributeName'], attribute['AttributeType'])
+            for attribute in dataset['Schema']['Attributes']]
@@ -0,0 +1,146 @@
+"""
+Streaming validator of dataset files against the schema in params.json.
+Files are read in fixed-size chunks and only error counters and a few samples are kept,
+so memory usage does not depend on the file size.
+"""
+import csv
+import math
+from datetime import datetime
+from storage import iter_lines, CHUNK_SIZE  # pylint: disable=import-error
+from dataset_schema import attributes, to_strptime_format  # pylint: disable=import-error
+
+# Number of invalid values kept per column in the report
+MAX_SAMPLES = 5
+# Empty values are treated as missing values by Forecast for these types.
+NULLABLE_TYPES = {'integer', 'float'}
+
+
+def _check_string(value, _):
+    return value != ''
+
+
+def _check_integer(value, _):
+    try:
+        int(value)
+    except ValueError:
+        return False
+    return True
+
+
+def _check_float(value, _):
+    try:
+        return math.isfinite(float(value))
+    except ValueError:
+        return False
+
+
+def _check_timestamp(value, strptime_format):
+    try:
+        datetime.strptime(value, strptime_format)
+    except ValueError:
+        return False
+    return True
+
+
+CHECKERS = {
+    'string': _check_string,
+    'geolocation': _check_string,
+    'integer': _check_integer,
+    'float': _check_float,
+    'timestamp': _check_timestamp,
+}
+
+
+class _ErrorCounter:
+    """
+    Number of errors and the first MAX_SAMPLES of them.
+    """
+
+    def __init__(self):
+        self.errors = 0
+        self.samples = []
+
+    def add(self, line_number, value):
+        self.errors += 1
+        if len(self.samples) < MAX_SAMPLES:
+            self.samples.append({'Line': line_number, 'Value': value})
+
+    def to_dict(self):
+        return {'Errors': self.errors, 'Samples': self.samples}
+
+
+class Validator:
+    """
+    Validator of the CSV rows of a dataset. check() passes the rows through, so that another consumer (e.g. the
+    profiler of dataset_profiler) reads the same rows in the same pass.
+    """
+
+    def __init__(self, dataset, timestamp_format):
+        columns = attributes(dataset)
+        self.dataset_type = dataset['DatasetType']
+        self.strptime_format = to_strptime_format(timestamp_format)
+        self.checks = [(name, CHECKERS[attribute_type], attribute_type in NULLABLE_TYPES)
+                       for name, attribute_type in columns]
+        self.counters = {name: _ErrorCounter() for name, _ in columns}
+        self.malformed_rows = _ErrorCounter()
+        self.rows = 0
+        self.invalid_rows = 0
+
+    def check(self, rows):
+        """
+        Validate rows (lists of values) and yield them.
+        """
+        for line_number, row in enumerate(rows, start=1):
+            if row:
+                self._check_row(line_number, row)
+            yield row
+
+    def _check_row(self, line_number, row):
+        self.rows += 1
+        if len(row) != len(self.checks):
+            self.malformed_rows.add(line_number, ','.join(row))
+            self.invalid_rows += 1
+            return
+        valid = True
+        for (name, check, nullable), value in zip(self.checks, row):
+            value = value.strip()
+            if nullable and value == '':
+                continue
+            if not check(value, self.strptime_format):
+                self.counters[name].add(line_number, value)
+                valid = False
+        if not valid:
+            self.invalid_rows += 1
+
+    def report(self):
+        return {
+            'DatasetType': self.dataset_type,
+            'Rows': self.rows,
+            'InvalidRows': self.invalid_rows,
+            'MalformedRows': self.malformed_rows.to_dict(),
+            'Columns': {name: counter.to_dict() for name, counter in self.counters.items()
+                        if counter.errors > 0}
+        }
+
+
+def validate_lines(lines, dataset, timestamp_format):
+    """
+    Validate CSV lines against the schema of the dataset and return a report.
+    """
+    validator = Validator(dataset, timestamp_format)
+    for _ in validator.check(csv.reader(lines)):
+        pass
+    return validator.report()
+
+
+def validate_file(storage, key, dataset, timestamp_format, chunk_size=CHUNK_SIZE):
+    """
+    Validate a dataset file in the storage in one pass.
+    """
+    stream = storage.open_read(key)
+    try:
+        report = validate_lines(iter_lines(stream, chunk_size), dataset, timestamp_format)
+    finally:
+        stream.close()
+    report['Key'] = key
+    return report
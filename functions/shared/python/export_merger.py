@@ -0,0 +1,199 @@
+"""
+Streaming merge of forecast export parts (project_name_timestamp_partN.csv) into one file sorted by item and date.
+Each part is sorted in chunks of bounded size into run files, then the runs are merged with a k-way merge of at most
+MAX_FAN_IN runs at once (more runs are first merged in passes into longer runs), so memory and open files are bounded by
+the chunk size and MAX_FAN_IN, not by the total size of the export.
+As rows of an item are contiguous in the output, an index of (item_id, byte offset, byte length) is written as well.
+"""
+import io
+import os
+import re
+import csv
+import heapq
+import tempfile
+from operator import itemgetter
+from storage import iter_lines  # pylint: disable=import-error
+
+ROWS_PER_RUN = 200000
+ROWS_PER_WRITE = 10000
+# Maximum number of run files merged (and opened) at once
+MAX_FAN_IN = 64
+DATE_COLUMN = 'date'
+INDEX_HEADER = ['item_id', 'offset', 'length']
+# Forecast values of the export (p10, p50, p90, mean...)
+compiled_value_column_pattern = re.compile(r'^(p[0-9]+|mean)$')
+
+
+def key_columns(header):
+    """
+    Return the indices of the columns which identify a row: item_id and the other dimensions first, then date.
+    """
+    dimensions = [i for i, name in enumerate(header)
+                  if name != DATE_COLUMN and not compiled_value_column_pattern.match(name)]
+    dimensions.sort(key=lambda i: header[i] != 'item_id')
+    return dimensions + [header.index(DATE_COLUMN)]
+
+
+def _write_run(directory, rows, key):
+    rows.sort(key=key)
+    path = os.path.join(directory, 'run_{}.csv'.format(len(os.listdir(directory))))
+    with open(path, 'w', newline='') as f:
+        csv.writer(f).writerows(rows)
+    return path
+
+
+def sort_runs(storage, keys, directory, rows_per_run=ROWS_PER_RUN):
+    """
+    Split export parts into sorted run files in the directory. Return the header and the run file paths.
+    """
+    header = None
+    key = None
+    runs = []
+    for part_key in keys:
+        stream = storage.open_read(part_key)
+        try:
+            reader = csv.reader(iter_lines(stream))
+            part_header = next(reader, None)
+            if part_header is None:
+                continue
+            if header is None:
+                header = part_header
+                key = itemgetter(*key_columns(header))
+            elif part_header != header:
+                raise Exception('export parts have different columns: {} and {}'.format(
+                    header, part_header))
+            rows = []
+            for row in reader:
+                if len(row) != len(header):
+                    continue
+                rows.append(row)
+                if len(rows) >= rows_per_run:
+                    runs.append(_write_run(directory, rows, key))
+                    rows = []
+            if rows:
+                runs.append(_write_run(directory, rows, key))
+        finally:
+            stream.close()
+    return header, runs
+
+
+def _merge_group(runs, key, path):
+    files = [open(run, newline='') for run in runs]
+    try:
+        with open(path, 'w', newline='') as f:
+            csv.writer(f).writerows(heapq.merge(*[csv.reader(run) for run in files], key=key))
+    finally:
+        for run in files:
+            run.close()
+    for run in runs:
+        os.remove(run)
+    return path
+
+
+def reduce_runs(header, runs, max_fan_in=MAX_FAN_IN):
+    """
+    Merge groups of at most max_fan_in sorted run files into longer runs (next to them) until max_fan_in or fewer are
+    left. Merged runs are deleted. Return the remaining run file paths and the number of passes.
+    """
+    if max_fan_in < 2:
+        raise Exception('max_fan_in must be 2 or more: {}'.format(max_fan_in))
+    key = itemgetter(*key_columns(header))
+    passes = 0
+    while len(runs) > max_fan_in:
+        passes += 1
+        runs = [_merge_group(runs[i:i + max_fan_in], key, os.path.join(
+            os.path.dirname(runs[i]), 'pass_{}_run_{}.csv'.format(passes, i // max_fan_in)))
+            for i in range(0, len(runs), max_fan_in)]
+    return runs, passes
+
+
+def merge_runs(header, runs, dst, index=None, max_fan_in=MAX_FAN_IN):
+    """
+    Merge sorted run files into dst, dropping rows whose key has already been written.
+    When there are more than max_fan_in runs, they are reduced first (see reduce_runs).
+    When index is given, (item_id, offset, length) of each item is written to it as CSV.
+    Return the statistics of the output.
+    """
+    key = itemgetter(*key_columns(header))
+    runs, passes = reduce_runs(header, runs, max_fan_in)
+    item_index = header.index('item_id')
+    files = [open(path, newline='') for path in runs]
+    stats = {'Rows': 0, 'Duplicates': 0, 'Items': 0, 'Bytes': 0, 'Passes': passes + 1}
+    # Rows are encoded as they are written, so that the byte offset of each item is known
+    buffer = io.BytesIO()
+    writer = csv.writer(io.TextIOWrapper(buffer, encoding='utf-8', newline='', write_through=True),
+                        lineterminator='\n')
+    index_buffer = io.StringIO()
+    index_writer = csv.writer(index_buffer, lineterminator='\n')
+    index_writer.writerow(INDEX_HEADER)
+
+    def flush():
+        data = buffer.getvalue()
+        dst.write(data)
+        stats['Bytes'] += len(data)
+        buffer.seek(0)
+        buffer.truncate()
+        if index is not None:
+            index.write(index_buffer.getvalue().encode('utf-8'))
+        index_buffer.seek(0)
+        index_buffer.truncate()
+
+    try:
+        writer.writerow(header)
+        previous_key = None
+        previous_item = None
+        item_offset = 0
+        pending = 0
+        for row in heapq.merge(*[csv.reader(f) for f in files], key=key):
+            row_key = key(row)
+            if row_key == previous_key:
+                stats['Duplicates'] += 1
+                continue
+            previous_key = row_key
+            if row[item_index] != previous_item:
+                offset = stats['Bytes'] + buffer.tell()
+                if previous_item is not None:
+                    index_writer.writerow([previous_item, item_offset, offset - item_offset])
+                previous_item = row[item_index]
+                item_offset = offset
+                stats['Items'] += 1
+            writer.writerow(row)
+            stats['Rows'] += 1
+            pending += 1
+            if pending >= ROWS_PER_WRITE:
+                flush()
+                pending = 0
+        if previous_item is not None:
+            index_writer.writerow(
+                [previous_item, item_offset, stats['Bytes'] + buffer.tell() - item_offset])
+        flush()
+    finally:
+        for f in files:
+            f.close()
+    return stats
+
+
+def merge_export(storage, part_keys, dst_key, index_key=None):
+    """
+    Merge export parts in the storage into one CSV file sorted by item and date.
+    When index_key is given, the item index of the merged file is written to it.
+    """
+    with tempfile.TemporaryDirectory() as directory:
+        header, runs = sort_runs(storage, part_keys, directory)
+        if header is None:
+            raise Exception('export parts are empty: {}'.format(part_keys))
+        dst = storage.open_write(dst_key)
+        index = storage.open_write(index_key) if index_key else None
+        try:
+            stats = merge_runs(header, runs, dst, index)
+        except Exception as e:
+            # Do not leave a partial object in S3
+            for f in (dst, index):
+                if f is not None:
+                    getattr(f, 'abort', f.close)()
+            raise e
+        dst.close()
+        if index is not None:
+            index.close()
+    stats.update({'Header': header, 'Runs': len(runs)})
+    return stats
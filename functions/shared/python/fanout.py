@@ -0,0 +1,32 @@
+"""
+Concurrent describe calls along the relationships of Amazon Forecast resources
+(e.g. predictor -> dataset import jobs -> datasets, or dataset groups -> datasets).
+Fanout.map() describes every resource of one level at once on at most `max_workers` threads, so walking N resources
+takes about one round trip per level instead of N. Results are memoized for the life of the Fanout (create one per
+invocation), so a resource reached from several parents (e.g. a dataset with several import jobs) is described once.
+"""
+from concurrent.futures import ThreadPoolExecutor
+
+MAX_WORKERS = 8
+
+
+class Fanout:
+    """
+    Memoized results {describe function: {key: result}}.
+    """
+
+    def __init__(self, max_workers=MAX_WORKERS):
+        self.max_workers = max_workers
+        self.results = {}
+
+    def map(self, describe, keys):
+        """
+        Return [describe(key) for key in keys], calling describe concurrently once per key which has not been described.
+        describe should be the same function object for the same kind of resource (not a new lambda per call).
+        """
+        results = self.results.setdefault(describe, {})
+        missing = [key for key in dict.fromkeys(keys) if key not in results]
+        if missing:
+            with ThreadPoolExecutor(max_workers=min(self.max_workers, len(missing))) as executor:
+                results.update(zip(missing, executor.map(describe, missing)))
+        return [results[key] for key in keys]
@@ -0,0 +1,188 @@
+"""
+Run-over-run diff of merged forecast exports with NumPy.
+Rows of the previous and the current export are joined on (item_id, dimensions, date), and absolute and relative
+changes of every forecast value column (p10, p50, p90, mean...) are computed per row and per item.
+Both files are hash-partitioned by item into temporary files, so memory is bounded by the partition size.
+"""
+import tempfile
+import numpy as np
+from export_merger import key_columns, compiled_value_column_pattern  # pylint: disable=import-error
+from partitioning import KEY_SEPARATOR, partition_count, open_partitions, partition_rows  # pylint: disable=import-error
+from time_series import parse_floats  # pylint: disable=import-error
+
+TOP_MOVERS = 20
+# Upper edges of the buckets of relative changes (the last bucket has no upper edge)
+RELATIVE_CHANGE_EDGES = [0.01, 0.05, 0.1, 0.2, 0.5, 1.0]
+PRIMARY_COLUMNS = ['p50', 'mean']
+
+
+def value_columns(header):
+    """
+    Return the names of the forecast value columns of an export.
+    """
+    return [name for name in header if compiled_value_column_pattern.match(name)]
+
+
+def _histogram(relative_changes):
+    relative_changes = relative_changes[np.isfinite(relative_changes)]
+    buckets = np.searchsorted(RELATIVE_CHANGE_EDGES, relative_changes, side='right')
+    return np.bincount(buckets, minlength=len(RELATIVE_CHANGE_EDGES) + 1)
+
+
+def _histogram_labels():
+    labels = []
+    lower = 0.0
+    for upper in RELATIVE_CHANGE_EDGES:
+        labels.append('{:g}-{:g}'.format(lower, upper))
+        lower = upper
+    labels.append('{:g}-'.format(lower))
+    return labels
+
+
+class _ColumnStatistics:
+    """
+    Changes of a forecast value column summed over partitions.
+    """
+
+    def __init__(self):
+        self.rows = 0
+        self.total_absolute = 0.0
+        self.total_previous = 0.0
+        self.maximum_absolute = 0.0
+        self.row_histogram = np.zeros(len(RELATIVE_CHANGE_EDGES) + 1, dtype=np.int64)
+        self.item_histogram = np.zeros(len(RELATIVE_CHANGE_EDGES) + 1, dtype=np.int64)
+
+    def add(self, previous, current, codes, items):
+        absolute = np.abs(current - previous)
+        valid = ~np.isnan(absolute)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            relative = absolute / np.abs(previous)
+        relative[np.abs(previous) == 0] = np.nan
+        self.rows += int(np.count_nonzero(valid))
+        self.total_absolute += float(absolute[valid].sum())
+        self.total_previous += float(np.abs(previous[valid]).sum())
+        if valid.any():
+            self.maximum_absolute = max(self.maximum_absolute, float(absolute[valid].max()))
+        self.row_histogram += _histogram(relative)
+
+        # Changes per item (total absolute change relative to the total of the previous forecast)
+        item_absolute = np.bincount(codes, np.where(valid, absolute, 0.0), minlength=items)
+        item_previous = np.bincount(codes, np.where(valid, np.abs(previous), 0.0), minlength=items)
+        item_rows = np.bincount(codes, valid.astype(np.float64), minlength=items)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            item_relative = np.where(item_previous > 0, item_absolute / item_previous, np.nan)
+            item_mean_absolute = np.where(item_rows > 0, item_absolute / item_rows, np.nan)
+        self.item_histogram += _histogram(item_relative)
+        return item_relative, item_mean_absolute
+
+    def to_dict(self, column):
+        result = {'Column': column, 'Rows': self.rows}
+        if self.rows == 0:
+            return result
+        labels = _histogram_labels()
+        result.update({
+            'MeanAbsoluteChange': self.total_absolute / self.rows,
+            'MaxAbsoluteChange': self.maximum_absolute,
+            'RelativeChange': self.total_absolute / self.total_previous if self.total_previous > 0 else None,
+            'RowHistogram': dict(zip(labels, self.row_histogram.tolist())),
+            'ItemHistogram': dict(zip(labels, self.item_histogram.tolist()))
+        })
+        return result
+
+
+class ForecastDiff:
+    """
+    Diff of two exports, accumulated partition by partition.
+    """
+
+    def __init__(self, previous_header, current_header, top_movers=TOP_MOVERS):
+        if [previous_header[i] for i in key_columns(previous_header)] != \
+                [current_header[i] for i in key_columns(current_header)]:
+            raise Exception('exports have different keys: {} and {}'.format(previous_header, current_header))
+        self.previous_header = previous_header
+        self.current_header = current_header
+        self.columns = [name for name in value_columns(current_header)
+                        if name in previous_header]
+        primary = [name for name in PRIMARY_COLUMNS if name in self.columns]
+        self.primary_column = primary[0] if primary else (self.columns[0] if self.columns else None)
+        self.top_movers = top_movers
+        self.statistics = {name: _ColumnStatistics() for name in self.columns}
+        self.counts = {'MatchedRows': 0, 'NewRows': 0, 'DroppedRows': 0,
+                       'MatchedItems': 0, 'NewItems': 0, 'DroppedItems': 0}
+        self.movers = []
+
+    def _arrays(self, header, rows):
+        rows = [row for row in rows if len(row) == len(header)]
+        indices = key_columns(header)
+        item_index = header.index('item_id')
+        keys = np.array([KEY_SEPARATOR.join(row[i] for i in indices) for row in rows], dtype=np.str_)
+        items = np.array([row[item_index] for row in rows], dtype=np.str_)
+        values = {name: parse_floats([row[header.index(name)] for row in rows])
+                  for name in self.columns}
+        return keys, items, values
+
+    def add(self, previous_rows, current_rows):
+        """
+        Add a partition. All rows of an item must be in the same partition of both exports.
+        """
+        previous_keys, previous_items, previous_values = self._arrays(self.previous_header, previous_rows)
+        current_keys, current_items, current_values = self._arrays(self.current_header, current_rows)
+        _, previous_indices, current_indices = np.intersect1d(
+            previous_keys, current_keys, assume_unique=True, return_indices=True)
+        self.counts['MatchedRows'] += len(current_indices)
+        self.counts['NewRows'] += len(current_keys) - len(current_indices)
+        self.counts['DroppedRows'] += len(previous_keys) - len(previous_indices)
+        unique_previous_items = np.unique(previous_items)
+        unique_current_items = np.unique(current_items)
+        self.counts['NewItems'] += len(np.setdiff1d(unique_current_items, unique_previous_items,
+                                                    assume_unique=True))
+        self.counts['DroppedItems'] += len(np.setdiff1d(unique_previous_items, unique_current_items,
+                                                        assume_unique=True))
+        if len(current_indices) == 0:
+            return
+
+        matched_items, codes = np.unique(current_items[current_indices], return_inverse=True)
+        self.counts['MatchedItems'] += len(matched_items)
+        for name in self.columns:
+            item_relative, item_mean_absolute = self.statistics[name].add(
+                previous_values[name][previous_indices], current_values[name][current_indices],
+                codes, len(matched_items))
+            if name != self.primary_column:
+                continue
+            # Keep the top movers of the partition only
+            ranked = np.flatnonzero(~np.isnan(item_relative))
+            if len(ranked) > self.top_movers:
+                ranked = ranked[np.argpartition(-item_relative[ranked], self.top_movers)[:self.top_movers]]
+            self.movers.extend(
+                (float(item_relative[i]), float(item_mean_absolute[i]), str(matched_items[i]))
+                for i in ranked)
+            self.movers = sorted(self.movers, reverse=True)[:self.top_movers]
+
+    def to_dict(self):
+        result = dict(self.counts)
+        result['Columns'] = [self.statistics[name].to_dict(name) for name in self.columns]
+        result['TopMovers'] = {
+            'Column': self.primary_column,
+            'Items': [{'ItemId': item, 'RelativeChange': relative, 'MeanAbsoluteChange': absolute}
+                      for relative, absolute, item in self.movers]
+        }
+        return result
+
+
+def diff_exports(storage, previous_key, current_key, top_movers=TOP_MOVERS):
+    """
+    Diff two merged exports in the storage and return the report.
+    """
+    count = partition_count(max(storage.stat(previous_key)['Size'], storage.stat(current_key)['Size']))
+    with tempfile.TemporaryDirectory() as previous_directory, \
+            tempfile.TemporaryDirectory() as current_directory:
+        previous_header, previous_partitions = open_partitions(
+            storage, previous_key, count, previous_directory)
+        current_header, current_partitions = open_partitions(
+            storage, current_key, count, current_directory)
+        diff = ForecastDiff(previous_header, current_header, top_movers)
+        for previous_partition, current_partition in zip(previous_partitions, current_partitions):
+            diff.add(partition_rows(previous_partition), partition_rows(current_partition))
+    report = diff.to_dict()
+    report.update({'PreviousKey': previous_key, 'CurrentKey': current_key, 'Partitions': count})
+    return report
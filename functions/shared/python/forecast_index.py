@@ -0,0 +1,63 @@
+"""
+Lookup of the forecast of an item in a merged forecast export with its item index.
+The merged file is sorted by item_id, so the rows of an item are fetched with one ranged read.
+Works against S3 and a local copy of the bucket (see storage.LocalStorage).
+
+Example:
+  index = ForecastIndex.latest(LocalStorage('/path/to/bucket-copy'))
+  rows = index.lookup('client_1')
+"""
+import csv
+import json
+from storage import iter_lines  # pylint: disable=import-error
+
+MERGED_FOLDER = 'merged'
+LATEST_MANIFEST_KEY = '{folder}/latest.json'
+
+
+class ForecastIndex:
+    """
+    Item index of a merged forecast export. The index is loaded into a dict once, then each lookup is one ranged read.
+    """
+
+    def __init__(self, storage, manifest_key):
+        self.storage = storage
+        self.manifest = json.loads(storage.get_bytes(manifest_key).decode('utf-8'))
+        if 'IndexKey' not in self.manifest:
+            raise Exception('{} has no item index.'.format(manifest_key))
+        self.key = self.manifest['Key']
+        self.header = self.manifest['Header']
+        self.items = {}
+        stream = storage.open_read(self.manifest['IndexKey'])
+        try:
+            reader = csv.reader(iter_lines(stream))
+            next(reader, None)
+            for item_id, offset, length in reader:
+                self.items[item_id] = (int(offset), int(length))
+        finally:
+            stream.close()
+
+    @classmethod
+    def latest(cls, storage, folder=MERGED_FOLDER):
+        """
+        Open the index of the latest merged export.
+        """
+        latest = json.loads(storage.get_bytes(
+            LATEST_MANIFEST_KEY.format(folder=folder)).decode('utf-8'))
+        return cls(storage, latest['ManifestKey'])
+
+    def __contains__(self, item_id):
+        return item_id in self.items
+
+    def __len__(self):
+        return len(self.items)
+
+    def lookup(self, item_id):
+        """
+        Return the rows of the item as dicts keyed by the columns of the export (empty when the item is not found).
+        """
+        if item_id not in self.items:
+            return []
+        offset, length = self.items[item_id]
+        data = self.storage.read_range(self.key, offset, length).decode('utf-8')
+        return [dict(zip(self.header, row)) for row in csv.reader(data.splitlines())]
@@ -0,0 +1,133 @@
+"""
+Deletion of outdated Amazon Forecast resources in the order of their dependency DAG (see inventory.DEPENDENCIES).
+Resources of a level are deleted concurrently with a bounded thread pool, and API calls are rate limited.
+The collector does not wait for deletions: when resources of a level are still being deleted, it raises
+LevelPending, and is run again (from the same level) once they are gone (see task_callback).
+A level may hold thousands of resources, more than one Lambda invocation can describe and delete at
+REQUESTS_PER_SECOND. Given the Lambda context, the collector stops issuing calls DEADLINE_MARGIN seconds before the
+timeout, saves the states of the resources processed so far and raises LevelPending, so that the next run skips them.
+"""
+from concurrent.futures import ThreadPoolExecutor
+from inventory import RESOURCE_TYPES, DELETABLE_STATUSES, DELETING_STATUSES, deletion_levels  # pylint: disable=import-error
+from rate_limiter import TokenBucket  # pylint: disable=import-error
+
+MAX_WORKERS = 8
+# Describe and delete calls per second
+REQUESTS_PER_SECOND = 5
+# Seconds left before the Lambda timeout when the collector stops issuing calls
+DEADLINE_MARGIN = 60
+
+DELETED = 'DELETED'
+DELETING = 'DELETING'
+SKIPPED = 'SKIPPED'
+# Not processed because the invocation ran out of time
+UNPROCESSED = 'UNPROCESSED'
+
+
+class LevelPending(Exception):
+    """
+    A level is being deleted. `resources` are the ARNs still being deleted (empty when resources of the level are left
+    unprocessed, so that the next run starts as soon as possible).
+    """
+
+    def __init__(self, message, resources=None):
+        self.resources = list(resources or [])
+        super().__init__(message)
+
+
+class GarbageCollector:
+    """
+    Delete the resources of a deletion plan ({resource type: ARNs}) level by level.
+    """
+
+    def __init__(self, forecast_client, plan, max_workers=MAX_WORKERS, limiter=None, context=None):
+        self.forecast_client = forecast_client
+        self.levels = [[(resource_type, arn) for resource_type in level for arn in plan.get(resource_type, [])]
+                       for level in deletion_levels()]
+        self.max_workers = max_workers
+        self.limiter = limiter or TokenBucket(REQUESTS_PER_SECOND)
+        self.context = context
+
+    def _out_of_time(self):
+        return self.context is not None and \
+            self.context.get_remaining_time_in_millis() < DEADLINE_MARGIN * 1000
+
+    def _acquire(self):
+        """
+        Wait for the rate limiter. Return False when the invocation runs out of time (before or while waiting).
+        """
+        if self._out_of_time():
+            return False
+        self.limiter.acquire()
+        return not self._out_of_time()
+
+    def _collect(self, resource):
+        """
+        Delete a resource if it can be deleted. Return its state (DELETED, DELETING, SKIPPED or UNPROCESSED).
+        """
+        resource_type, arn = resource
+        arn_name, describe, delete = RESOURCE_TYPES[resource_type]
+        exceptions = self.forecast_client.exceptions
+        try:
+            if not self._acquire():
+                return UNPROCESSED
+            status = getattr(self.forecast_client, describe)(**{arn_name: arn})['Status']
+            if status in DELETING_STATUSES:
+                return DELETING
+            if status not in DELETABLE_STATUSES:
+                # e.g. CREATE_IN_PROGRESS. This is deleted by a later run.
+                return SKIPPED
+            if not self._acquire():
+                return UNPROCESSED
+            getattr(self.forecast_client, delete)(**{arn_name: arn})
+            return DELETING
+        except exceptions.ResourceNotFoundException:
+            return DELETED
+        except exceptions.ResourceInUseException:
+            # A dependent resource was skipped
+            return SKIPPED
+
+    def collect_level(self, resources):
+        """
+        Issue deletions of resources concurrently. Return {(resource type, ARN): state}.
+        """
+        if not resources:
+            return {}
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, len(resources))) as executor:
+            return dict(zip(resources, executor.map(self._collect, resources)))
+
+    def run(self, completed_levels=0, on_progress=None, level_states=None):
+        """
+        Issue deletions of the levels after `completed_levels`, one level after another. `level_states` are the states
+        {ARN: state} of the resources of the next level saved by the previous run: resources DELETED or SKIPPED are
+        not processed again, and resources DELETING are checked after the ones not processed yet.
+        on_progress(completed_levels, level_states) is called when a level is complete and before LevelPending is
+        raised (the level is complete once a later run finds its resources deleted). Return the states of the
+        resources.
+        """
+        states = {}
+        saved = dict(level_states or {})
+        for index in range(completed_levels, len(self.levels)):
+            level = self.levels[index]
+            resources = [resource for resource in level if saved.get(resource[1], UNPROCESSED) == UNPROCESSED] + \
+                [resource for resource in level if saved.get(resource[1]) == DELETING]
+            level_states = {resource: saved.get(resource[1], UNPROCESSED) for resource in level}
+            for resource, state in self.collect_level(resources).items():
+                if state != UNPROCESSED:
+                    level_states[resource] = state
+            states.update(level_states)
+            saved = {}
+
+            unprocessed = [arn for (_, arn), state in level_states.items() if state == UNPROCESSED]
+            deleting = [arn for (_, arn), state in level_states.items() if state == DELETING]
+            if unprocessed or deleting:
+                if on_progress is not None:
+                    on_progress(index, {arn: state for (_, arn), state in level_states.items()})
+                if unprocessed:
+                    raise LevelPending('{} resources of level {} are left for the next run'.format(
+                        len(unprocessed), index))
+                raise LevelPending('{} resources of level {} are being deleted'.format(len(deleting), index),
+                                   deleting)
+            if on_progress is not None:
+                on_progress(index + 1, {})
+        return states
@@ -0,0 +1,228 @@
+"""
+Snapshot of the Amazon Forecast resources of a project, used to delete outdated resources.
+Every resource type is listed once, and the resources are linked into a graph:
+  dataset group -> datasets -> dataset import jobs
+  dataset group -> predictors -> forecasts -> forecast export jobs
+The snapshot is stored as JSON in the work folder, so collect_outdated_resources (and its retries) reads it instead of
+listing the resources again.
+"""
+import re
+import json
+import datetime
+from fanout import Fanout  # pylint: disable=import-error
+
+DATASET_GROUP_PATTERN = r'^arn:aws:forecast:.+?:.+?:dataset-group\/(.+?)_([0-9]{4}_[0-9]{2}_[0-9]{2}_[0-9]{2}_[0-9]{2}_[0-9]{2})$'
+DATASET_PATTERN = r'^arn:aws:forecast:.+?:.+?:dataset\/(.+?)$'
+IMPORT_JOB_PATTERN = r'^arn:aws:forecast:.+?:.+?:dataset-import-job\/(.+?)/.+?'
+FORECAST_PATTERN = r'^arn:aws:forecast:.+?:.+?:forecast\/(.+?)_([0-9]{4}_[0-9]{2}_[0-9]{2}_[0-9]{2}_[0-9]{2}_[0-9]{2})$'
+EXPORT_JOB_PATTERN = r'^arn:aws:forecast:.+?:.+?:forecast-export-job\/((.+?)_[0-9]{4}_[0-9]{2}_[0-9]{2}_[0-9]{2}_[0-9]{2}_[0-9]{2})\/.+?'
+INVENTORY_NAME = 'inventory/{date}.json'
+# Number of the latest dataset groups which are not outdated
+KEEP_DATASET_GROUPS = 2
+
+# Resource type -> (ARN parameter, describe method, delete method)
+RESOURCE_TYPES = {
+    'DatasetGroups': ('DatasetGroupArn', 'describe_dataset_group', 'delete_dataset_group'),
+    'Datasets': ('DatasetArn', 'describe_dataset', 'delete_dataset'),
+    'DatasetImportJobs': ('DatasetImportJobArn', 'describe_dataset_import_job', 'delete_dataset_import_job'),
+    'Predictors': ('PredictorArn', 'describe_predictor', 'delete_predictor'),
+    'Forecasts': ('ForecastArn', 'describe_forecast', 'delete_forecast'),
+    'ForecastExportJobs': ('ForecastExportJobArn', 'describe_forecast_export_job', 'delete_forecast_export_job'),
+}
+# Resource type -> resource types which must be deleted before it
+DEPENDENCIES = {
+    'ForecastExportJobs': [],
+    'Forecasts': ['ForecastExportJobs'],
+    'Predictors': ['Forecasts'],
+    # A dataset import job cannot be deleted while a predictor trained on it exists
+    'DatasetImportJobs': ['Predictors'],
+    'Datasets': ['DatasetImportJobs'],
+    'DatasetGroups': ['Predictors'],
+}
+DELETABLE_STATUSES = {'ACTIVE', 'CREATE_FAILED', 'DELETE_FAILED', 'UPDATE_FAILED'}
+DELETING_STATUSES = {'DELETE_PENDING', 'DELETE_IN_PROGRESS'}
+
+compiled_dataset_group_pattern = re.compile(DATASET_GROUP_PATTERN)
+compiled_dataset_pattern = re.compile(DATASET_PATTERN)
+compiled_import_job_pattern = re.compile(IMPORT_JOB_PATTERN)
+compiled_forecast_pattern = re.compile(FORECAST_PATTERN)
+compiled_export_job_pattern = re.compile(EXPORT_JOB_PATTERN)
+
+
+def _paginate(forecast_client, operation, key):
+    for page in forecast_client.get_paginator(operation).paginate():
+        for item in page[key]:
+            yield item
+
+
+def build_inventory(forecast_client, project_name):
+    """
+    List the resources of the project and return the snapshot.
+    """
+    inventory = {'ProjectName': project_name}
+    for resource_type in RESOURCE_TYPES:
+        inventory[resource_type] = {}
+
+    for item in _paginate(forecast_client, 'list_dataset_groups', 'DatasetGroups'):
+        result = compiled_dataset_group_pattern.match(item['DatasetGroupArn'])
+        if result and result.group(1) == project_name:
+            inventory['DatasetGroups'][item['DatasetGroupArn']] = {
+                'CreatedAt': result.group(2),
+                'Datasets': [],
+                'Predictors': []
+            }
+
+    # Datasets of a dataset group are only returned by describe_dataset_group
+    def describe_dataset_group(dataset_group_arn):
+        return forecast_client.describe_dataset_group(DatasetGroupArn=dataset_group_arn)
+
+    responses = Fanout().map(describe_dataset_group, list(inventory['DatasetGroups']))
+    for (dataset_group_arn, dataset_group), response in zip(inventory['DatasetGroups'].items(), responses):
+        dataset_group['Status'] = response['Status']
+        dataset_group['Datasets'] = response['DatasetArns']
+        for dataset_arn in response['DatasetArns']:
+            dataset = inventory['Datasets'].setdefault(
+                dataset_arn, {'DatasetGroups': [], 'DatasetImportJobs': []})
+            dataset['DatasetGroups'].append(dataset_group_arn)
+    dataset_arns_by_name = {compiled_dataset_pattern.match(arn).group(1): arn
+                            for arn in inventory['Datasets']}
+
+    for item in _paginate(forecast_client, 'list_dataset_import_jobs', 'DatasetImportJobs'):
+        result = compiled_import_job_pattern.match(item['DatasetImportJobArn'])
+        if result and result.group(1) in dataset_arns_by_name:
+            dataset_arn = dataset_arns_by_name[result.group(1)]
+            inventory['DatasetImportJobs'][item['DatasetImportJobArn']] = {
+                'Status': item['Status'],
+                'Dataset': dataset_arn
+            }
+            inventory['Datasets'][dataset_arn]['DatasetImportJobs'].append(item['DatasetImportJobArn'])
+
+    for item in _paginate(forecast_client, 'list_predictors', 'Predictors'):
+        if item['DatasetGroupArn'] in inventory['DatasetGroups']:
+            inventory['Predictors'][item['PredictorArn']] = {
+                'Status': item['Status'],
+                'DatasetGroup': item['DatasetGroupArn'],
+                'Forecasts': []
+            }
+            inventory['DatasetGroups'][item['DatasetGroupArn']]['Predictors'].append(item['PredictorArn'])
+
+    forecast_arns_by_name = {}
+    for item in _paginate(forecast_client, 'list_forecasts', 'Forecasts'):
+        result = compiled_forecast_pattern.match(item['ForecastArn'])
+        if result and result.group(1) == project_name:
+            inventory['Forecasts'][item['ForecastArn']] = {
+                'Status': item['Status'],
+                'Predictor': item['PredictorArn'],
+                'ForecastExportJobs': []
+            }
+            forecast_arns_by_name[item['ForecastArn'].split('/')[-1]] = item['ForecastArn']
+            if item['PredictorArn'] in inventory['Predictors']:
+                inventory['Predictors'][item['PredictorArn']]['Forecasts'].append(item['ForecastArn'])
+
+    for item in _paginate(forecast_client, 'list_forecast_export_jobs', 'ForecastExportJobs'):
+        result = compiled_export_job_pattern.match(item['ForecastExportJobArn'])
+        if result and result.group(2) == project_name:
+            forecast_arn = forecast_arns_by_name.get(result.group(1))
+            inventory['ForecastExportJobs'][item['ForecastExportJobArn']] = {
+                'Status': item['Status'],
+                'Forecast': forecast_arn
+            }
+            if forecast_arn is not None:
+                inventory['Forecasts'][forecast_arn]['ForecastExportJobs'].append(item['ForecastExportJobArn'])
+    return inventory
+
+
+def save_inventory(storage, key, inventory):
+    storage.put_bytes(key, json.dumps(inventory, separators=(',', ':')).encode('utf-8'))
+
+
+def load_inventory(storage, key):
+    return Inventory(json.loads(storage.get_bytes(key).decode('utf-8')))
+
+
+class Inventory:
+    """
+    Queries over a snapshot returned by build_inventory().
+    """
+
+    def __init__(self, data):
+        self.data = data
+
+    def outdated_dataset_groups(self, keep=KEEP_DATASET_GROUPS):
+        """
+        Return the dataset groups except for the latest `keep` ones.
+        """
+        dataset_groups = sorted(
+            self.data['DatasetGroups'].items(),
+            key=lambda item: datetime.datetime.strptime(item[1]['CreatedAt'], '%Y_%m_%d_%H_%M_%S'))
+        return [arn for arn, _ in dataset_groups[:-keep]] if keep > 0 else [arn for arn, _ in dataset_groups]
+
+    def datasets(self, dataset_group_arns):
+        return sorted({arn for group in dataset_group_arns
+                       for arn in self.data['DatasetGroups'][group]['Datasets']})
+
+    def dataset_import_jobs(self, dataset_arns):
+        return [arn for dataset in dataset_arns
+                for arn in self.data['Datasets'].get(dataset, {}).get('DatasetImportJobs', [])]
+
+    def predictors(self, dataset_group_arns):
+        return [arn for group in dataset_group_arns
+                for arn in self.data['DatasetGroups'][group]['Predictors']]
+
+    def forecasts(self, predictor_arns=None):
+        if predictor_arns is None:
+            return list(self.data['Forecasts'])
+        return [arn for predictor in predictor_arns
+                for arn in self.data['Predictors'][predictor]['Forecasts']]
+
+    def forecast_export_jobs(self, forecast_arns=None):
+        if forecast_arns is None:
+            return list(self.data['ForecastExportJobs'])
+        return [arn for forecast in forecast_arns
+                for arn in self.data['Forecasts'][forecast]['ForecastExportJobs']]
+
+    def status(self, resource_type, arn):
+        return self.data[resource_type][arn].get('Status')
+
+    def deletion_plan(self, scope):
+        """
+        Return {resource type: ARNs} to be deleted.
+          MODEL: outdated dataset groups and every resource which depends on them
+          FORECAST: forecasts and forecast export jobs of the project
+        """
+        if scope == 'FORECAST':
+            return {'Forecasts': self.forecasts(), 'ForecastExportJobs': self.forecast_export_jobs()}
+        if scope != 'MODEL':
+            raise Exception('unsupported cleanup scope: {}'.format(scope))
+        dataset_groups = self.outdated_dataset_groups()
+        kept_datasets = set(self.datasets(
+            [arn for arn in self.data['DatasetGroups'] if arn not in dataset_groups]))
+        datasets = [arn for arn in self.datasets(dataset_groups) if arn not in kept_datasets]
+        predictors = self.predictors(dataset_groups)
+        forecasts = self.forecasts(predictors)
+        return {
+            'DatasetGroups': dataset_groups,
+            'Datasets': datasets,
+            'DatasetImportJobs': self.dataset_import_jobs(datasets),
+            'Predictors': predictors,
+            'Forecasts': forecasts,
+            'ForecastExportJobs': self.forecast_export_jobs(forecasts)
+        }
+
+
+def deletion_levels(dependencies=None):
+    """
+    Group resource types into levels of the dependency DAG. Resource types of a level can be deleted concurrently
+    once every resource of the previous levels has been deleted.
+    """
+    dependencies = dependencies or DEPENDENCIES
+    levels = []
+    done = set()
+    while len(done) < len(dependencies):
+        level = sorted(resource_type for resource_type, required in dependencies.items()
+                       if resource_type not in done and set(required) <= done)
+        if not level:
+            raise Exception('dependencies have a cycle: {}'.format(dependencies))
+        levels.append(level)
+        done.update(level)
+    return levels
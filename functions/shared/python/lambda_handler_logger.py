@@ -1,6 +1,125 @@
-
+"""
+Logging of lambda handlers with aws_lambda_powertools.Logger.
+LOG_MODE (environment variable) selects how much is logged:
+  COMPACT (default) long strings, lists and dicts in log messages are truncated (MAX_STRING_LENGTH, MAX_ITEMS,
+                    MAX_DEPTH), ResponseMetadata of boto3 responses is dropped, and INFO logs of invocations repeated
+                    with the same trace id or schedule (retries on ResourcePending, WatchPendingResources every
+                    minute) are sampled: the first SAMPLE_FIRST invocations are logged, then one in SAMPLE_EVERY.
+                    Warnings and errors are always logged.
+  FULL              messages are logged as they are.
+In both modes secrets in the environment variables (e.g. AWS_SESSION_TOKEN) are redacted (COMPACT also leaves out the
+variables set by the Lambda runtime), and a callable value of a message is called (and the message serialized by the
+formatter) only when the record is emitted.
+"""
+import re
+import logging
+import collections
 from os import environ
 
+LOG_MODE_ENV = 'LOG_MODE'
+COMPACT = 'COMPACT'
+FULL = 'FULL'
+MAX_STRING_LENGTH = 1000
+MAX_ITEMS = 20
+MAX_DEPTH = 6
+SAMPLE_FIRST = 3
+SAMPLE_EVERY = 10
+# Number of (lambda_name, trace id) kept to count repeated invocations in an execution environment
+MAX_TRACKED_INVOCATIONS = 1000
+DROPPED_KEYS = {'ResponseMetadata'}
+# Whole segments of a variable name separated by '_' (AWS_SESSION_TOKEN, but not MAX_OUTPUT_TOKENS)
+SECRET_PATTERN = r'(^|_)(SECRETS?|TOKEN|PASSWORD|CREDENTIALS?|KEY)(_|$)'
+# Prefixes of the environment variables of the Lambda runtime
+RUNTIME_PREFIXES = ('AWS_', 'LAMBDA_', '_', 'LD_', 'PATH', 'PYTHONPATH', 'LANG', 'TZ')
+REDACTED = '***'
+CONTEXT_ATTRIBUTES = ['function_name', 'function_version', 'aws_request_id', 'memory_limit_in_mb']
+
+compiled_secret_pattern = re.compile(SECRET_PATTERN)
+
+
+def redact_environ(variables, mode=COMPACT):
+    return {key: REDACTED if compiled_secret_pattern.search(key) else value
+            for key, value in sorted(variables.items())
+            if mode != COMPACT or not key.startswith(RUNTIME_PREFIXES)}
+
+
+def summarize_context(context):
+    return {name: getattr(context, name, None) for name in CONTEXT_ATTRIBUTES}
+
+
+def truncate(value, depth=0):
+    """
+    Return a copy of a log value with long strings, lists and dicts truncated.
+    """
+    if isinstance(value, str):
+        if len(value) <= MAX_STRING_LENGTH:
+            return value
+        return '{}...({} characters)'.format(value[:MAX_STRING_LENGTH], len(value))
+    if isinstance(value, dict):
+        if depth >= MAX_DEPTH:
+            return '{{...{} keys}}'.format(len(value))
+        items = [(key, item) for key, item in value.items() if key not in DROPPED_KEYS]
+        truncated = {key: truncate(item, depth + 1) for key, item in items[:MAX_ITEMS]}
+        if len(items) > MAX_ITEMS:
+            truncated['...'] = '{} more keys'.format(len(items) - MAX_ITEMS)
+        return truncated
+    if isinstance(value, (list, tuple)):
+        if depth >= MAX_DEPTH:
+            return '[...{} items]'.format(len(value))
+        truncated = [truncate(item, depth + 1) for item in value[:MAX_ITEMS]]
+        if len(value) > MAX_ITEMS:
+            truncated.append('...{} more items'.format(len(value) - MAX_ITEMS))
+        return truncated
+    return value
+
+
+class LogFilter(logging.Filter):
+    """
+    Filter of the records of a logger, applying LOG_MODE. Filters run only for records of enabled levels.
+    """
+
+    def __init__(self, mode=COMPACT):
+        super().__init__()
+        self.mode = mode
+        self.invocations = collections.Counter()
+        self.muted = False
+
+    def start_invocation(self, lambda_name, repeated_by):
+        """
+        Count an invocation and decide whether its INFO logs are sampled. Return the number of the invocation.
+        repeated_by identifies the invocations which repeat (None when an invocation is not a repetition).
+        """
+        if repeated_by is None:
+            self.muted = False
+            return 1
+        key = (lambda_name, repeated_by)
+        if key not in self.invocations and len(self.invocations) >= MAX_TRACKED_INVOCATIONS:
+            self.invocations.clear()
+        self.invocations[key] += 1
+        count = self.invocations[key]
+        self.muted = self.mode == COMPACT and count > SAMPLE_FIRST and (count - SAMPLE_FIRST) % SAMPLE_EVERY != 0
+        return count
+
+    def filter(self, record):
+        if self.muted and record.levelno < logging.WARNING:
+            return False
+        if isinstance(record.msg, dict):
+            message = {key: value() if callable(value) else value for key, value in record.msg.items()}
+            record.msg = truncate(message) if self.mode == COMPACT else message
+        return True
+
+
+def get_log_filter(logger):
+    """
+    Return the LogFilter of a logger, adding it on first call (loggers of the same service share the filter).
+    """
+    for log_filter in logger.filters:
+        if isinstance(log_filter, LogFilter):
+            return log_filter
+    log_filter = LogFilter(environ.get(LOG_MODE_ENV, COMPACT).upper())
+    logger.addFilter(log_filter)
+    return log_filter
+
 
 def lambda_handler_logger(logger, lambda_name):
     """
@@ -11,6 +130,9 @@ def lambda_handler_logger(logger, lambda_name):
     """
     def decorator(func):
         def wrapper(event, context):
+            log_filter = get_log_filter(logger)
+            # Retries of a state in a flow have the same TraceId. Scheduled events (from EventBridge) have none.
+            repeated_by = event.get('TraceId', event.get('source'))
             try:
                 if 'TraceId' not in event:
                     # This is the first lambda_handler() in a state macine flow.
@@ -19,8 +141,14 @@ def lambda_handler_logger(logger, lambda_name):
                 # Setup logger
                 logger.structure_logs(
                     append=True, lambda_name=lambda_name, trace_id=event['TraceId'])
-                logger.info(
-                    {'message': 'starting lambda_handler()', 'event': event, 'environ': environ, 'context': context})
+                invocation = log_filter.start_invocation(lambda_name, repeated_by)
+                logger.info({
+                    'message': 'starting lambda_handler()',
+                    'invocation': invocation,
+                    'event': event,
+                    'environ': lambda: redact_environ(environ, log_filter.mode),
+                    'context': lambda: summarize_context(context)
+                })
 
                 result = func(event, context)
 
@@ -1,8 +1,12 @@
 import json
 import glob
+from os import environ
+
+# params.json of the Lambda layer. PARAMS_PATH overrides it for local runs (see tools/asl_runner.py).
+PARAMS_PATH = '/opt/python/params.json'
 
 
 def load_params():
-    with open('/opt/python/params.json') as f:
+    with open(environ.get('PARAMS_PATH', PARAMS_PATH)) as f:
         params = json.load(f)
         return params
@@ -0,0 +1,65 @@
+"""
+Streaming converter of dataset CSV files to typed, compressed Parquet.
+CSV files are parsed into Arrow record batches of fixed block size, so memory does not depend on the file size.
+"""
+import pyarrow as pa
+from pyarrow import csv
+from pyarrow import parquet
+from dataset_schema import attributes, to_strptime_format  # pylint: disable=import-error
+
+BLOCK_SIZE = 16 * 1024 * 1024
+COMPRESSION = 'snappy'
+
+ARROW_TYPES = {
+    'string': pa.string(),
+    'geolocation': pa.string(),
+    'integer': pa.int64(),
+    'float': pa.float64(),
+    'timestamp': pa.timestamp('s'),
+}
+
+
+def arrow_schema(dataset):
+    """
+    Return the Arrow schema of a dataset in params.json.
+    """
+    return pa.schema([(name, ARROW_TYPES[attribute_type])
+                      for name, attribute_type in attributes(dataset)])
+
+
+def convert_file(storage, src_key, dst_key, dataset, timestamp_format, block_size=BLOCK_SIZE):
+    """
+    Convert a CSV file in the storage to Parquet and return row and byte counts.
+    """
+    schema = arrow_schema(dataset)
+    read_options = csv.ReadOptions(
+        column_names=schema.names, block_size=block_size)
+    convert_options = csv.ConvertOptions(
+        column_types={field.name: field.type for field in schema},
+        timestamp_parsers=[to_strptime_format(timestamp_format)])
+
+    rows = 0
+    src = storage.open_read(src_key)
+    dst = storage.open_write(dst_key)
+    try:
+        reader = csv.open_csv(
+            src, read_options=read_options, convert_options=convert_options)
+        writer = parquet.ParquetWriter(
+            pa.PythonFile(dst, mode='w'), schema, compression=COMPRESSION)
+        for batch in reader:
+            writer.write_table(pa.Table.from_batches([batch], schema=schema))
+            rows += batch.num_rows
+        writer.close()
+    except Exception as e:
+        # Do not leave a partial object in S3
+        getattr(dst, 'abort', dst.close)()
+        raise e
+    finally:
+        src.close()
+    dst.close()
+
+    return {
+        'Rows': rows,
+        'SourceBytes': storage.stat(src_key)['Size'],
+        'ParquetBytes': storage.stat(dst_key)['Size']
+    }
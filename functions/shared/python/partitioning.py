@@ -0,0 +1,78 @@
+"""
+Hash partitioning of CSV rows by item, so that files larger than memory can be processed one partition at a time.
+"""
+import os
+import csv
+import zlib
+from storage import iter_lines  # pylint: disable=import-error
+
+# Target size of one partition. A partition is loaded into memory at once.
+PARTITION_BYTES = 16 * 1024 * 1024
+# Separator of key columns in a series key
+KEY_SEPARATOR = '\x1f'
+
+
+def partition_count(size, partition_bytes=PARTITION_BYTES):
+    """
+    Return the number of partitions for a file of the size.
+    """
+    return max(1, -(-size // partition_bytes))
+
+
+def partition_lines(lines, key_index, count, directory):
+    """
+    Write CSV lines into `count` files in the directory by the hash of the key column, and return the file paths.
+    Rows of the same key are always written into the same file.
+    """
+    paths = [os.path.join(directory, 'partition_{}.csv'.format(i))
+             for i in range(count)]
+    files = [open(path, 'w', newline='') for path in paths]
+    try:
+        writers = [csv.writer(f) for f in files]
+        for row in csv.reader(lines):
+            if len(row) <= key_index:
+                continue
+            key = row[key_index].strip().encode('utf-8')
+            writers[zlib.crc32(key) % count].writerow(row)
+    finally:
+        for f in files:
+            f.close()
+    return paths
+
+
+def read_partition(path):
+    """
+    Return the rows of a partition file.
+    """
+    with open(path, newline='') as f:
+        return list(csv.reader(f))
+
+
+def partitions(lines, key_index, count, directory):
+    """
+    Return the partitions (lists of rows, or paths of partition files) of CSV lines.
+    A single partition is kept in memory rather than written to a file.
+    """
+    if count == 1:
+        return [list(csv.reader(lines))]
+    return partition_lines(lines, key_index, count, directory)
+
+
+def open_partitions(storage, key, count, directory):
+    """
+    Return the header and the partitions (see partitions) of a CSV file with a header and an item_id column.
+    """
+    stream = storage.open_read(key)
+    try:
+        lines = iter_lines(stream)
+        header = next(csv.reader([next(lines, '')]))
+        return header, partitions(lines, header.index('item_id'), count, directory)
+    finally:
+        stream.close()
+
+
+def partition_rows(partition):
+    """
+    Return the rows of a partition returned by partitions.
+    """
+    return partition if isinstance(partition, list) else read_partition(partition)
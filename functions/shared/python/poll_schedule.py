@@ -0,0 +1,98 @@
+"""
+Adaptive schedule of the status checks of long-running Amazon Forecast resources.
+Observed durations (seconds from CreationTime to LastModificationTime of ACTIVE resources) are recorded per resource type
+with the size of the dataset files. A pending resource is checked next around its estimated completion time (duration
+per byte of the history scaled by the dataset size) instead of at fixed intervals, and less often as it overruns.
+Everything but DurationHistory.load/save works without AWS, so the estimator can be evaluated offline.
+"""
+import json
+import statistics
+from storage import source_key  # pylint: disable=import-error
+
+HISTORY_NAME = 'history/durations.json'
+# Samples kept per resource type
+MAX_SAMPLES = 50
+MIN_INTERVAL = 60
+MAX_INTERVAL = 30 * 60
+# The first check is a little before the estimated completion time
+EARLY_RATIO = 0.9
+# After that (and without history), checks back off in proportion to the elapsed time
+BACKOFF_RATIO = 0.25
+
+
+class DurationHistory:
+    """
+    Observed durations {resource type: [{'Arn', 'Seconds', 'Size'}]}, oldest first.
+    """
+
+    def __init__(self, data=None):
+        self.data = data or {}
+        self.changed = False
+
+    @classmethod
+    def load(cls, storage, key):
+        if storage.stat(key) is None:
+            return cls()
+        return cls(json.loads(storage.get_bytes(key).decode('utf-8')))
+
+    def save(self, storage, key):
+        storage.put_bytes(key, json.dumps(self.data).encode('utf-8'))
+        self.changed = False
+
+    def samples(self, resource_type):
+        return self.data.get(resource_type, [])
+
+    def record(self, resource_type, arn, seconds, size):
+        """
+        Add a sample unless the resource has been recorded. Return whether it was added.
+        """
+        samples = self.data.setdefault(resource_type, [])
+        if any(sample['Arn'] == arn for sample in samples):
+            return False
+        samples.append({'Arn': arn, 'Seconds': seconds, 'Size': size})
+        del samples[:-MAX_SAMPLES]
+        self.changed = True
+        return True
+
+
+def duration(response):
+    """
+    Return the seconds an ACTIVE resource took to be created from its description.
+    """
+    return (response['LastModificationTime'] - response['CreationTime']).total_seconds()
+
+
+def dataset_size(storage, event):
+    """
+    Return the total size in bytes of the dataset files of a flow, or None when no file is found.
+    """
+    sizes = [storage.stat(source_key(job['Filename'])) for job in event.get('DatasetImportJobs', [])]
+    sizes = [stat['Size'] for stat in sizes if stat is not None]
+    return sum(sizes) if sizes else None
+
+
+def estimate_duration(samples, size=None):
+    """
+    Return the estimated seconds to create a resource: the median seconds per byte scaled by `size`, or the median
+    seconds when sizes are unknown. Return None without samples.
+    """
+    rates = [sample['Seconds'] / sample['Size'] for sample in samples if sample.get('Size')]
+    if size and rates:
+        return statistics.median(rates) * size
+    if samples:
+        return statistics.median([sample['Seconds'] for sample in samples])
+    return None
+
+
+def next_check_at(started_at, now, estimate=None, min_interval=MIN_INTERVAL, max_interval=MAX_INTERVAL):
+    """
+    Return the time (seconds since the epoch) to check a resource started at `started_at` again.
+    """
+    elapsed = now - started_at
+    if estimate is not None and elapsed < estimate * EARLY_RATIO:
+        interval = estimate * EARLY_RATIO - elapsed
+    elif estimate is not None:
+        interval = (elapsed - estimate * EARLY_RATIO) * BACKOFF_RATIO
+    else:
+        interval = elapsed * BACKOFF_RATIO
+    return now + min(max(interval, min_interval), max_interval)
@@ -0,0 +1,52 @@
+"""
+Registry of the latest predictor of a project.
+create_predictor records the predictor of update-model flow with the ARNs and names of its datasets once it is ACTIVE,
+and init_update_forecast_flow reads it instead of listing every predictor of the account and describing its dataset
+import jobs and datasets. The registry is a JSON object in the work folder of the storage (S3, or a local directory
+with LOCAL_STORAGE_ROOT; see storage.get_storage()).
+"""
+import json
+from storage import work_key  # pylint: disable=import-error
+
+REGISTRY_NAME = 'registry/{project_name}/latest_predictor.json'
+# Keys of a dataset recorded in the registry
+DATASET_KEYS = ['DatasetType', 'DatasetArn', 'DatasetName']
+
+
+def registry_key(project_name):
+    return work_key(REGISTRY_NAME.format(project_name=project_name))
+
+
+class PredictorRegistry:
+    """
+    The latest predictor of each project: {'PredictorArn', 'TriggeredAt', 'Datasets': [{DATASET_KEYS}]}.
+    TriggeredAt is the date part of the predictor name (e.g. '2021_01_01_00_00_00').
+    """
+
+    def __init__(self, storage):
+        self.storage = storage
+
+    def latest(self, project_name):
+        """
+        Return the latest predictor of a project, or None when none has been recorded.
+        """
+        key = registry_key(project_name)
+        if self.storage.stat(key) is None:
+            return None
+        return json.loads(self.storage.get_bytes(key).decode('utf-8'))
+
+    def record(self, project_name, predictor_arn, triggered_at, datasets):
+        """
+        Record a predictor unless a newer one has been recorded (e.g. by a later execution which finished earlier).
+        Return whether it was recorded.
+        """
+        latest = self.latest(project_name)
+        if latest is not None and latest['TriggeredAt'] > triggered_at:
+            return False
+        entry = {
+            'PredictorArn': predictor_arn,
+            'TriggeredAt': triggered_at,
+            'Datasets': [{key: dataset[key] for key in DATASET_KEYS} for dataset in datasets]
+        }
+        self.storage.put_bytes(registry_key(project_name), json.dumps(entry).encode('utf-8'))
+        return True
@@ -0,0 +1,204 @@
+"""
+Regularize time series dataset files to the DataFrequency of the dataset with NumPy.
+- timestamps are floored to the DataFrequency (finer inputs are aggregated)
+- rows of the same item and timestamp are aggregated
+- gaps between the first and last timestamp of each item are filled (coarser inputs are upsampled)
+- series can be extended to a given end timestamp (e.g. the end of ForecastHorizon for RELATED_TIME_SERIES)
+Rows are hash-partitioned by item into temporary files and processed one partition at a time,
+so memory is bounded by the partition size.
+"""
+import io
+import csv
+import tempfile
+import itertools
+import numpy as np
+from storage import iter_lines  # pylint: disable=import-error
+from dataset_schema import attributes  # pylint: disable=import-error
+from partitioning import KEY_SEPARATOR, partition_count, partitions, partition_rows  # pylint: disable=import-error
+from time_series import parse_timestamps, format_timestamps, parse_floats, \
+    to_periods, from_periods  # pylint: disable=import-error
+
+AGGREGATIONS = {'sum', 'mean'}
+FILLS = {'nan', 'zero', 'ffill'}
+KEY_TYPES = {'string', 'geolocation'}
+VALUE_TYPES = {'integer', 'float'}
+ROWS_PER_WRITE = 100000
+
+
+def horizon_end(target_end, forecast_frequency, forecast_horizon):
+    """
+    Return the last timestamp to be forecasted when the target time series ends at target_end.
+    """
+    period = to_periods(np.array([target_end], dtype='datetime64[s]'), forecast_frequency)
+    return from_periods(period + forecast_horizon, forecast_frequency)[0]
+
+
+def _forward_fill(values, boundary):
+    """
+    Forward-fill NaN in each column. Values are never carried over rows where boundary is True.
+    """
+    index = np.arange(len(values))
+    for j in range(values.shape[1]):
+        column = values[:, j]
+        source = np.where(~np.isnan(column) | boundary, index, 0)
+        np.maximum.accumulate(source, out=source)
+        values[:, j] = column[source]
+
+
+def regularize_rows(rows, dataset, timestamp_format, aggregation, fill, end=None):
+    """
+    Regularize rows of a dataset file. All rows of an item must be given at once.
+    Return the output columns in the order of the schema, and the last timestamp.
+    """
+    if aggregation not in AGGREGATIONS:
+        raise Exception('unsupported aggregation: {}'.format(aggregation))
+    if fill not in FILLS:
+        raise Exception('unsupported fill: {}'.format(fill))
+
+    columns = attributes(dataset)
+    frequency = dataset['DataFrequency']
+    key_indices = [i for i, (_, t) in enumerate(columns) if t in KEY_TYPES]
+    value_indices = [i for i, (_, t) in enumerate(columns) if t in VALUE_TYPES]
+    timestamp_index = [t for _, t in columns].index('timestamp')
+
+    rows = [row for row in rows if len(row) == len(columns)]
+    timestamps = parse_timestamps(
+        [row[timestamp_index].strip() for row in rows], timestamp_format)
+    valid = ~np.isnat(timestamps)
+    keys = np.array([KEY_SEPARATOR.join(row[i].strip() for i in key_indices)
+                     for row in rows], dtype=np.str_)[valid]
+    values = np.column_stack(
+        [parse_floats([row[i] for row in rows]) for i in value_indices] or
+        [np.empty((len(rows), 0))])[valid]
+    periods = to_periods(timestamps[valid], frequency)
+    if len(periods) == 0:
+        return [[] for _ in columns], None
+
+    # Sort by (item, period) and aggregate duplicated periods
+    unique_keys, codes = np.unique(keys, return_inverse=True)
+    order = np.lexsort((periods, codes))
+    codes, periods, values = codes[order], periods[order], values[order]
+    boundary = np.ones(len(codes), dtype=bool)
+    boundary[1:] = (codes[1:] != codes[:-1]) | (periods[1:] != periods[:-1])
+    starts = np.flatnonzero(boundary)
+    present = ~np.isnan(values)
+    sums = np.add.reduceat(np.where(present, values, 0.0), starts, axis=0)
+    counts = np.add.reduceat(present.astype(np.int64), starts, axis=0)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        aggregated = np.where(counts > 0, sums if aggregation == 'sum' else sums / counts, np.nan)
+    group_codes, group_periods = codes[starts], periods[starts]
+
+    # Build a regular grid of periods for each item
+    item_starts = np.flatnonzero(np.r_[True, group_codes[1:] != group_codes[:-1]])
+    item_ends = np.r_[item_starts[1:] - 1, len(group_codes) - 1]
+    first = group_periods[item_starts]
+    last = group_periods[item_ends]
+    if end is not None:
+        last = np.maximum(last, to_periods(np.array([end], dtype='datetime64[s]'), frequency)[0])
+    lengths = last - first + 1
+    offsets = np.r_[0, np.cumsum(lengths)[:-1]]
+    total = int(lengths.sum())
+    grid_items = np.repeat(np.arange(len(unique_keys)), lengths)
+    grid_periods = np.repeat(first - offsets, lengths) + np.arange(total)
+    grid_values = np.full((total, values.shape[1]), np.nan)
+    grid_values[offsets[group_codes] + group_periods - first[group_codes]] = aggregated
+
+    if fill == 'zero':
+        grid_values[np.isnan(grid_values)] = 0.0
+    elif fill == 'ffill':
+        item_boundary = np.zeros(total, dtype=bool)
+        item_boundary[offsets] = True
+        _forward_fill(grid_values, item_boundary)
+
+    # Output columns in the order of the schema
+    output = [None] * len(columns)
+    key_parts = np.array([key.split(KEY_SEPARATOR) for key in unique_keys.tolist()],
+                         dtype=np.str_).reshape(len(unique_keys), len(key_indices))
+    for j, i in enumerate(key_indices):
+        output[i] = key_parts[grid_items, j]
+    grid_timestamps = from_periods(grid_periods, frequency)
+    output[timestamp_index] = format_timestamps(grid_timestamps, timestamp_format)
+    for j, i in enumerate(value_indices):
+        column = grid_values[:, j]
+        missing = np.isnan(column)
+        if columns[i][1] == 'integer':
+            strings = np.round(np.where(missing, 0, column)).astype(np.int64).astype(np.str_)
+        else:
+            strings = column.astype(np.str_)
+        strings[missing] = ''
+        output[i] = strings
+    return output, grid_timestamps.max()
+
+
+def series_end(storage, key, dataset, timestamp_format):
+    """
+    Return the last timestamp of a dataset file floored to its DataFrequency (the End of regularize_file() without
+    extension), or None when it has no valid timestamp. The file is read in one pass without regularizing it.
+    """
+    columns = attributes(dataset)
+    timestamp_index = [t for _, t in columns].index('timestamp')
+    last = None
+    stream = storage.open_read(key)
+    try:
+        reader = csv.reader(iter_lines(stream))
+        while True:
+            values = [row[timestamp_index].strip() for row in itertools.islice(reader, ROWS_PER_WRITE)
+                      if len(row) == len(columns)]
+            if not values:
+                break
+            timestamps = parse_timestamps(values, timestamp_format)
+            periods = to_periods(timestamps[~np.isnat(timestamps)], dataset['DataFrequency'])
+            if len(periods) > 0 and (last is None or periods.max() > last):
+                last = periods.max()
+    finally:
+        stream.close()
+    if last is None:
+        return None
+    return str(from_periods(np.array([last]), dataset['DataFrequency'])[0])
+
+
+def _write_columns(dst, columns):
+    for start in range(0, len(columns[0]), ROWS_PER_WRITE):
+        buffer = io.StringIO()
+        csv.writer(buffer, lineterminator='\n').writerows(
+            zip(*[column[start:start + ROWS_PER_WRITE].tolist() for column in columns]))
+        dst.write(buffer.getvalue().encode('utf-8'))
+
+
+def regularize_file(storage, src_key, dst_key, dataset, timestamp_format, aggregation, fill, end=None):
+    """
+    Regularize a dataset file in the storage and write the result to dst_key.
+    """
+    columns = attributes(dataset)
+    names = [name for name, _ in columns]
+    item_index = names.index('item_id') if 'item_id' in names else \
+        [t for _, t in columns].index('string')
+    count = partition_count(storage.stat(src_key)['Size'])
+
+    result = {'Partitions': count, 'OutputRows': 0, 'End': None}
+    last_timestamp = None
+    with tempfile.TemporaryDirectory() as directory:
+        stream = storage.open_read(src_key)
+        try:
+            src_partitions = partitions(iter_lines(stream), item_index, count, directory)
+        finally:
+            stream.close()
+
+        dst = storage.open_write(dst_key)
+        try:
+            for partition in src_partitions:
+                output, partition_last = regularize_rows(
+                    partition_rows(partition), dataset, timestamp_format, aggregation, fill, end)
+                _write_columns(dst, output)
+                result['OutputRows'] += len(output[0])
+                if partition_last is not None and (last_timestamp is None or partition_last > last_timestamp):
+                    last_timestamp = partition_last
+        except Exception as e:
+            # Do not leave a partial object in S3
+            getattr(dst, 'abort', dst.close)()
+            raise e
+        dst.close()
+
+    if last_timestamp is not None:
+        result['End'] = str(last_timestamp)
+    return result
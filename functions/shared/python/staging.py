@@ -0,0 +1,38 @@
+"""
+Staged copies of the dataset files (regularized CSV and Parquet, see regularize_dataset_files and
+convert_dataset_files), which dataset import jobs read instead of the source files.
+The files of a run are under staging/<TriggeredAt>/ of the work folder. create_dataset_import_job deletes them once
+the import jobs are ACTIVE, and collect_outdated_resources deletes the ones left by failed runs after STAGING_TTL.
+"""
+import time
+from storage import work_key  # pylint: disable=import-error
+
+STAGING_FOLDER = 'staging'
+# Longer than an execution waits for its dataset import jobs
+STAGING_TTL = 24 * 60 * 60
+
+
+def staging_key(triggered_at, name):
+    return work_key(STAGING_FOLDER, triggered_at, name)
+
+
+def delete_staged(storage, triggered_at):
+    """
+    Delete the staged files of a run. Return the deleted keys.
+    """
+    keys = storage.list_keys(work_key(STAGING_FOLDER, triggered_at, ''))
+    for key in keys:
+        storage.delete(key)
+    return keys
+
+
+def expire_staged(storage, now=None, ttl=STAGING_TTL):
+    """
+    Delete the staged files written more than `ttl` seconds ago. Return the deleted keys.
+    """
+    now = time.time() if now is None else now
+    expired = sorted(key for key, modified in storage.list_modified(work_key(STAGING_FOLDER, '')).items()
+                     if now - modified > ttl)
+    for key in expired:
+        storage.delete(key)
+    return expired
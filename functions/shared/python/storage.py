@@ -0,0 +1,254 @@
+"""
+Object storage for dataset files and pipeline artifacts.
+Lambda functions use S3. A local directory can stand in for the bucket (set LOCAL_STORAGE_ROOT).
+"""
+import os
+from os import environ
+from clients import get_client  # pylint: disable=import-error
+
+CHUNK_SIZE = 8 * 1024 * 1024
+# S3 requires every part of a multipart upload except the last one to be at least 5 MiB.
+MULTIPART_PART_SIZE = 8 * 1024 * 1024
+
+
+def iter_lines(stream, chunk_size=CHUNK_SIZE, encoding='utf-8'):
+    """
+    Yield decoded lines (without line endings) from a binary stream, reading fixed-size chunks.
+    Memory usage is bounded by chunk_size and the longest line.
+    """
+    remainder = b''
+    while True:
+        chunk = stream.read(chunk_size)
+        if not chunk:
+            break
+        lines = (remainder + chunk).split(b'\n')
+        remainder = lines.pop()
+        for line in lines:
+            yield line.rstrip(b'\r').decode(encoding)
+    if remainder:
+        yield remainder.rstrip(b'\r').decode(encoding)
+
+
+class LocalStorage:
+    """
+    Storage backed by a local directory. Keys are '/'-separated paths relative to the root.
+    """
+
+    def __init__(self, root):
+        self.root = root
+
+    def path(self, key):
+        return os.path.join(self.root, *key.split('/'))
+
+    def uri(self, key):
+        return 'file://' + os.path.abspath(self.path(key))
+
+    def open_read(self, key):
+        return open(self.path(key), 'rb')
+
+    def open_write(self, key):
+        path = self.path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        return open(path, 'wb')
+
+    def read_range(self, key, offset, length):
+        with open(self.path(key), 'rb') as f:
+            f.seek(offset)
+            return f.read(length)
+
+    def get_bytes(self, key):
+        with self.open_read(key) as f:
+            return f.read()
+
+    def put_bytes(self, key, data):
+        with self.open_write(key) as f:
+            f.write(data)
+
+    def stat(self, key):
+        """
+        Return {'Size', 'ETag'} of the object, or None when it does not exist.
+        """
+        try:
+            st = os.stat(self.path(key))
+        except FileNotFoundError:
+            return None
+        return {'Size': st.st_size, 'ETag': '{}-{}'.format(st.st_mtime_ns, st.st_size)}
+
+    def list_keys(self, prefix):
+        keys = []
+        for dirpath, _, filenames in os.walk(self.root):
+            for filename in filenames:
+                relpath = os.path.relpath(os.path.join(dirpath, filename), self.root)
+                key = relpath.replace(os.sep, '/')
+                if key.startswith(prefix):
+                    keys.append(key)
+        return sorted(keys)
+
+    def list_modified(self, prefix):
+        """
+        Return {key: last modified time (seconds since the epoch)} of the objects under a prefix.
+        """
+        return {key: os.stat(self.path(key)).st_mtime for key in self.list_keys(prefix)}
+
+    def delete(self, key):
+        try:
+            os.remove(self.path(key))
+        except FileNotFoundError:
+            pass
+
+
+class _S3Writer:
+    """
+    Writable file object which uploads to S3 in multipart chunks, so memory stays bounded.
+    """
+
+    def __init__(self, client, bucket, key):
+        self.client = client
+        self.bucket = bucket
+        self.key = key
+        self.buffer = bytearray()
+        self.parts = []
+        self.upload_id = None
+        self.position = 0
+        self.closed = False
+
+    def writable(self):
+        return True
+
+    def tell(self):
+        return self.position
+
+    def write(self, data):
+        self.buffer.extend(data)
+        self.position += len(data)
+        if len(self.buffer) >= MULTIPART_PART_SIZE:
+            self._upload_part()
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def _upload_part(self):
+        if self.upload_id is None:
+            self.upload_id = self.client.create_multipart_upload(
+                Bucket=self.bucket, Key=self.key)['UploadId']
+        part_number = len(self.parts) + 1
+        response = self.client.upload_part(
+            Bucket=self.bucket, Key=self.key, UploadId=self.upload_id,
+            PartNumber=part_number, Body=bytes(self.buffer))
+        self.parts.append({'ETag': response['ETag'], 'PartNumber': part_number})
+        self.buffer = bytearray()
+
+    def close(self):
+        if self.closed:
+            return
+        self.closed = True
+        if self.upload_id is None:
+            self.client.put_object(Bucket=self.bucket, Key=self.key, Body=bytes(self.buffer))
+            return
+        if self.buffer:
+            self._upload_part()
+        self.client.complete_multipart_upload(
+            Bucket=self.bucket, Key=self.key, UploadId=self.upload_id,
+            MultipartUpload={'Parts': self.parts})
+
+    def abort(self):
+        self.closed = True
+        if self.upload_id is not None:
+            self.client.abort_multipart_upload(
+                Bucket=self.bucket, Key=self.key, UploadId=self.upload_id)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+
+class S3Storage:
+    """
+    Storage backed by an S3 bucket.
+    """
+
+    def __init__(self, bucket, client=None):
+        self.bucket = bucket
+        self.client = client or get_client('s3')
+
+    def uri(self, key):
+        return 's3://{bucket}/{key}'.format(bucket=self.bucket, key=key)
+
+    def open_read(self, key):
+        return self.client.get_object(Bucket=self.bucket, Key=key)['Body']
+
+    def open_write(self, key):
+        return _S3Writer(self.client, self.bucket, key)
+
+    def read_range(self, key, offset, length):
+        response = self.client.get_object(
+            Bucket=self.bucket, Key=key,
+            Range='bytes={}-{}'.format(offset, offset + length - 1))
+        return response['Body'].read()
+
+    def get_bytes(self, key):
+        return self.open_read(key).read()
+
+    def put_bytes(self, key, data):
+        self.client.put_object(Bucket=self.bucket, Key=key, Body=data)
+
+    def stat(self, key):
+        """
+        Return {'Size', 'ETag'} of the object, or None when it does not exist.
+        """
+        try:
+            response = self.client.head_object(Bucket=self.bucket, Key=key)
+        except self.client.exceptions.ClientError as e:
+            if e.response['Error']['Code'] in ('404', 'NoSuchKey', 'NotFound'):
+                return None
+            raise e
+        return {'Size': response['ContentLength'], 'ETag': response['ETag']}
+
+    def list_keys(self, prefix):
+        paginator = self.client.get_paginator('list_objects_v2')
+        keys = []
+        for page in paginator.paginate(Bucket=self.bucket, Prefix=prefix):
+            keys.extend([item['Key'] for item in page.get('Contents', [])])
+        return keys
+
+    def list_modified(self, prefix):
+        """
+        Return {key: last modified time (seconds since the epoch)} of the objects under a prefix.
+        """
+        paginator = self.client.get_paginator('list_objects_v2')
+        modified = {}
+        for page in paginator.paginate(Bucket=self.bucket, Prefix=prefix):
+            modified.update({item['Key']: item['LastModified'].timestamp() for item in page.get('Contents', [])})
+        return modified
+
+    def delete(self, key):
+        self.client.delete_object(Bucket=self.bucket, Key=key)
+
+
+def get_storage():
+    """
+    Return the storage used by this Lambda function.
+    """
+    if environ.get('LOCAL_STORAGE_ROOT'):
+        return LocalStorage(environ['LOCAL_STORAGE_ROOT'])
+    return S3Storage(environ['S3_BUCKET_NAME'])
+
+
+def source_key(filename):
+    """
+    Return the key of a source dataset file (e.g. 'source/target_time_series.csv').
+    """
+    return '{folder}/{file}'.format(folder=environ['S3_SRC_FOLDER'], file=filename)
+
+
+def work_key(*parts):
+    """
+    Return a key under the folder for intermediate pipeline artifacts (e.g. 'pipeline/...').
+    """
+    return '/'.join((environ['S3_WORK_FOLDER'],) + parts)
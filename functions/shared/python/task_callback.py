@@ -0,0 +1,122 @@
+"""
+Wait for Amazon Forecast resources with a task token of Step Functions instead of retrying on ResourcePending.
+A state with `arn:aws:states:::lambda:invoke.waitForTaskToken` passes {"Event": <state input>, "TaskToken": <token>}.
+- When the Lambda function finishes, its result is sent with the token (or the exception as a task failure).
+- When it raises ResourcePending, the resources it waits for are stored as a watch in the work folder, and
+  watch_pending_resources is scheduled to run (see watch_schedule). It describes the resources of the watches (at the
+  times scheduled by poll_schedule), and invokes the Lambda function again once none of them is pending.
+Events without a task token are handled as before (the state machine retries on ResourcePending).
+"""
+import json
+import hashlib
+import functools
+from actions import ResourcePending, PENDING_STATUSES  # pylint: disable=import-error
+from clients import client  # pylint: disable=import-error
+from inventory import RESOURCE_TYPES, DELETING_STATUSES  # pylint: disable=import-error
+from storage import get_storage, work_key  # pylint: disable=import-error
+from watch_schedule import schedule_watcher  # pylint: disable=import-error
+
+WATCH_FOLDER = 'watches'
+# Step Functions limits the cause of a task failure to 32768 characters
+MAX_CAUSE_LENGTH = 32768
+# Resource part of an ARN -> resource type of inventory.RESOURCE_TYPES
+ARN_RESOURCE_TYPES = {
+    'dataset-group': 'DatasetGroups',
+    'dataset': 'Datasets',
+    'dataset-import-job': 'DatasetImportJobs',
+    'predictor': 'Predictors',
+    'forecast': 'Forecasts',
+    'forecast-export-job': 'ForecastExportJobs',
+}
+
+stepfunctions_client = client('stepfunctions')
+
+
+def is_callback(event):
+    return isinstance(event, dict) and 'TaskToken' in event and 'Event' in event
+
+
+def watch_key(token):
+    return work_key(WATCH_FOLDER, hashlib.sha256(token.encode('utf-8')).hexdigest() + '.json')
+
+
+def save_watch(storage, function_name, event, token, resources):
+    watch = {
+        'FunctionName': function_name,
+        'TaskToken': token,
+        'Resources': resources,
+        'Event': event
+    }
+    storage.put_bytes(watch_key(token), json.dumps(watch).encode('utf-8'))
+
+
+def watch_keys(storage):
+    return storage.list_keys(work_key(WATCH_FOLDER, ''))
+
+
+def load_watches(storage):
+    """
+    Return [(key, watch)] of the Lambda functions waiting for resources.
+    """
+    return [(key, json.loads(storage.get_bytes(key).decode('utf-8')))
+            for key in watch_keys(storage)]
+
+
+def resource_type(arn):
+    """
+    Return the resource type of inventory.RESOURCE_TYPES of an Amazon Forecast ARN.
+    """
+    return ARN_RESOURCE_TYPES[arn.split(':')[5].split('/')[0]]
+
+
+def describe_resource(forecast_client, arn):
+    """
+    Return the description of an Amazon Forecast resource, or None when it does not exist.
+    """
+    arn_name, describe, _ = RESOURCE_TYPES[resource_type(arn)]
+    try:
+        return getattr(forecast_client, describe)(**{arn_name: arn})
+    except forecast_client.exceptions.ResourceNotFoundException:
+        return None
+
+
+def is_settled(status):
+    """
+    Return whether a resource is neither being created nor deleted.
+    """
+    return status not in PENDING_STATUSES and status not in DELETING_STATUSES
+
+
+def _send(method, **kwargs):
+    try:
+        method(**kwargs)
+    except (stepfunctions_client.exceptions.TaskTimedOut, stepfunctions_client.exceptions.InvalidToken):
+        # The execution has timed out or been stopped. Nothing waits for the result.
+        pass
+
+
+def task_callback(func):
+    """
+    Decorator of lambda_handler() (apply it outside lambda_handler_logger) to support task tokens.
+    """
+    @functools.wraps(func)
+    def wrapper(event, context):
+        if not is_callback(event):
+            return func(event, context)
+        token = event['TaskToken']
+        try:
+            result = func(event['Event'], context)
+        except ResourcePending as e:
+            save_watch(get_storage(), context.function_name, event['Event'], token, e.resources)
+            # The watch is saved first, so that the watcher finds it once the rule fires
+            schedule_watcher()
+            return None
+        except Exception as e:  # pylint: disable=broad-except
+            _send(stepfunctions_client.send_task_failure,
+                  taskToken=token,
+                  error=e.__class__.__name__,
+                  cause=repr(e)[:MAX_CAUSE_LENGTH])
+            return None
+        _send(stepfunctions_client.send_task_success, taskToken=token, output=json.dumps(result))
+        return result
+    return wrapper
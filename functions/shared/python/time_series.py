@@ -0,0 +1,103 @@
+"""
+NumPy helpers for the columns of time series dataset files (timestamps, values and DataFrequency).
+"""
+import re
+from datetime import datetime
+import numpy as np
+from dataset_schema import to_strptime_format  # pylint: disable=import-error
+
+# Timestamp formats which NumPy parses and prints natively (ISO 8601 with ' ' as the separator)
+ISO_STRPTIME_FORMATS = {
+    '%Y-%m-%d %H:%M:%S': 's',
+    '%Y-%m-%d %H:%M': 'm',
+    '%Y-%m-%d': 'D',
+}
+
+# DataFrequency of Forecast -> (NumPy datetime unit, number of units)
+FREQUENCY_UNITS = {
+    'Y': ('Y', 1),
+    'M': ('M', 1),
+    'W': ('W', 1),
+    'D': ('D', 1),
+    'H': ('h', 1),
+}
+compiled_minute_frequency_pattern = re.compile(r'^([0-9]+)min$')
+
+
+def frequency_unit(frequency):
+    """
+    Return (NumPy datetime unit, number of units) of a DataFrequency such as "H" or "15min".
+    """
+    if frequency in FREQUENCY_UNITS:
+        return FREQUENCY_UNITS[frequency]
+    result = compiled_minute_frequency_pattern.match(frequency)
+    if result:
+        return ('m', int(result.group(1)))
+    raise Exception('unsupported DataFrequency: {}'.format(frequency))
+
+
+def to_periods(timestamps, frequency):
+    """
+    Return the index of the period (counted from 1970-01-01) that each timestamp falls into.
+    """
+    unit, step = frequency_unit(frequency)
+    return timestamps.astype('datetime64[{}]'.format(unit)).astype(np.int64) // step
+
+
+def from_periods(periods, frequency):
+    """
+    Return the starting timestamps of periods returned by to_periods().
+    """
+    unit, step = frequency_unit(frequency)
+    return (np.asarray(periods, dtype=np.int64) * step).astype(
+        'datetime64[{}]'.format(unit)).astype('datetime64[s]')
+
+
+def parse_timestamps(values, timestamp_format):
+    """
+    Parse timestamp strings into a datetime64[s] array. Invalid values become NaT.
+    """
+    strptime_format = to_strptime_format(timestamp_format)
+    if strptime_format in ISO_STRPTIME_FORMATS:
+        try:
+            return np.array(values, dtype='datetime64[s]')
+        except ValueError:
+            pass
+    timestamps = np.empty(len(values), dtype='datetime64[s]')
+    for i, value in enumerate(values):
+        try:
+            timestamps[i] = np.datetime64(datetime.strptime(value, strptime_format), 's')
+        except ValueError:
+            timestamps[i] = np.datetime64('NaT')
+    return timestamps
+
+
+def format_timestamps(timestamps, timestamp_format):
+    """
+    Format a datetime64 array with the timestamp format of params.json.
+    """
+    strptime_format = to_strptime_format(timestamp_format)
+    if strptime_format in ISO_STRPTIME_FORMATS:
+        strings = np.datetime_as_string(
+            timestamps, unit=ISO_STRPTIME_FORMATS[strptime_format])
+        return np.char.replace(strings, 'T', ' ')
+    return np.array([timestamp.astype(datetime).strftime(strptime_format)
+                     for timestamp in timestamps.astype('datetime64[s]')])
+
+
+def parse_floats(values):
+    """
+    Parse numeric strings into a float64 array. Empty and invalid values become NaN.
+    """
+    strings = np.array(values, dtype=np.str_)
+    strings[np.char.strip(strings) == ''] = 'nan'
+    try:
+        return strings.astype(np.float64)
+    except ValueError:
+        floats = np.empty(len(strings), dtype=np.float64)
+        for i, value in enumerate(strings):
+            try:
+                floats[i] = float(value)
+            except ValueError:
+                floats[i] = np.nan
+        return floats
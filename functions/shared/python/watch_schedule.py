@@ -0,0 +1,46 @@
+"""
+Schedule of WatchPendingResources.
+Its EventBridge rule (WATCH_RULE_NAME) is enabled only while watches exist: task_callback schedules it to fire soon when
+a watch is saved, and watch_pending_resources schedules it at the earliest NextCheckAt of the remaining watches (see
+poll_schedule), or disables it when no watch is left. The rule keeps firing at the same rate until it is scheduled
+again, so a missed invocation only delays the checks.
+"""
+import math
+from os import environ
+from clients import client  # pylint: disable=import-error
+from poll_schedule import MIN_INTERVAL, MAX_INTERVAL  # pylint: disable=import-error
+
+RULE_NAME_VARIABLE = 'WATCH_RULE_NAME'
+# The rule fires at the granularity of minutes. Watches due within SLACK seconds are checked by an invocation.
+SLACK = 30
+
+events_client = client('events')
+
+
+def rate_expression(seconds):
+    """
+    Return the rate expression of EventBridge firing after `seconds` (rounded up to minutes, within the intervals of
+    poll_schedule).
+    """
+    minutes = math.ceil(min(max(seconds, MIN_INTERVAL), MAX_INTERVAL) / 60)
+    return 'rate(1 minute)' if minutes == 1 else 'rate({} minutes)'.format(minutes)
+
+
+def schedule_watcher(seconds=MIN_INTERVAL):
+    """
+    Enable the rule of WatchPendingResources to fire after `seconds`.
+    """
+    expression = rate_expression(seconds)
+    events_client.put_rule(
+        Name=environ[RULE_NAME_VARIABLE],
+        ScheduleExpression=expression,
+        State='ENABLED'
+    )
+    return expression
+
+
+def stop_watcher():
+    """
+    Disable the rule of WatchPendingResources.
+    """
+    events_client.disable_rule(Name=environ[RULE_NAME_VARIABLE])
@@ -0,0 +1,99 @@
+"""
+Validate dataset files in S3 against the schemas in params.json before dataset import jobs are created.
+"""
+import json
+# From Lambda Layers
+import actions  # pylint: disable=import-error
+from config import load_config  # pylint: disable=import-error
+from dataset_validator import validate_file  # pylint: disable=import-error
+from storage import get_storage, source_key, work_key  # pylint: disable=import-error
+from lambda_handler_logger import lambda_handler_logger  # pylint: disable=import-error
+from claim_check import claim_check  # pylint: disable=import-error
+from aws_lambda_powertools import Logger  # pylint: disable=import-error
+
+REPORT_NAME = 'validation/{date}/{filename}.json'
+
+logger = Logger()
+
+
+@lambda_handler_logger(logger=logger, lambda_name='validate_dataset_files')
+@claim_check
+def lambda_handler(event, _):
+    """
+    Lambda function handler
+    """
+    storage = get_storage()
+    config = load_config()
+    results = []
+    # init_update_model_flow asks for profiles, which are built in the same pass as the validation.
+    profiling = event.get('ProfileDatasets', False)
+    if profiling:
+        # numpy is imported here so that update-forecast flow does not load it on cold starts.
+        from dataset_profiler import validate_and_profile_file, check_profile  # pylint: disable=import-error,import-outside-toplevel
+    profiles = []
+
+    for job in event['DatasetImportJobs']:
+        # The file has already been imported (see init_update_forecast_flow).
+        if job.get('Unchanged', False):
+            continue
+        dataset = config.dataset(job['DatasetType'])
+        key = source_key(job['Filename'])
+        if storage.stat(key) is None:
+            raise Exception(
+                'dataset file not found: {}'.format(storage.uri(key)))
+
+        logger.info({
+            'message': 'validating dataset file',
+            'key': key
+        })
+        if profiling:
+            report, profile = validate_and_profile_file(
+                storage, key, dataset, event['DatasetTimestampFormat'])
+            profiles.append(profile)
+        else:
+            report = validate_file(
+                storage, key, dataset, event['DatasetTimestampFormat'])
+
+        report_key = work_key(REPORT_NAME.format(
+            date=event['TriggeredAt'],
+            filename=job['Filename']
+        ))
+        storage.put_bytes(report_key, json.dumps(report).encode('utf-8'))
+        logger.info({
+            'message': 'dataset file validated',
+            'report': report,
+            'report_key': report_key
+        })
+
+        results.append({
+            'Filename': job['Filename'],
+            'Rows': report['Rows'],
+            'InvalidRows': report['InvalidRows'],
+            'ReportKey': report_key
+        })
+
+    event['DatasetValidation'] = results
+
+    invalid_files = [result['Filename']
+                     for result in results if result['InvalidRows'] > 0]
+    if len(invalid_files) > 0:
+        raise actions.InvalidDatasetFile(
+            'invalid rows found in {}. See validation reports for details.'.format(invalid_files))
+
+    # Profiles are checked only for valid files, so that the limits are not applied to broken data.
+    if profiling:
+        event['DatasetProfile'] = profiles
+        logger.info({
+            'message': 'dataset files profiled',
+            'dataset_profile': profiles
+        })
+        violations = [violation for profile in profiles
+                      for violation in check_profile(profile, event.get('DatasetProfileLimits', {}))]
+        if len(violations) > 0:
+            raise actions.InvalidDatasetFile(
+                'dataset profile is out of DatasetProfileLimits: {}'.format(violations))
+
+    logger.info({
+        'message': 'all dataset files are valid'
+    })
+    return event
@@ -0,0 +1,98 @@
+"""
+Invoke the Lambda functions waiting with a task token of Step Functions again once the Amazon Forecast resources they
+wait for are no longer being created or deleted. Each watch is checked at the time scheduled from the durations
+observed so far (see poll_schedule), and this function schedules its next invocation at the earliest of those times, or
+stops its schedule when no watch is left (see watch_schedule).
+"""
+import json
+import time
+# From Lambda Layers
+from clients import client  # pylint: disable=import-error
+from actions import PENDING_STATUSES  # pylint: disable=import-error
+from task_callback import load_watches, watch_keys, describe_resource, resource_type, is_settled  # pylint: disable=import-error
+from poll_schedule import DurationHistory, HISTORY_NAME, duration, dataset_size, estimate_duration, next_check_at  # pylint: disable=import-error
+from watch_schedule import SLACK, schedule_watcher, stop_watcher  # pylint: disable=import-error
+from storage import get_storage, work_key  # pylint: disable=import-error
+from claim_check import ClaimCheckEvent  # pylint: disable=import-error
+from lambda_handler_logger import lambda_handler_logger  # pylint: disable=import-error
+from aws_lambda_powertools import Logger  # pylint: disable=import-error
+
+logger = Logger()
+forecast_client = client('forecast')
+lambda_client = client('lambda')
+
+
+@lambda_handler_logger(logger=logger, lambda_name='watch_pending_resources')
+def lambda_handler(event, _):
+    """
+    Lambda function handler
+    """
+    storage = get_storage()
+    history_key = work_key(HISTORY_NAME)
+    history = DurationHistory.load(storage, history_key)
+    now = time.time()
+    resumed = []
+    # {key: NextCheckAt} of the watches which keep waiting
+    waiting = {}
+    for key, watch in load_watches(storage):
+        if watch.get('NextCheckAt', 0) > now + SLACK:
+            waiting[key] = watch['NextCheckAt']
+            continue
+        if 'Size' not in watch:
+            # DatasetImportJobs of the event may be a claim check
+            watch['Size'] = dataset_size(storage, ClaimCheckEvent(watch['Event'], storage))
+        responses = {arn: describe_resource(forecast_client, arn) for arn in watch['Resources']}
+        statuses = {arn: response['Status'] if response else None for arn, response in responses.items()}
+
+        if not all(is_settled(status) for status in statuses.values()):
+            # Check again around the earliest estimated completion time of the pending resources
+            next_checks = []
+            for arn, response in responses.items():
+                if response is None or is_settled(response['Status']):
+                    continue
+                if response['Status'] in PENDING_STATUSES:
+                    estimate = estimate_duration(history.samples(resource_type(arn)), watch['Size'])
+                    started_at = response['CreationTime'].timestamp()
+                else:
+                    # Resources being deleted have no history
+                    estimate = None
+                    started_at = response['LastModificationTime'].timestamp()
+                next_checks.append(next_check_at(started_at, now, estimate))
+            watch['NextCheckAt'] = min(next_checks)
+            storage.put_bytes(key, json.dumps(watch).encode('utf-8'))
+            waiting[key] = watch['NextCheckAt']
+            continue
+
+        for arn, response in responses.items():
+            if response is not None and response['Status'] == 'ACTIVE':
+                history.record(resource_type(arn), arn, duration(response), watch['Size'])
+
+        # The watch is removed first. The function saves a new one if it still has to wait.
+        storage.delete(key)
+        lambda_client.invoke(
+            FunctionName=watch['FunctionName'],
+            InvocationType='Event',
+            Payload=json.dumps({'Event': watch['Event'], 'TaskToken': watch['TaskToken']}).encode('utf-8')
+        )
+        resumed.append({'function_name': watch['FunctionName'], 'statuses': statuses})
+
+    if history.changed:
+        history.save(storage, history_key)
+
+    # Run again at the earliest check of the watches, or not until a new watch is saved
+    if waiting:
+        schedule = schedule_watcher(min(waiting.values()) - now)
+    else:
+        stop_watcher()
+        schedule = None
+    # Watches saved while this function was running (by the functions resumed above, for example) have scheduled
+    # their own check, which may have been overwritten above
+    if set(watch_keys(storage)) - set(waiting):
+        schedule = schedule_watcher()
+    logger.info({
+        'message': 'resumed Lambda functions waiting for resources',
+        'resumed': resumed,
+        'waiting': len(waiting),
+        'schedule': schedule
+    })
+    return event
@@ -0,0 +1,290 @@
+"""
+Benchmark of the Lambda handlers over large synthetic inventories of Amazon Forecast resources.
+
+The simulator (tools/forecast_simulator.py) is populated with thousands of dataset groups of the project, each with its
+datasets, dataset import jobs, predictor, forecast and forecast export job, as if the pipeline had run for months
+without cleanup. Then update_forecast and update_model run on tools/asl_runner.py, so every handler (and the cleanup of
+the outdated resources by build_resource_inventory and collect_outdated_resources) sees the large inventory.
+
+Per handler (logical id of template.yaml), the benchmark measures
+  Invocations   Lambda invocations (including the ones resumed by WatchPendingResources)
+  ApiCalls      Amazon Forecast calls
+  Seconds       wall-clock seconds of all invocations
+  PeakMemoryMB  peak of memory allocated by Python during an invocation (tracemalloc, in a separate run)
+  ImportSeconds seconds to import app.py in a fresh interpreter (cold start), the minimum of IMPORT_REPEAT runs
+and compares them with budgets.json. Set budgets close to the measured values, with headroom for the noise of the
+machine (timings) and of thread scheduling (polls of the concurrent deletions).
+
+Usage:
+  python tests/benchmark/pipeline_benchmark.py                   # print the report and the budget violations
+  python tests/benchmark/pipeline_benchmark.py --update-budgets  # write the measured values to budgets.json
+"""
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import contextlib
+import datetime
+import tempfile
+import tracemalloc
+import subprocess
+import collections
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.join(HERE, '..', '..')
+TOOLS = os.path.join(ROOT, 'tools')
+sys.path.append(TOOLS)
+from asl_runner import Runner, SHARED, load_definition, export_writer  # noqa: E402 pylint: disable=wrong-import-position
+from forecast_simulator import ForecastSimulator, SimulatedClock  # noqa: E402 pylint: disable=wrong-import-position
+from generate_dataset import generate  # noqa: E402 pylint: disable=wrong-import-position
+
+BUDGETS_PATH = os.path.join(HERE, 'budgets.json')
+METRICS = ['Invocations', 'ApiCalls', 'Seconds', 'PeakMemoryMB', 'ImportSeconds']
+# Metrics which do not depend on the machine
+DETERMINISTIC_METRICS = ['Invocations', 'ApiCalls']
+# Headroom of the budgets written by --update-budgets
+HEADROOM = {'Invocations': 1.2, 'ApiCalls': 1.2, 'Seconds': 3.0, 'PeakMemoryMB': 2.0, 'ImportSeconds': 3.0}
+# Smallest budgets written by --update-budgets (timings of a few milliseconds are mostly noise)
+MIN_BUDGETS = {'Seconds': 0.5, 'PeakMemoryMB': 1.0}
+# Size of the synthetic inventory and dataset when budgets.json has no Scale
+DEFAULT_SCALE = {'DatasetGroups': 1000, 'Items': 20, 'Length': 24 * 14}
+STATEMACHINES = ['update_forecast', 'update_model']
+IMPORT_REPEAT = 3
+# Names of the synthetic resources are dated hourly from this time, before any run of the flows
+FIRST_DATE = datetime.datetime(2019, 1, 1)
+DATE_FORMAT = '%Y_%m_%d_%H_%M_%S'
+IMPORT_CODE = 'import sys, time; started_at = time.perf_counter(); import app; ' \
+              'sys.stdout.write(str(time.perf_counter() - started_at))'
+
+
+def populate(simulator, params, project_name, dataset_groups):
+    """
+    Create `dataset_groups` generations of the resources of the project in the simulator, all ACTIVE.
+    Return the number of resources per resource type.
+    """
+    on_active, simulator.on_active = simulator.on_active, None
+    names = [FIRST_DATE + datetime.timedelta(hours=i) for i in range(dataset_groups)]
+    names = [date.strftime(DATE_FORMAT) for date in names]
+    filenames = {job['DatasetType']: job['Filename'] for job in params['DatasetImportJobs']}
+
+    def settle():
+        simulator.clock.advance(max(sum(latencies[:2]) for latencies in simulator.latencies.values()))
+
+    groups = {}
+    for date in names:
+        dataset_arns = [simulator.create_dataset(**dict(
+            dataset, DatasetName='{}_{}_{}'.format(project_name, dataset['DatasetType'], date)))['DatasetArn']
+            for dataset in params['Datasets']]
+        groups[date] = (dataset_arns, simulator.create_dataset_group(
+            DatasetGroupName='{}_{}'.format(project_name, date), Domain=params['DatasetGroup']['Domain'],
+            DatasetArns=dataset_arns)['DatasetGroupArn'])
+    settle()
+    for date, (dataset_arns, _) in groups.items():
+        for dataset, dataset_arn in zip(params['Datasets'], dataset_arns):
+            simulator.create_dataset_import_job(
+                DatasetImportJobName='job_{}'.format(date), DatasetArn=dataset_arn,
+                DataSource={'S3Config': {'Path': 's3://bucket/source/' + filenames[dataset['DatasetType']]}})
+    settle()
+    predictors = {date: simulator.create_predictor(
+        PredictorName='{}_{}'.format(project_name, date), ForecastHorizon=params['Predictor']['ForecastHorizon'],
+        InputDataConfig={'DatasetGroupArn': dataset_group_arn})['PredictorArn']
+        for date, (_, dataset_group_arn) in groups.items()}
+    settle()
+    forecasts = {date: simulator.create_forecast(
+        ForecastName='{}_{}'.format(project_name, date), PredictorArn=predictor_arn)['ForecastArn']
+        for date, predictor_arn in predictors.items()}
+    settle()
+    for date, forecast_arn in forecasts.items():
+        simulator.create_forecast_export_job(
+            ForecastExportJobName='{}_{}'.format(project_name, date), ForecastArn=forecast_arn,
+            Destination={'S3Config': {'Path': 's3://bucket/forecast/'}})
+    settle()
+    counts = {resource_type: len(simulator._all(resource_type))  # pylint: disable=protected-access
+              for resource_type in simulator.resources}
+    simulator.on_active = on_active
+    return counts
+
+
+class HandlerStatistics:
+
+    def __init__(self):
+        self.invocations = 0
+        self.api_calls = 0
+        self.seconds = 0.0
+        self.peak_memory = 0
+
+
+class MeasuringRunner(Runner):
+    """
+    Runner which measures every invocation of a Lambda function.
+    """
+
+    def __init__(self, root, params_path=None, simulator=None, trace_memory=False):
+        super().__init__(root, params_path, simulator)
+        self.trace_memory = trace_memory
+        self.handlers = collections.defaultdict(HandlerStatistics)
+
+    def invoke(self, function_name, payload):
+        statistics = self.handlers[function_name]
+        calls = sum(self.simulator.calls.values())
+        if self.trace_memory:
+            tracemalloc.reset_peak()
+            baseline = tracemalloc.get_traced_memory()[0]
+        started_at = time.perf_counter()
+        try:
+            return super().invoke(function_name, payload)
+        finally:
+            statistics.seconds += time.perf_counter() - started_at
+            statistics.invocations += 1
+            statistics.api_calls += sum(self.simulator.calls.values()) - calls
+            if self.trace_memory:
+                statistics.peak_memory = max(statistics.peak_memory, tracemalloc.get_traced_memory()[1] - baseline)
+
+
+def run_flows(scale, trace_memory=False):
+    """
+    Run the state machines over a populated simulator. Return (MeasuringRunner, counts of the populated resources).
+    """
+    root = tempfile.mkdtemp(prefix='pipeline_benchmark_')
+    try:
+        generate(os.path.join(root, 'source'), scale['Items'], scale['Length'], '2014-01-01 01:00:00', 'H', 0)
+        params_path = os.path.join(SHARED, 'params.json')
+        with open(params_path) as f:
+            params = json.load(f)
+        from storage import LocalStorage  # pylint: disable=import-error,import-outside-toplevel
+        simulator = ForecastSimulator(clock=SimulatedClock(time.time()),
+                                      on_active=export_writer(LocalStorage(root), params))
+        runner = MeasuringRunner(root, params_path, simulator, trace_memory)
+        runner.install()
+        project_name = runner.functions['InitUpdateModelFlow'].environment['STACK_NAME'].replace('-', '_')
+        counts = populate(simulator, params, project_name, scale['DatasetGroups'])
+        if trace_memory:
+            tracemalloc.start()
+        try:
+            for name in STATEMACHINES:
+                status, output = runner.run(load_definition(runner.template, name, runner.parameters), {})
+                if status != 'SUCCEEDED':
+                    raise RuntimeError('{} {}: {}'.format(name, status, json.dumps(output, default=str)[:2000]))
+        finally:
+            if trace_memory:
+                tracemalloc.stop()
+        return runner, counts
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+
+def import_seconds(code_dir, repeat=IMPORT_REPEAT):
+    """
+    Return the minimum seconds to import app.py of a Lambda function in a fresh interpreter.
+    """
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join([SHARED, code_dir]), PYTHONDONTWRITEBYTECODE='1',
+               AWS_DEFAULT_REGION='us-east-1')
+    return min(float(subprocess.check_output([sys.executable, '-c', IMPORT_CODE], cwd=code_dir, env=env))
+               for _ in range(repeat))
+
+
+def measure(scale, timings=True):
+    """
+    Return the report {'Scale', 'Resources', 'Handlers': {logical id: {metric: value}}}.
+    Without `timings`, only DETERMINISTIC_METRICS are measured (the flows run once, without tracemalloc and imports).
+    The logs of the handlers are written (the cost is measured) but discarded.
+    """
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        runner, counts = run_flows(scale)
+        memory_runner = run_flows(scale, trace_memory=True)[0] if timings else None
+    handlers = {}
+    for name, statistics in sorted(runner.handlers.items()):
+        handlers[name] = {
+            'Invocations': statistics.invocations,
+            'ApiCalls': statistics.api_calls,
+        }
+        if timings:
+            handlers[name].update({
+                'Seconds': round(statistics.seconds, 3),
+                'PeakMemoryMB': round(memory_runner.handlers[name].peak_memory / 2 ** 20, 2),
+                'ImportSeconds': round(import_seconds(runner.functions[name].code_dir), 3),
+            })
+    return {'Scale': scale, 'Resources': counts, 'Handlers': handlers}
+
+
+def load_budgets(path=BUDGETS_PATH):
+    if not os.path.exists(path):
+        return {'Scale': DEFAULT_SCALE, 'Handlers': {}}
+    with open(path) as f:
+        return json.load(f)
+
+
+def make_budgets(report):
+    """
+    Return budgets of the measured values with HEADROOM (and at least MIN_BUDGETS).
+    """
+    def budget(metric, value):
+        if metric in ('Invocations', 'ApiCalls'):
+            return int(value * HEADROOM[metric]) + 1
+        return round(max(value * HEADROOM[metric], MIN_BUDGETS.get(metric, 0)), 3)
+
+    return {
+        'Scale': report['Scale'],
+        'Handlers': {name: {metric: budget(metric, value) for metric, value in values.items()}
+                     for name, values in report['Handlers'].items()}
+    }
+
+
+def violations(report, budgets, metrics=None):
+    """
+    Return the messages of the measured values of `metrics` (default: METRICS) over their budgets
+    (and of handlers without budgets).
+    """
+    messages = []
+    for name, values in report['Handlers'].items():
+        if name not in budgets['Handlers']:
+            messages.append('{}: no budget'.format(name))
+            continue
+        for metric in metrics or METRICS:
+            budget = budgets['Handlers'][name].get(metric)
+            if budget is not None and metric in values and values[metric] > budget:
+                messages.append('{}: {} {} exceeds the budget {}'.format(name, metric, values[metric], budget))
+    return messages
+
+
+def format_report(report, budgets=None):
+    lines = ['resources: {}'.format(report['Resources']),
+             '{:<28} {:>11} {:>9} {:>10} {:>14} {:>15}'.format(
+                 'handler', 'invocations', 'api calls', 'seconds', 'peak memory MB', 'import seconds')]
+    for name, values in report['Handlers'].items():
+        budget = (budgets or {}).get('Handlers', {}).get(name, {})
+        lines.append('{:<28} {:>11} {:>9} {:>10.3f} {:>14.2f} {:>15.3f}'.format(
+            name, *[values.get(metric, float('nan')) for metric in METRICS]))
+        if budget:
+            lines.append('{:<28} {:>11} {:>9} {:>10.3f} {:>14.2f} {:>15.3f}'.format(
+                '  budget', *[budget.get(metric, float('nan')) for metric in METRICS]))
+    return '\n'.join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--update-budgets', action='store_true', help='write the measured values to budgets.json')
+    parser.add_argument('--report', help='write the report (JSON) to this file')
+    args = parser.parse_args()
+
+    budgets = load_budgets()
+    report = measure(budgets['Scale'])
+    if args.report:
+        with open(args.report, 'w') as f:
+            json.dump(report, f, indent=4)
+    if args.update_budgets:
+        budgets = make_budgets(report)
+        with open(BUDGETS_PATH, 'w') as f:
+            json.dump(budgets, f, indent=4)
+            f.write('\n')
+    print(format_report(report, budgets))
+    messages = violations(report, budgets)
+    for message in messages:
+        print(message)
+    return 1 if messages else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,37 @@
+"""
+Fail when a handler exceeds its budget in budgets.json (see pipeline_benchmark.py).
+By default, only the budgets of DETERMINISTIC_METRICS (Invocations, ApiCalls) are checked, which takes a few seconds.
+The budgets of the wall-clock seconds, peak memory and import seconds were measured on one machine and take about a
+minute to check, so they are checked only with PIPELINE_BENCHMARK_TIMINGS=1.
+Update the budgets with `python tests/benchmark/pipeline_benchmark.py --update-budgets` when a change is expected to
+cost more.
+"""
+import os
+import sys
+import unittest
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+import pipeline_benchmark  # noqa: E402 pylint: disable=wrong-import-position
+
+TIMINGS = bool(os.environ.get('PIPELINE_BENCHMARK_TIMINGS'))
+
+
+class PipelineBenchmarkTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.budgets = pipeline_benchmark.load_budgets()
+        cls.report = pipeline_benchmark.measure(cls.budgets['Scale'], timings=TIMINGS)
+        print(pipeline_benchmark.format_report(cls.report, cls.budgets))
+
+    def test_every_handler_is_measured(self):
+        self.assertEqual(sorted(self.report['Handlers']), sorted(self.budgets['Handlers']))
+
+    def test_budgets(self):
+        metrics = pipeline_benchmark.METRICS if TIMINGS else pipeline_benchmark.DETERMINISTIC_METRICS
+        messages = pipeline_benchmark.violations(self.report, self.budgets, metrics)
+        self.assertEqual(messages, [], '\n'.join(messages))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,13 @@
+"""
+Unit tests of the modules of the shared Lambda layer (functions/shared/python), of tools/ and of a few handlers.
+The modules are imported like on Lambda, with the layer on the path. Storage is a LocalStorage in a temporary directory.
+"""
+import os
+import sys
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..')
+SHARED = os.path.join(ROOT, 'functions', 'shared', 'python')
+TOOLS = os.path.join(ROOT, 'tools')
+for path in (SHARED, TOOLS):
+    if path not in sys.path:
+        sys.path.append(path)
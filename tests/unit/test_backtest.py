@@ -0,0 +1,91 @@
+import tempfile
+import unittest
+from unittest import mock
+
+import numpy as np
+from backtest import Backtest, backtest_file, quantile_level, parse_export_dates  # pylint: disable=import-error
+from storage import LocalStorage  # pylint: disable=import-error
+
+DATASET = {
+    'DatasetType': 'TARGET_TIME_SERIES',
+    'DataFrequency': 'H',
+    'Schema': {'Attributes': [
+        {'AttributeName': 'timestamp', 'AttributeType': 'timestamp'},
+        {'AttributeName': 'target_value', 'AttributeType': 'float'},
+        {'AttributeName': 'item_id', 'AttributeType': 'string'},
+    ]}
+}
+TIMESTAMP_FORMAT = 'yyyy-MM-dd HH:mm:ss'
+# The actual of a at 01:00 is split into two rows, c has no actuals and the bad rows are skipped.
+ACTUALS = '2020-01-01 00:00:00,2,a\n2020-01-01 01:00:00,3,a\n2020-01-01 01:00:00,1,a\n' \
+    '2020-01-01 00:00:00,0,b\n2020-01-01 02:00:00,x,a\n2020/01/01 03:00:00,1,a\n'
+EXPORT = 'item_id,date,p10,p50,p90\n' \
+    'a,2020-01-01T00:00:00Z,1,2,3\na,2020-01-01T01:00:00Z,1,2,3\nb,2020-01-01T00:00:00Z,1,2,3\n' \
+    'c,2020-01-01T00:00:00Z,1,2,3\na,2020-01-01T02:00:00Z,1,,3\n'
+
+
+def rows(text):
+    return [line.split(',') for line in text.splitlines()]
+
+
+class BacktestTest(unittest.TestCase):
+
+    def test_quantile_level(self):
+        self.assertEqual([quantile_level(name) for name in ['p10', 'p05', 'p99', 'mean']], [0.1, 0.05, 0.99, None])
+
+    def test_parse_export_dates(self):
+        dates = parse_export_dates(['2020-01-01T01:00:00Z', 'broken'])
+        self.assertEqual(dates[0], np.datetime64('2020-01-01T01:00:00'))
+        self.assertTrue(np.isnat(dates[1]))
+
+    def test_metrics(self):
+        backtest = Backtest(rows(EXPORT)[0], DATASET, TIMESTAMP_FORMAT)
+        backtest.add(rows(ACTUALS), rows(EXPORT)[1:])
+        result = backtest.to_dict()
+        self.assertEqual((result['Rows'], result['Series'], result['ForecastRows']), (3, 2, 4))
+        self.assertEqual(result['PointForecast'], 'p50')
+        for name, expected in {'p10': 2.6 / 6, 'p50': 4 / 6, 'p90': 2.6 / 6}.items():
+            self.assertAlmostEqual(result['WQL'][name], expected)
+        for name, expected in {'p10': 1 / 3, 'p50': 2 / 3, 'p90': 2 / 3}.items():
+            self.assertAlmostEqual(result['Coverage'][name], expected)
+        self.assertAlmostEqual(result['RMSE'], (8 / 3) ** 0.5)
+        self.assertAlmostEqual(result['MAPE'], 0.25)
+
+    def test_no_actuals(self):
+        backtest = Backtest(rows(EXPORT)[0], DATASET, TIMESTAMP_FORMAT)
+        backtest.add([], rows(EXPORT)[1:])
+        self.assertEqual(backtest.to_dict(), {'Rows': 0, 'Series': 0, 'ForecastRows': 4, 'PointForecast': 'p50'})
+
+    def test_invalid_exports(self):
+        with self.assertRaises(Exception):
+            Backtest(['date', 'p50'], DATASET, TIMESTAMP_FORMAT)
+        with self.assertRaises(Exception):
+            Backtest(['item_id', 'date', 'p10', 'p90'], DATASET, TIMESTAMP_FORMAT)
+
+
+class BacktestFileTest(unittest.TestCase):
+
+    def test_partitions_give_the_same_metrics(self):
+        results = []
+        for partitions in (1, 3):
+            with tempfile.TemporaryDirectory() as root, \
+                    mock.patch('backtest.partition_count', return_value=partitions):
+                storage = LocalStorage(root)
+                storage.put_bytes('source/target.csv', ACTUALS.encode('utf-8'))
+                storage.put_bytes('merged/run.csv', EXPORT.encode('utf-8'))
+                result = backtest_file(storage, 'source/target.csv', 'merged/run.csv', DATASET,
+                                       TIMESTAMP_FORMAT, 'backtest/run.csv')
+                metrics = sorted(storage.get_bytes('backtest/run.csv').decode('utf-8').splitlines())
+            self.assertEqual(result.pop('Partitions'), partitions)
+            results.append((result, metrics))
+        self.assertEqual(results[0], results[1])
+        self.assertEqual(results[0][1], [
+            # WQL and MAPE of b are undefined because its actuals are zero
+            'a,2,0.133333,0.333333,0.333333,1.41421,0.25,0,0.5,0.5',
+            'b,1,,,,2,,1,1,1',
+            'item_id,rows,wql_p10,wql_p50,wql_p90,rmse,mape,coverage_p10,coverage_p50,coverage_p90',
+        ])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,94 @@
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+import claim_check  # pylint: disable=import-error
+from claim_check import ClaimCheckEvent, check_in, expire_claims, redeem  # pylint: disable=import-error
+from storage import LocalStorage  # pylint: disable=import-error
+
+BULKY = [{'DatasetType': 'TARGET_TIME_SERIES', 'Attributes': ['attribute_{}'.format(i) for i in range(100)]}]
+SMALL = {'DatasetType': 'RELATED_TIME_SERIES'}
+
+
+@mock.patch.dict(os.environ, {'S3_WORK_FOLDER': 'pipeline'})
+class ClaimCheckTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.storage = LocalStorage(self.directory.name)
+        claim_check._cache.clear()
+        claim_check._cache_bytes = 0
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def claims(self):
+        return self.storage.list_keys('pipeline/claims/')
+
+    def test_small_values_stay_in_event(self):
+        self.assertEqual(check_in(self.storage, SMALL), SMALL)
+        self.assertEqual(check_in(self.storage, 'TraceId'), 'TraceId')
+        self.assertEqual(self.claims(), [])
+
+    def test_round_trip(self):
+        reference = check_in(self.storage, BULKY)
+        self.assertEqual(list(reference), ['ClaimCheck'])
+        self.assertEqual(self.claims(), [reference['ClaimCheck']])
+        self.assertIs(check_in(self.storage, reference), reference)
+
+        claim_check._cache.clear()
+        self.assertEqual(redeem(self.storage, reference), BULKY)
+
+    def test_written_once_until_refresh(self):
+        with mock.patch.object(self.storage, 'put_bytes', wraps=self.storage.put_bytes) as put_bytes:
+            check_in(self.storage, BULKY, now=1000)
+            check_in(self.storage, BULKY, now=1000 + claim_check.REFRESH_SECONDS - 1)
+            self.assertEqual(put_bytes.call_count, 1)
+            check_in(self.storage, BULKY, now=1000 + claim_check.REFRESH_SECONDS)
+            self.assertEqual(put_bytes.call_count, 2)
+
+    def test_redeemed_claim_is_written_again(self):
+        reference = check_in(self.storage, BULKY, now=1000)
+        claim_check._cache.clear()
+        redeem(self.storage, reference)
+        with mock.patch.object(self.storage, 'put_bytes', wraps=self.storage.put_bytes) as put_bytes:
+            check_in(self.storage, BULKY, now=1001)
+            self.assertEqual(put_bytes.call_count, 1)
+
+    def test_expire_old_claims(self):
+        old = check_in(self.storage, BULKY)['ClaimCheck']
+        new = check_in(self.storage, BULKY + [SMALL])['ClaimCheck']
+        os.utime(self.storage.path(old), (0, 0))
+        self.storage.put_bytes('pipeline/ledger/dataset_digests.json', b'{}')
+
+        self.assertEqual(expire_claims(self.storage), [old])
+        self.assertEqual(self.claims(), [new])
+        self.assertNotIn(old, claim_check._cache)
+        self.assertEqual(self.storage.list_keys('pipeline/ledger/'), ['pipeline/ledger/dataset_digests.json'])
+
+        # The expired value is written again when it is checked in.
+        check_in(self.storage, BULKY)
+        self.assertEqual(self.claims(), sorted([old, new]))
+
+    def test_event_redeems_fields_when_read(self):
+        event = ClaimCheckEvent({'Datasets': check_in(self.storage, BULKY), 'TraceId': 'trace'}, self.storage)
+        self.assertEqual(dict.__getitem__(event, 'Datasets'), {'ClaimCheck': self.claims()[0]})
+        self.assertEqual(event['Datasets'], BULKY)
+        self.assertEqual(event.get('Missing'), None)
+
+    def test_decorator(self):
+        @claim_check.claim_check
+        def handler(event, _):
+            event['Datasets'].append(SMALL)
+            return event
+
+        with mock.patch('claim_check.get_storage', return_value=self.storage):
+            result = handler({'Datasets': check_in(self.storage, BULKY), 'TraceId': 'trace'}, None)
+        self.assertEqual(result['TraceId'], 'trace')
+        self.assertEqual(redeem(self.storage, result['Datasets']), BULKY + [SMALL])
+        self.assertEqual(len(self.claims()), 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,77 @@
+import threading
+import unittest
+
+from actions import take_actions, ResourcePending, ResourceFailed  # pylint: disable=import-error
+from concurrent_creation import create_concurrently  # pylint: disable=import-error
+
+
+class NoLimit:
+    def acquire(self):
+        pass
+
+
+class Resources:
+    """
+    Fake resources {key: status}. Created resources are CREATE_PENDING.
+    """
+
+    def __init__(self, statuses=None):
+        self.statuses = dict(statuses or {})
+        self.created = []
+        self.lock = threading.Lock()
+
+    def describe(self, key):
+        return self.statuses.get(key)
+
+    def create(self, key):
+        with self.lock:
+            self.created.append(key)
+            self.statuses[key] = 'CREATE_PENDING'
+        return 'CREATE_PENDING'
+
+
+class CreateConcurrentlyTest(unittest.TestCase):
+
+    def create(self, resources, keys, ceiling):
+        return create_concurrently(keys, resources.describe, resources.create, ceiling, NoLimit())
+
+    def test_ceiling(self):
+        resources = Resources()
+        statuses = self.create(resources, ['a', 'b', 'c'], ceiling=2)
+        self.assertEqual(statuses, {'a': 'CREATE_PENDING', 'b': 'CREATE_PENDING', 'c': None})
+        self.assertEqual(sorted(resources.created), ['a', 'b'])
+
+    def test_running_resources_count_against_ceiling(self):
+        resources = Resources({'a': 'CREATE_IN_PROGRESS', 'b': 'ACTIVE'})
+        statuses = self.create(resources, ['a', 'b', 'c', 'd'], ceiling=2)
+        self.assertEqual(statuses, {'a': 'CREATE_IN_PROGRESS', 'b': 'ACTIVE', 'c': 'CREATE_PENDING', 'd': None})
+
+    def test_later_calls_create_the_rest(self):
+        resources = Resources()
+        keys = ['a', 'b', 'c']
+        for _ in range(3):
+            statuses = self.create(resources, keys, ceiling=1)
+            for key, status in statuses.items():
+                if status == 'CREATE_PENDING':
+                    resources.statuses[key] = 'ACTIVE'
+        self.assertEqual(resources.created, keys)
+        self.assertTrue(take_actions(self.create(resources, keys, ceiling=1)))
+
+    def test_no_keys(self):
+        self.assertEqual(self.create(Resources(), [], ceiling=1), {})
+
+
+class TakeActionsTest(unittest.TestCase):
+
+    def test_pending(self):
+        with self.assertRaises(ResourcePending) as context:
+            take_actions({'a': 'ACTIVE', 'b': 'CREATE_PENDING', 'c': None})
+        self.assertEqual(context.exception.resources, ['b'])
+
+    def test_failed(self):
+        with self.assertRaises(ResourceFailed):
+            take_actions({'a': 'CREATE_FAILED', 'b': 'CREATE_PENDING'})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,106 @@
+import json
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+import config  # pylint: disable=import-error
+from config import InvalidParams, PipelineConfig, load_config  # pylint: disable=import-error
+
+PARAMS_PATH = os.path.join(os.path.dirname(__file__), '..', '..', 'functions', 'shared', 'python', 'params.json')
+
+
+def read_params():
+    with open(PARAMS_PATH) as f:
+        return json.load(f)
+
+
+class PipelineConfigTest(unittest.TestCase):
+
+    def test_lookup_by_type(self):
+        pipeline_config = PipelineConfig(read_params())
+        self.assertEqual(pipeline_config.dataset('TARGET_TIME_SERIES')['DatasetType'], 'TARGET_TIME_SERIES')
+        self.assertEqual(pipeline_config.import_job('TARGET_TIME_SERIES')['DatasetType'], 'TARGET_TIME_SERIES')
+        with self.assertRaisesRegex(Exception, 'failed to find dataset of type "UNKNOWN"'):
+            pipeline_config.dataset('UNKNOWN')
+
+    def test_frozen(self):
+        pipeline_config = PipelineConfig(read_params())
+        with self.assertRaises(TypeError):
+            pipeline_config.dataset('TARGET_TIME_SERIES')['DatasetType'] = 'RELATED_TIME_SERIES'
+        with self.assertRaises(AttributeError):
+            pipeline_config.timestamp_format = 'yyyy-MM-dd'
+
+    def test_to_params_returns_new_copies(self):
+        params = read_params()
+        pipeline_config = PipelineConfig(params)
+        copy = pipeline_config.to_params()
+        self.assertEqual(copy, params)
+        copy['Datasets'][0]['DatasetArn'] = 'arn'
+        self.assertEqual(pipeline_config.to_params(), params)
+
+    def test_invalid_params(self):
+        params = read_params()
+        del params['Predictor']
+        with self.assertRaisesRegex(InvalidParams, 'Predictor'):
+            PipelineConfig(params)
+
+        params = read_params()
+        params['DatasetImportJobs'] = [job for job in params['DatasetImportJobs']
+                                       if job['DatasetType'] != 'TARGET_TIME_SERIES']
+        with self.assertRaisesRegex(InvalidParams, 'DatasetImportJobs does not have "TARGET_TIME_SERIES"'):
+            PipelineConfig(params)
+
+    def test_invalid_concurrency(self):
+        for ceiling in [0, -1, 1.5, '2', True]:
+            params = read_params()
+            params['CreateConcurrency'] = {'DatasetImportJobs': ceiling}
+            with self.assertRaisesRegex(InvalidParams, 'CreateConcurrency.DatasetImportJobs'):
+                PipelineConfig(params)
+        params['CreateConcurrency'] = {'DatasetImportJobs': 2}
+        PipelineConfig(params)
+
+
+class LoadConfigTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, 'params.json')
+        self.write(read_params())
+        config._configs.clear()
+
+    def tearDown(self):
+        config._configs.clear()
+        self.directory.cleanup()
+
+    def write(self, params):
+        with open(self.path, 'w') as f:
+            json.dump(params, f)
+
+    def test_cached_until_changed(self):
+        first = load_config(self.path)
+        self.assertIs(load_config(self.path), first)
+
+        params = read_params()
+        params['DatasetTimestampFormat'] = 'yyyy-MM-dd'
+        self.write(params)
+        os.utime(self.path, ns=(0, 0))
+        changed = load_config(self.path)
+        self.assertIsNot(changed, first)
+        self.assertEqual(changed.timestamp_format, 'yyyy-MM-dd')
+
+    def test_path_from_environment(self):
+        with mock.patch.dict(os.environ, {'PARAMS_PATH': self.path}):
+            self.assertIs(load_config(), load_config(self.path))
+
+    def test_layer_params_not_checked_again(self):
+        with mock.patch('config.PARAMS_PATH', self.path), mock.patch.dict(os.environ):
+            os.environ.pop('PARAMS_PATH', None)
+            first = load_config()
+            with mock.patch('os.stat') as stat:
+                self.assertIs(load_config(), first)
+                stat.assert_not_called()
+
+
+if __name__ == '__main__':
+    unittest.main()
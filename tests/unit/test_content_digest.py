@@ -0,0 +1,59 @@
+import hashlib
+import tempfile
+import unittest
+from unittest import mock
+
+import content_digest  # pylint: disable=import-error
+from content_digest import DigestLedger, compute_digest  # pylint: disable=import-error
+from storage import LocalStorage  # pylint: disable=import-error
+
+KEY = 'source/target.csv'
+LEDGER_KEY = 'pipeline/ledger/dataset_digests.json'
+DATASET_ARN = 'arn:aws:forecast:us-east-1:123456789012:dataset/project_TARGET_TIME_SERIES'
+
+
+class DigestLedgerTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.storage = LocalStorage(self.directory.name)
+        self.storage.put_bytes(KEY, b'2020-01-01 00:00:00,1,a\n')
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_digest_in_chunks(self):
+        expected = 'sha256:' + hashlib.sha256(b'2020-01-01 00:00:00,1,a\n').hexdigest()
+        self.assertEqual(compute_digest(self.storage, KEY, chunk_size=5), expected)
+
+    def test_imported_after_record(self):
+        ledger = DigestLedger(self.storage, LEDGER_KEY)
+        content = ledger.digest(KEY, 'target.csv')
+        self.assertFalse(ledger.is_imported('target.csv', content['Digest'], DATASET_ARN))
+        ledger.record('target.csv', content, DATASET_ARN)
+        ledger.save()
+
+        ledger = DigestLedger(self.storage, LEDGER_KEY)
+        self.assertTrue(ledger.is_imported('target.csv', content['Digest'], DATASET_ARN))
+        self.assertFalse(ledger.is_imported('target.csv', content['Digest'], DATASET_ARN + '_other'))
+
+    def test_changed_content(self):
+        ledger = DigestLedger(self.storage, LEDGER_KEY)
+        ledger.record('target.csv', ledger.digest(KEY, 'target.csv'), DATASET_ARN)
+        self.storage.put_bytes(KEY, b'2020-01-01 00:00:00,2,a\n')
+        self.assertFalse(ledger.is_imported('target.csv', ledger.digest(KEY, 'target.csv')['Digest'], DATASET_ARN))
+
+    def test_unchanged_object_is_not_hashed_again(self):
+        ledger = DigestLedger(self.storage, LEDGER_KEY)
+        ledger.record('target.csv', ledger.digest(KEY, 'target.csv'), DATASET_ARN)
+        with mock.patch.object(content_digest, 'compute_digest') as compute:
+            ledger.digest(KEY, 'target.csv')
+        compute.assert_not_called()
+
+    def test_missing_file(self):
+        with self.assertRaises(Exception):
+            DigestLedger(self.storage, LEDGER_KEY).digest('source/missing.csv', 'missing.csv')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,83 @@
+import io
+import tempfile
+import unittest
+
+from dataset_profiler import profile_lines, validate_and_profile_file, check_profile  # pylint: disable=import-error
+from storage import LocalStorage  # pylint: disable=import-error
+
+DATASET = {
+    'DatasetType': 'TARGET_TIME_SERIES',
+    'DataFrequency': 'H',
+    'Schema': {'Attributes': [
+        {'AttributeName': 'timestamp', 'AttributeType': 'timestamp'},
+        {'AttributeName': 'target_value', 'AttributeType': 'float'},
+        {'AttributeName': 'item_id', 'AttributeType': 'string'},
+    ]}
+}
+TIMESTAMP_FORMAT = 'yyyy-MM-dd HH:mm:ss'
+# Item a has 3 hours, item b has 2 of 3 hours (01:00 is missing).
+TEXT = ('2020-01-01 00:00:00,1,a\n2020-01-01 01:00:00,2,a\n2020-01-01 02:00:00,0,a\n'
+        '2020-01-01 00:00:00,4,b\n2020-01-01 02:00:00,,b\n')
+
+
+def profile(text, rows_per_batch=2):
+    return profile_lines(io.StringIO(text), DATASET, TIMESTAMP_FORMAT, rows_per_batch=rows_per_batch)
+
+
+class ProfileLinesTest(unittest.TestCase):
+
+    def test_statistics(self):
+        result = profile(TEXT)
+        self.assertEqual((result['Rows'], result['Items']), (5, 2))
+        self.assertEqual(result['SeriesLength']['Min'], 2)
+        self.assertEqual(result['SeriesLength']['Max'], 3)
+        self.assertEqual(result['TimeRange'], {'Start': '2020-01-01T00:00:00', 'End': '2020-01-01T02:00:00'})
+        self.assertAlmostEqual(result['MissingTimestampRatio'], 1 / 6)
+        values = result['Values']
+        self.assertEqual((values['Count'], values['Missing'], values['Zeros']), (4, 1, 1))
+        self.assertEqual((values['Min'], values['Max'], values['Mean']), (0.0, 4.0, 1.75))
+
+    def test_batches_do_not_change_result(self):
+        self.assertEqual(profile(TEXT, rows_per_batch=1), profile(TEXT, rows_per_batch=100))
+
+    def test_bad_timestamps_are_counted(self):
+        result = profile('2020-01-01 00:00:00,1,a\n2020/01/01 01:00:00,1,a\n')
+        self.assertEqual((result['Rows'], result['InvalidTimestamps']), (2, 1))
+        self.assertEqual(result['SeriesLength']['Max'], 1)
+
+    def test_malformed_rows_are_skipped(self):
+        self.assertEqual(profile('2020-01-01 00:00:00,1\n2020-01-01 00:00:00,1,a\n')['Rows'], 1)
+
+
+class ValidateAndProfileFileTest(unittest.TestCase):
+
+    def test_single_pass(self):
+        with tempfile.TemporaryDirectory() as root:
+            storage = LocalStorage(root)
+            storage.put_bytes('source/target.csv', (TEXT + '2020-01-01 03:00:00,x,a\n').encode('utf-8'))
+            report, result = validate_and_profile_file(
+                storage, 'source/target.csv', DATASET, TIMESTAMP_FORMAT, chunk_size=7)
+        self.assertEqual(report['Key'], 'source/target.csv')
+        self.assertEqual((report['Rows'], report['InvalidRows']), (6, 1))
+        self.assertEqual(report['Columns']['target_value']['Errors'], 1)
+        self.assertEqual((result['Rows'], result['Items']), (6, 2))
+        self.assertEqual(result['SeriesLength']['Max'], 4)
+
+
+class CheckProfileTest(unittest.TestCase):
+
+    def test_within_limits(self):
+        self.assertEqual(check_profile(profile(TEXT), {'MinItems': 2, 'MinSeriesLength': 2}), [])
+
+    def test_violations(self):
+        violations = check_profile(profile(TEXT), {
+            'MinItems': 3, 'MinSeriesLength': 3, 'MaxMissingTimestampRatio': 0.1})
+        self.assertEqual(len(violations), 3)
+        self.assertIn('MinItems', violations[0])
+
+    def test_no_limits(self):
+        self.assertEqual(check_profile(profile(''), {}), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
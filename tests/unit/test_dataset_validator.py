@@ -0,0 +1,72 @@
+import io
+import tempfile
+import unittest
+
+from dataset_validator import validate_lines, validate_file, MAX_SAMPLES  # pylint: disable=import-error
+from storage import LocalStorage  # pylint: disable=import-error
+
+DATASET = {
+    'DatasetType': 'TARGET_TIME_SERIES',
+    'Schema': {'Attributes': [
+        {'AttributeName': 'timestamp', 'AttributeType': 'timestamp'},
+        {'AttributeName': 'target_value', 'AttributeType': 'float'},
+        {'AttributeName': 'item_id', 'AttributeType': 'string'},
+    ]}
+}
+TIMESTAMP_FORMAT = 'yyyy-MM-dd HH:mm:ss'
+
+
+def validate(text):
+    return validate_lines(io.StringIO(text), DATASET, TIMESTAMP_FORMAT)
+
+
+class ValidateLinesTest(unittest.TestCase):
+
+    def test_valid_rows(self):
+        report = validate('2020-01-01 00:00:00,1.5,a\n2020-01-01 01:00:00,2,b\n')
+        self.assertEqual(report['Rows'], 2)
+        self.assertEqual(report['InvalidRows'], 0)
+        self.assertEqual(report['Columns'], {})
+
+    def test_missing_number_is_allowed(self):
+        self.assertEqual(validate('2020-01-01 00:00:00,,a\n')['InvalidRows'], 0)
+
+    def test_bad_numbers(self):
+        report = validate('2020-01-01 00:00:00,abc,a\n2020-01-01 01:00:00,inf,a\n2020-01-01 02:00:00,nan,a\n')
+        self.assertEqual(report['InvalidRows'], 3)
+        self.assertEqual(report['Columns']['target_value']['Errors'], 3)
+        self.assertEqual(report['Columns']['target_value']['Samples'][0], {'Line': 1, 'Value': 'abc'})
+
+    def test_bad_timestamps(self):
+        report = validate('2020/01/01 00:00:00,1,a\n2020-01-01 25:00:00,1,a\n')
+        self.assertEqual(report['InvalidRows'], 2)
+        self.assertEqual([sample['Line'] for sample in report['Columns']['timestamp']['Samples']], [1, 2])
+
+    def test_empty_item_id(self):
+        report = validate('2020-01-01 00:00:00,1,\n')
+        self.assertEqual(report['Columns']['item_id']['Errors'], 1)
+
+    def test_malformed_rows(self):
+        report = validate('2020-01-01 00:00:00,1\n2020-01-01 00:00:00,1,a,extra\n')
+        self.assertEqual(report['InvalidRows'], 2)
+        self.assertEqual(report['MalformedRows']['Errors'], 2)
+
+    def test_samples_are_capped(self):
+        report = validate('2020-01-01 00:00:00,x,a\n' * (MAX_SAMPLES + 3))
+        self.assertEqual(report['Columns']['target_value']['Errors'], MAX_SAMPLES + 3)
+        self.assertEqual(len(report['Columns']['target_value']['Samples']), MAX_SAMPLES)
+
+
+class ValidateFileTest(unittest.TestCase):
+
+    def test_file_in_small_chunks(self):
+        with tempfile.TemporaryDirectory() as root:
+            storage = LocalStorage(root)
+            storage.put_bytes('source/target.csv', b'2020-01-01 00:00:00,1,a\n2020-01-01 01:00:00,x,a\n')
+            report = validate_file(storage, 'source/target.csv', DATASET, TIMESTAMP_FORMAT, chunk_size=7)
+        self.assertEqual(report['Key'], 'source/target.csv')
+        self.assertEqual((report['Rows'], report['InvalidRows']), (2, 1))
+
+
+if __name__ == '__main__':
+    unittest.main()
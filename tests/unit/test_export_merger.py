@@ -0,0 +1,116 @@
+import io
+import os
+import csv
+import tempfile
+import unittest
+
+from export_merger import key_columns, sort_runs, reduce_runs, merge_runs, merge_export  # pylint: disable=import-error
+from storage import LocalStorage  # pylint: disable=import-error
+
+HEADER = 'item_id,date,p10,p50,p90'
+PARTS = {
+    'export/run_part0.csv': HEADER + '\nb,2020-01-02,1,2,3\na,2020-01-02,1,2,3\nc,2020-01-01,1,2,3\n',
+    'export/run_part1.csv': HEADER + '\na,2020-01-01,1,2,3\nb,2020-01-01,1,2,3\na,2020-01-02,9,9,9\n',
+    'export/run_part2.csv': HEADER + '\nc,2020-01-02,1,2,3\nbroken\n',
+}
+EXPECTED = [
+    ['a', '2020-01-01'], ['a', '2020-01-02'], ['b', '2020-01-01'], ['b', '2020-01-02'],
+    ['c', '2020-01-01'], ['c', '2020-01-02'],
+]
+
+
+def put_parts(storage):
+    for key, text in PARTS.items():
+        storage.put_bytes(key, text.encode('utf-8'))
+    return sorted(PARTS)
+
+
+class KeyColumnsTest(unittest.TestCase):
+
+    def test_dimensions_before_date(self):
+        self.assertEqual(key_columns(['date', 'location', 'p50', 'item_id', 'mean']), [3, 1, 0])
+
+
+class MergeRunsTest(unittest.TestCase):
+
+    def merge(self, max_fan_in):
+        with tempfile.TemporaryDirectory() as root, tempfile.TemporaryDirectory() as directory:
+            storage = LocalStorage(root)
+            header, runs = sort_runs(storage, put_parts(storage), directory, rows_per_run=1)
+            dst = io.BytesIO()
+            index = io.BytesIO()
+            stats = merge_runs(header, runs, dst, index, max_fan_in=max_fan_in)
+            files = os.listdir(directory)
+        return len(runs), stats, dst.getvalue().decode('utf-8'), index.getvalue().decode('utf-8'), files
+
+    def test_merge(self):
+        runs, stats, text, index, _ = self.merge(max_fan_in=64)
+        rows = list(csv.reader(io.StringIO(text)))
+        self.assertEqual(runs, 7)
+        self.assertEqual(rows[0], HEADER.split(','))
+        self.assertEqual([row[:2] for row in rows[1:]], EXPECTED)
+        self.assertEqual((stats['Rows'], stats['Duplicates'], stats['Items'], stats['Passes']), (6, 1, 3, 1))
+        self.assertEqual(stats['Bytes'], len(text.encode('utf-8')))
+        # Byte ranges of the index give the rows of each item
+        for item_id, offset, length in list(csv.reader(io.StringIO(index)))[1:]:
+            lines = text.encode('utf-8')[int(offset):int(offset) + int(length)].decode('utf-8').splitlines()
+            self.assertEqual({line.split(',')[0] for line in lines}, {item_id})
+            self.assertEqual(len(lines), 2)
+
+    def test_bounded_fan_in(self):
+        expected = self.merge(max_fan_in=64)[2:4]
+        for max_fan_in in (2, 3):
+            _, stats, text, index, files = self.merge(max_fan_in=max_fan_in)
+            self.assertEqual((text, index), expected)
+            self.assertGreater(stats['Passes'], 1)
+            self.assertLessEqual(len(files), max_fan_in)
+            self.assertEqual(stats['Duplicates'], 1)
+
+    def test_reduce_runs(self):
+        with tempfile.TemporaryDirectory() as directory:
+            runs = []
+            for i in range(5):
+                runs.append(os.path.join(directory, 'run_{}.csv'.format(i)))
+                with open(runs[-1], 'w') as f:
+                    f.write('a,2020-01-0{},{}\n'.format(i + 1, i))
+            reduced, passes = reduce_runs(['item_id', 'date', 'p50'], runs, max_fan_in=2)
+            self.assertEqual((len(reduced), passes), (2, 2))
+            self.assertEqual(sorted(os.listdir(directory)), sorted(os.path.basename(run) for run in reduced))
+            rows = [row for run in reduced for row in csv.reader(open(run))]
+        self.assertEqual(sorted(row[2] for row in rows), ['0', '1', '2', '3', '4'])
+        with self.assertRaises(Exception):
+            reduce_runs(['item_id', 'date'], [], max_fan_in=1)
+
+
+class MergeExportTest(unittest.TestCase):
+
+    def test_merge_export(self):
+        with tempfile.TemporaryDirectory() as root:
+            storage = LocalStorage(root)
+            stats = merge_export(storage, put_parts(storage), 'merged/run.csv', 'merged/run.index.csv')
+            text = storage.get_bytes('merged/run.csv').decode('utf-8')
+            index = storage.get_bytes('merged/run.index.csv').decode('utf-8')
+        self.assertEqual(stats['Header'], HEADER.split(','))
+        self.assertEqual(stats['Runs'], 3)
+        self.assertEqual([line.split(',')[:2] for line in text.splitlines()[1:]], EXPECTED)
+        self.assertEqual(index.splitlines()[0], 'item_id,offset,length')
+
+    def test_different_columns(self):
+        with tempfile.TemporaryDirectory() as root:
+            storage = LocalStorage(root)
+            storage.put_bytes('export/a.csv', b'item_id,date,p50\na,2020-01-01,1\n')
+            storage.put_bytes('export/b.csv', b'item_id,date,p90\na,2020-01-01,1\n')
+            with self.assertRaises(Exception):
+                merge_export(storage, ['export/a.csv', 'export/b.csv'], 'merged/run.csv')
+            self.assertIsNone(storage.stat('merged/run.csv'))
+
+    def test_empty_parts(self):
+        with tempfile.TemporaryDirectory() as root:
+            storage = LocalStorage(root)
+            storage.put_bytes('export/a.csv', b'')
+            with self.assertRaises(Exception):
+                merge_export(storage, ['export/a.csv'], 'merged/run.csv')
+
+
+if __name__ == '__main__':
+    unittest.main()
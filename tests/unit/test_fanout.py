@@ -0,0 +1,52 @@
+import threading
+import unittest
+
+from fanout import Fanout  # pylint: disable=import-error
+
+
+class Describe:
+    """
+    describe function recording its calls.
+    """
+
+    def __init__(self):
+        self.calls = []
+        self.lock = threading.Lock()
+
+    def __call__(self, key):
+        with self.lock:
+            self.calls.append(key)
+        return {'Arn': key}
+
+
+class FanoutTest(unittest.TestCase):
+
+    def test_results_in_order_of_keys(self):
+        describe = Describe()
+        keys = ['arn_{}'.format(i) for i in range(20)]
+        self.assertEqual(Fanout(max_workers=4).map(describe, keys), [{'Arn': key} for key in keys])
+        self.assertEqual(sorted(describe.calls), sorted(keys))
+
+    def test_each_key_described_once(self):
+        describe = Describe()
+        fanout = Fanout()
+        self.assertEqual(fanout.map(describe, ['a', 'b', 'a']), [{'Arn': 'a'}, {'Arn': 'b'}, {'Arn': 'a'}])
+        self.assertEqual(fanout.map(describe, ['b', 'c']), [{'Arn': 'b'}, {'Arn': 'c'}])
+        self.assertEqual(sorted(describe.calls), ['a', 'b', 'c'])
+
+    def test_memoized_per_describe(self):
+        first, second = Describe(), Describe()
+        fanout = Fanout()
+        fanout.map(first, ['a'])
+        fanout.map(second, ['a'])
+        self.assertEqual(first.calls, ['a'])
+        self.assertEqual(second.calls, ['a'])
+
+    def test_no_keys(self):
+        describe = Describe()
+        self.assertEqual(Fanout().map(describe, []), [])
+        self.assertEqual(describe.calls, [])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,79 @@
+import tempfile
+import unittest
+from unittest import mock
+
+from forecast_diff import ForecastDiff, diff_exports, value_columns  # pylint: disable=import-error
+from storage import LocalStorage  # pylint: disable=import-error
+
+HEADER = ['item_id', 'date', 'p10', 'p50']
+PREVIOUS = 'item_id,date,p10,p50\na,2020-01-01,1,10\na,2020-01-02,1,10\nb,2020-01-01,1,0\nc,2020-01-01,1,5\n'
+# a moves by 50%, b from 0 (no relative change), c is dropped and d is new. a,2020-01-03 is a new row.
+CURRENT = 'item_id,date,p10,p50\na,2020-01-01,1,15\na,2020-01-02,1,15\na,2020-01-03,1,15\nb,2020-01-01,1,2\n' \
+    'd,2020-01-01,1,1\n'
+
+
+def rows(text):
+    return [line.split(',') for line in text.splitlines()[1:]]
+
+
+class ForecastDiffTest(unittest.TestCase):
+
+    def test_value_columns(self):
+        self.assertEqual(value_columns(['item_id', 'date', 'p10', 'p50', 'p90', 'mean', 'location']),
+                         ['p10', 'p50', 'p90', 'mean'])
+
+    def test_diff(self):
+        diff = ForecastDiff(HEADER, HEADER)
+        diff.add(rows(PREVIOUS), rows(CURRENT))
+        report = diff.to_dict()
+        self.assertEqual((report['MatchedRows'], report['NewRows'], report['DroppedRows']), (3, 2, 1))
+        self.assertEqual((report['MatchedItems'], report['NewItems'], report['DroppedItems']), (2, 1, 1))
+        p10, p50 = report['Columns']
+        self.assertEqual((p10['Column'], p10['MeanAbsoluteChange'], p10['RelativeChange']), ('p10', 0.0, 0.0))
+        self.assertEqual(p50['MaxAbsoluteChange'], 5.0)
+        self.assertAlmostEqual(p50['MeanAbsoluteChange'], 4.0)
+        self.assertAlmostEqual(p50['RelativeChange'], 12 / 20)
+        # Upper edges are exclusive
+        self.assertEqual(p50['RowHistogram']['0.5-1'], 2)
+        self.assertEqual(report['TopMovers']['Column'], 'p50')
+        self.assertEqual(report['TopMovers']['Items'], [
+            {'ItemId': 'a', 'RelativeChange': 0.5, 'MeanAbsoluteChange': 5.0}])
+
+    def test_top_movers_are_capped(self):
+        previous = [['item{}'.format(i), '2020-01-01', '1', '10'] for i in range(5)]
+        current = [['item{}'.format(i), '2020-01-01', '1', str(10 + i)] for i in range(5)]
+        diff = ForecastDiff(HEADER, HEADER, top_movers=2)
+        diff.add(previous[:3], current[:3])
+        diff.add(previous[3:], current[3:])
+        self.assertEqual([item['ItemId'] for item in diff.to_dict()['TopMovers']['Items']], ['item4', 'item3'])
+
+    def test_bad_values_are_not_counted(self):
+        diff = ForecastDiff(HEADER, HEADER)
+        diff.add([['a', '2020-01-01', '1', 'x']], [['a', '2020-01-01', '1', '2'], ['broken']])
+        report = diff.to_dict()
+        self.assertEqual(report['Columns'][1], {'Column': 'p50', 'Rows': 0})
+        self.assertEqual(report['MatchedRows'], 1)
+
+    def test_different_keys(self):
+        with self.assertRaises(Exception):
+            ForecastDiff(HEADER, ['item_id', 'location', 'date', 'p50'])
+
+
+class DiffExportsTest(unittest.TestCase):
+
+    def test_partitions_give_the_same_report(self):
+        reports = []
+        for partitions in (1, 3):
+            with tempfile.TemporaryDirectory() as root, \
+                    mock.patch('forecast_diff.partition_count', return_value=partitions):
+                storage = LocalStorage(root)
+                storage.put_bytes('merged/previous.csv', PREVIOUS.encode('utf-8'))
+                storage.put_bytes('merged/current.csv', CURRENT.encode('utf-8'))
+                reports.append(diff_exports(storage, 'merged/previous.csv', 'merged/current.csv'))
+        self.assertEqual([report.pop('Partitions') for report in reports], [1, 3])
+        self.assertEqual(reports[0], reports[1])
+        self.assertEqual(reports[0]['CurrentKey'], 'merged/current.csv')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,48 @@
+import json
+import tempfile
+import unittest
+
+from export_merger import merge_export  # pylint: disable=import-error
+from forecast_index import ForecastIndex  # pylint: disable=import-error
+from storage import LocalStorage  # pylint: disable=import-error
+
+PART = 'item_id,date,p50\nb,2020-01-01,2\na,2020-01-02,1.5\na,2020-01-01,1\nc,2020-01-01,"3"\n'
+
+
+def put_export(storage, index=True):
+    storage.put_bytes('export/run_part0.csv', PART.encode('utf-8'))
+    stats = merge_export(storage, ['export/run_part0.csv'], 'merged/run.csv',
+                         'merged/run.index.csv' if index else None)
+    manifest = dict(stats, Key='merged/run.csv')
+    if index:
+        manifest['IndexKey'] = 'merged/run.index.csv'
+    storage.put_bytes('merged/run.manifest.json', json.dumps(manifest).encode('utf-8'))
+    storage.put_bytes('merged/latest.json', json.dumps({'ManifestKey': 'merged/run.manifest.json'}).encode('utf-8'))
+
+
+class ForecastIndexTest(unittest.TestCase):
+
+    def test_lookup(self):
+        with tempfile.TemporaryDirectory() as root:
+            storage = LocalStorage(root)
+            put_export(storage)
+            index = ForecastIndex.latest(storage)
+            self.assertEqual(len(index), 3)
+            self.assertIn('a', index)
+            self.assertEqual(index.lookup('a'), [
+                {'item_id': 'a', 'date': '2020-01-01', 'p50': '1'},
+                {'item_id': 'a', 'date': '2020-01-02', 'p50': '1.5'},
+            ])
+            self.assertEqual(index.lookup('c'), [{'item_id': 'c', 'date': '2020-01-01', 'p50': '3'}])
+            self.assertEqual(index.lookup('z'), [])
+
+    def test_manifest_without_index(self):
+        with tempfile.TemporaryDirectory() as root:
+            storage = LocalStorage(root)
+            put_export(storage, index=False)
+            with self.assertRaises(Exception):
+                ForecastIndex.latest(storage)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,159 @@
+import unittest
+
+from garbage_collector import (  # pylint: disable=import-error
+    GarbageCollector, LevelPending, DELETED, DELETING, SKIPPED, DEADLINE_MARGIN)
+from inventory import deletion_levels  # pylint: disable=import-error
+
+PREDICTOR = 'arn:aws:forecast:us-east-1:0:predictor/p'
+IMPORT_JOB = 'arn:aws:forecast:us-east-1:0:dataset-import-job/d/j'
+DATASET = 'arn:aws:forecast:us-east-1:0:dataset/d'
+
+
+class ResourceNotFoundException(Exception):
+    pass
+
+
+class ResourceInUseException(Exception):
+    pass
+
+
+class FakeForecastClient:
+    """
+    Resources stay DELETE_PENDING after delete is called, until a test removes them.
+    """
+
+    class exceptions:  # pylint: disable=invalid-name
+        pass
+
+    exceptions.ResourceNotFoundException = ResourceNotFoundException
+    exceptions.ResourceInUseException = ResourceInUseException
+
+    def __init__(self, statuses):
+        self.statuses = dict(statuses)
+        self.calls = []
+
+    def _describe(self, arn):
+        self.calls.append(('describe', arn))
+        status = self.statuses.get(arn)
+        if status is None:
+            raise ResourceNotFoundException(arn)
+        return {'Status': status}
+
+    def _delete(self, arn):
+        self.calls.append(('delete', arn))
+        self.statuses[arn] = 'DELETE_PENDING'
+
+    def __getattr__(self, name):
+        if name.startswith('describe_'):
+            return lambda **kwargs: self._describe(*kwargs.values())
+        if name.startswith('delete_'):
+            return lambda **kwargs: self._delete(*kwargs.values())
+        raise AttributeError(name)
+
+
+class NoLimit:
+    def acquire(self):
+        pass
+
+
+class Context:
+    """
+    Lambda context running out of time after `calls` calls of the client.
+    """
+
+    def __init__(self, client, calls):
+        self.client = client
+        self.calls = calls
+
+    def get_remaining_time_in_millis(self):
+        return (DEADLINE_MARGIN + 1) * 1000 if len(self.client.calls) < self.calls else 0
+
+
+class DeletionLevelsTest(unittest.TestCase):
+
+    def test_predictors_before_dataset_import_jobs(self):
+        levels = deletion_levels()
+        position = {resource_type: i for i, level in enumerate(levels) for resource_type in level}
+        self.assertLess(position['Predictors'], position['DatasetImportJobs'])
+        self.assertLess(position['DatasetImportJobs'], position['Datasets'])
+        self.assertLess(position['Forecasts'], position['Predictors'])
+
+    def test_cycle(self):
+        with self.assertRaises(Exception):
+            deletion_levels({'A': ['B'], 'B': ['A']})
+
+
+class GarbageCollectorTest(unittest.TestCase):
+
+    def test_run_does_not_wait(self):
+        client = FakeForecastClient({PREDICTOR: 'ACTIVE', IMPORT_JOB: 'ACTIVE', DATASET: 'ACTIVE'})
+        plan = {'Predictors': [PREDICTOR], 'DatasetImportJobs': [IMPORT_JOB], 'Datasets': [DATASET]}
+        collector = GarbageCollector(client, plan, limiter=NoLimit())
+        completed = []
+        runs = 0
+        while True:
+            runs += 1
+            try:
+                states = collector.run(completed[-1] if completed else 0, lambda levels, _: completed.append(levels))
+                break
+            except LevelPending as e:
+                # Each run issues the deletions of one level and returns
+                self.assertEqual(len(e.resources), 1)
+                # The watcher resumes the collector once the resources are deleted
+                for arn in e.resources:
+                    del client.statuses[arn]
+        self.assertEqual(runs, 4)
+        # Pending levels are saved as well as complete ones
+        self.assertEqual(sorted(set(completed)), [1, 2, 3, 4, 5])
+        self.assertEqual(set(states.values()), {DELETED})
+        deletions = [arn for call, arn in client.calls if call == 'delete']
+        self.assertEqual(deletions, [PREDICTOR, IMPORT_JOB, DATASET])
+
+    def test_states(self):
+        client = FakeForecastClient({PREDICTOR: 'CREATE_IN_PROGRESS', IMPORT_JOB: 'ACTIVE'})
+        collector = GarbageCollector(client, {}, limiter=NoLimit())
+        states = collector.collect_level([('Predictors', PREDICTOR), ('DatasetImportJobs', IMPORT_JOB),
+                                          ('Datasets', DATASET)])
+        self.assertEqual(states, {('Predictors', PREDICTOR): SKIPPED, ('DatasetImportJobs', IMPORT_JOB): DELETING,
+                                  ('Datasets', DATASET): DELETED})
+
+    def test_run_stops_before_deadline(self):
+        jobs = ['{}/{}'.format(IMPORT_JOB, i) for i in range(10)]
+        client = FakeForecastClient({arn: 'ACTIVE' for arn in jobs})
+        progress = {'CompletedLevels': 0, 'LevelStates': {}}
+
+        def save_progress(levels, level_states):
+            progress.update(CompletedLevels=levels, LevelStates=level_states)
+
+        # The first run describes and deletes 3 jobs (and describes one more) before it runs out of time
+        collector = GarbageCollector(client, {'DatasetImportJobs': jobs}, max_workers=1, limiter=NoLimit(),
+                                     context=Context(client, 7))
+        with self.assertRaises(LevelPending) as raised:
+            collector.run(progress['CompletedLevels'], save_progress, progress['LevelStates'])
+        self.assertEqual(raised.exception.resources, [])
+        level = progress['CompletedLevels']
+        self.assertEqual(sorted(progress['LevelStates'].values()).count(DELETING), 3)
+        self.assertEqual(len([call for call in client.calls if call[0] == 'delete']), 3)
+
+        # The next run processes the rest and checks the jobs being deleted last
+        client.calls.clear()
+        collector = GarbageCollector(client, {'DatasetImportJobs': jobs}, max_workers=1, limiter=NoLimit())
+        with self.assertRaises(LevelPending) as raised:
+            collector.run(progress['CompletedLevels'], save_progress, progress['LevelStates'])
+        self.assertEqual(sorted(raised.exception.resources), sorted(jobs))
+        self.assertEqual(progress['CompletedLevels'], level)
+        self.assertEqual([call for call in client.calls if call[0] == 'delete'][0][1], jobs[3])
+        self.assertEqual(client.calls[-3:], [('describe', arn) for arn in jobs[:3]])
+
+        # Once the jobs are deleted, the level is complete
+        for arn in jobs:
+            del client.statuses[arn]
+        client.calls.clear()
+        states = collector.run(progress['CompletedLevels'], save_progress, progress['LevelStates'])
+        self.assertEqual(set(states.values()), {DELETED})
+        self.assertEqual(progress['LevelStates'], {})
+        self.assertEqual(len(client.calls), len(jobs))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,68 @@
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from config import load_config  # pylint: disable=import-error
+from dataset_validator import validate_file  # pylint: disable=import-error
+from storage import LocalStorage  # pylint: disable=import-error
+import generate_dataset  # pylint: disable=import-error
+
+PARAMS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'functions', 'shared', 'python',
+                           'params.json')
+FILES = {
+    'TARGET_TIME_SERIES': 'target_time_series.csv',
+    'RELATED_TIME_SERIES': 'related_time_series.csv',
+    'ITEM_METADATA': 'item_metadata.csv',
+}
+
+
+def generate(root, **kwargs):
+    arguments = {'items': 5, 'length': 4, 'start': '2020-01-01 00:00:00', 'frequency': 'H', 'seed': 0}
+    arguments.update(kwargs)
+    generate_dataset.generate(root, **arguments)
+    return {dataset_type: open(os.path.join(root, name)).read() for dataset_type, name in FILES.items()}
+
+
+class GenerateTest(unittest.TestCase):
+
+    def test_files_are_valid(self):
+        config = load_config(PARAMS_PATH)
+        with tempfile.TemporaryDirectory() as root:
+            generate(root)
+            storage = LocalStorage(root)
+            for dataset_type, name in FILES.items():
+                report = validate_file(storage, name, config.dataset(dataset_type), config.timestamp_format)
+                self.assertEqual(report['InvalidRows'], 0, dataset_type)
+                self.assertEqual(report['Rows'], 5 if dataset_type == 'ITEM_METADATA' else 20)
+
+    def test_rows_of_an_item_are_consecutive(self):
+        with tempfile.TemporaryDirectory() as root:
+            lines = generate(root, items=2, length=3, frequency='D')['TARGET_TIME_SERIES'].splitlines()
+        self.assertEqual([line.split(',')[0] for line in lines[:3]],
+                         ['2020-01-01 00:00:00', '2020-01-02 00:00:00', '2020-01-03 00:00:00'])
+        self.assertEqual([line.split(',')[2] for line in lines], ['client_0'] * 3 + ['client_1'] * 3)
+
+    def test_output_only_depends_on_arguments(self):
+        with tempfile.TemporaryDirectory() as root:
+            first = generate(root)
+        with tempfile.TemporaryDirectory() as root:
+            second = generate(root)
+        self.assertEqual(first, second)
+
+    def test_items_span_blocks(self):
+        with tempfile.TemporaryDirectory() as root, mock.patch('generate_dataset.BLOCK_ROWS', 8):
+            files = generate(root)
+        self.assertEqual(len(files['TARGET_TIME_SERIES'].splitlines()), 20)
+        self.assertEqual(len(files['ITEM_METADATA'].splitlines()), 5)
+
+    def test_seed(self):
+        with tempfile.TemporaryDirectory() as root:
+            first = generate(root, seed=1)
+        with tempfile.TemporaryDirectory() as root:
+            second = generate(root, seed=2)
+        self.assertNotEqual(first['TARGET_TIME_SERIES'], second['TARGET_TIME_SERIES'])
+
+
+if __name__ == '__main__':
+    unittest.main()
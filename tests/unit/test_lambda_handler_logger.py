@@ -0,0 +1,157 @@
+import logging
+import unittest
+
+from lambda_handler_logger import (  # pylint: disable=import-error
+    redact_environ, truncate, LogFilter, REDACTED, COMPACT, FULL, MAX_STRING_LENGTH, MAX_ITEMS, MAX_DEPTH,
+    SAMPLE_FIRST, SAMPLE_EVERY)
+
+REDACTED_NAMES = ['AWS_SESSION_TOKEN', 'AWS_SECRET_ACCESS_KEY', 'DB_PASSWORD', 'SECRET', 'API_KEY', 'KEY_ID',
+                  'GITHUB_TOKEN_FILE', 'SERVICE_CREDENTIALS', 'APP_SECRETS']
+KEPT_NAMES = ['MAX_OUTPUT_TOKENS', 'LLM_MAX_INPUT_TOKENS', 'MONKEY', 'KEYBOARD_LAYOUT', 'TOKENIZER', 'STACK_NAME',
+              'SECRETARY']
+
+
+class RedactEnvironTest(unittest.TestCase):
+
+    def test_redacted(self):
+        redacted = redact_environ({name: 'value' for name in REDACTED_NAMES}, FULL)
+        self.assertEqual(redacted, {name: REDACTED for name in REDACTED_NAMES})
+
+    def test_kept(self):
+        variables = {name: 'value' for name in KEPT_NAMES}
+        self.assertEqual(redact_environ(variables, FULL), variables)
+
+    def test_runtime_variables_are_left_out_in_compact_mode(self):
+        variables = {'AWS_REGION': 'us-east-1', '_HANDLER': 'app.lambda_handler', 'STACK_NAME': 'stack'}
+        self.assertEqual(redact_environ(variables, COMPACT), {'STACK_NAME': 'stack'})
+        self.assertEqual(redact_environ(variables, FULL), variables)
+
+
+def nested(depth):
+    value = 'leaf'
+    for _ in range(depth):
+        value = {'child': value}
+    return value
+
+
+class TruncateTest(unittest.TestCase):
+
+    def test_long_string(self):
+        self.assertEqual(truncate('a' * MAX_STRING_LENGTH), 'a' * MAX_STRING_LENGTH)
+        self.assertEqual(truncate('a' * (MAX_STRING_LENGTH + 5)),
+                         '{}...({} characters)'.format('a' * MAX_STRING_LENGTH, MAX_STRING_LENGTH + 5))
+
+    def test_many_items(self):
+        self.assertEqual(truncate(list(range(MAX_ITEMS))), list(range(MAX_ITEMS)))
+        self.assertEqual(truncate(list(range(MAX_ITEMS + 3))), list(range(MAX_ITEMS)) + ['...3 more items'])
+
+        truncated = truncate({'key_{}'.format(i): i for i in range(MAX_ITEMS + 3)})
+        self.assertEqual(len(truncated), MAX_ITEMS + 1)
+        self.assertEqual(truncated['...'], '3 more keys')
+
+    def test_deep_value(self):
+        self.assertEqual(truncate(nested(MAX_DEPTH)), nested(MAX_DEPTH))
+        truncated = truncate(nested(MAX_DEPTH + 1))
+        for _ in range(MAX_DEPTH):
+            truncated = truncated['child']
+        self.assertEqual(truncated, '{...1 keys}')
+        self.assertEqual(truncate([nested(MAX_DEPTH - 1)] + [[1, 2]]), [nested(MAX_DEPTH - 1), [1, 2]])
+
+    def test_response_metadata_is_dropped(self):
+        self.assertEqual(truncate({'Status': 'ACTIVE', 'ResponseMetadata': {'HTTPStatusCode': 200}}),
+                         {'Status': 'ACTIVE'})
+
+    def test_input_is_not_modified(self):
+        value = {'items': list(range(MAX_ITEMS + 1))}
+        truncate(value)
+        self.assertEqual(value, {'items': list(range(MAX_ITEMS + 1))})
+
+
+class Records(logging.Handler):
+    """
+    Handler keeping the emitted records.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.records = []
+
+    def emit(self, record):
+        self.records.append(record)
+
+
+class LogFilterTest(unittest.TestCase):
+
+    def setUp(self):
+        self.logger = logging.getLogger('test_lambda_handler_logger')
+        self.logger.setLevel(logging.INFO)
+        self.logger.propagate = False
+        self.handler = Records()
+        self.logger.addHandler(self.handler)
+        self.log_filter = LogFilter(COMPACT)
+        self.logger.addFilter(self.log_filter)
+
+    def tearDown(self):
+        self.logger.removeHandler(self.handler)
+        self.logger.removeFilter(self.log_filter)
+
+    def logged_invocations(self, log_filter, count, repeated_by='trace'):
+        logged = []
+        for _ in range(count):
+            invocation = log_filter.start_invocation('lambda', repeated_by)
+            if not log_filter.muted:
+                logged.append(invocation)
+        return logged
+
+    def test_repeated_invocations_are_sampled(self):
+        count = SAMPLE_FIRST + 2 * SAMPLE_EVERY
+        self.assertEqual(self.logged_invocations(self.log_filter, count),
+                         list(range(1, SAMPLE_FIRST + 1)) + [SAMPLE_FIRST + SAMPLE_EVERY, count])
+        # Invocations repeated by another trace id are counted on their own.
+        self.assertEqual(self.logged_invocations(self.log_filter, SAMPLE_FIRST, 'other'),
+                         list(range(1, SAMPLE_FIRST + 1)))
+
+    def test_invocations_which_do_not_repeat_are_logged(self):
+        self.logged_invocations(self.log_filter, SAMPLE_FIRST + 1)
+        self.assertTrue(self.log_filter.muted)
+        self.assertEqual(self.log_filter.start_invocation('lambda', None), 1)
+        self.assertFalse(self.log_filter.muted)
+
+    def test_full_mode_is_not_sampled(self):
+        count = SAMPLE_FIRST + SAMPLE_EVERY
+        self.assertEqual(self.logged_invocations(LogFilter(FULL), count), list(range(1, count + 1)))
+
+    def test_warnings_are_never_muted(self):
+        self.logged_invocations(self.log_filter, SAMPLE_FIRST + 1)
+        self.assertTrue(self.log_filter.muted)
+        self.logger.info({'message': 'info'})
+        self.logger.warning({'message': 'warning'})
+        self.logger.error({'message': 'error'})
+        self.assertEqual([record.msg['message'] for record in self.handler.records], ['warning', 'error'])
+
+    def test_messages_are_truncated(self):
+        self.logger.info({'message': 'info', 'items': list(range(MAX_ITEMS + 1))})
+        self.assertEqual(self.handler.records[0].msg['items'], list(range(MAX_ITEMS)) + ['...1 more items'])
+
+    def test_callables_are_evaluated_only_when_emitted(self):
+        calls = []
+
+        def value():
+            calls.append(1)
+            return 'a' * (MAX_STRING_LENGTH + 1)
+
+        self.logger.debug({'message': 'debug', 'value': value})
+        self.logged_invocations(self.log_filter, SAMPLE_FIRST + 1)
+        self.logger.info({'message': 'muted', 'value': value})
+        self.assertEqual(calls, [])
+        self.assertEqual(self.handler.records, [])
+
+        self.log_filter.start_invocation('lambda', None)
+        self.logger.info({'message': 'emitted', 'value': value})
+        self.assertEqual(calls, [1])
+        self.assertEqual(self.handler.records[0].msg['value'],
+                         '{}...({} characters)'.format('a' * MAX_STRING_LENGTH, MAX_STRING_LENGTH + 1))
+
+
+if __name__ == '__main__':
+    unittest.main()
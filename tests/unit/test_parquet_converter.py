@@ -0,0 +1,67 @@
+import tempfile
+import datetime
+import unittest
+
+import pyarrow as pa
+from pyarrow import parquet
+from parquet_converter import convert_file, arrow_schema  # pylint: disable=import-error
+from storage import LocalStorage  # pylint: disable=import-error
+
+DATASET = {
+    'DatasetType': 'TARGET_TIME_SERIES',
+    'Schema': {'Attributes': [
+        {'AttributeName': 'timestamp', 'AttributeType': 'timestamp'},
+        {'AttributeName': 'target_value', 'AttributeType': 'float'},
+        {'AttributeName': 'item_id', 'AttributeType': 'string'},
+    ]}
+}
+TIMESTAMP_FORMAT = 'yyyy-MM-dd HH:mm:ss'
+
+
+class ConvertFileTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.storage = LocalStorage(self.directory.name)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def convert(self, text, block_size=1024):
+        self.storage.put_bytes('source/target.csv', text.encode('utf-8'))
+        return convert_file(self.storage, 'source/target.csv', 'pipeline/staged/target.parquet', DATASET,
+                            TIMESTAMP_FORMAT, block_size=block_size)
+
+    def read(self):
+        return parquet.read_table(self.storage.path('pipeline/staged/target.parquet'))
+
+    def test_schema(self):
+        self.assertEqual(arrow_schema(DATASET).types, [pa.timestamp('s'), pa.float64(), pa.string()])
+
+    def test_typed_rows(self):
+        result = self.convert('2020-01-01 00:00:00,1.5,a\n2020-01-01 01:00:00,,b\n')
+        self.assertEqual(result['Rows'], 2)
+        self.assertGreater(result['ParquetBytes'], 0)
+        table = self.read()
+        # Parquet has no second unit, so timestamps are read back in milliseconds
+        self.assertEqual(table.schema.names, ['timestamp', 'target_value', 'item_id'])
+        self.assertEqual(table.column('timestamp').to_pylist()[1], datetime.datetime(2020, 1, 1, 1))
+        self.assertEqual(table.column('target_value').to_pylist(), [1.5, None])
+        self.assertEqual(table.column('item_id').to_pylist(), ['a', 'b'])
+
+    def test_many_blocks(self):
+        lines = ''.join('2020-01-01 {:02d}:00:00,{},item_{}\n'.format(hour % 24, hour, hour) for hour in range(200))
+        self.assertEqual(self.convert(lines, block_size=256)['Rows'], 200)
+        self.assertEqual(self.read().num_rows, 200)
+
+    def test_bad_number(self):
+        with self.assertRaises(pa.ArrowInvalid):
+            self.convert('2020-01-01 00:00:00,abc,a\n')
+
+    def test_bad_timestamp(self):
+        with self.assertRaises(pa.ArrowInvalid):
+            self.convert('2020/01/01 00:00,1,a\n')
+
+
+if __name__ == '__main__':
+    unittest.main()
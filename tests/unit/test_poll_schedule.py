@@ -0,0 +1,110 @@
+import os
+import datetime
+import tempfile
+import unittest
+from unittest import mock
+
+from poll_schedule import DurationHistory, duration, dataset_size, estimate_duration, next_check_at, \
+    MIN_INTERVAL, MAX_INTERVAL, MAX_SAMPLES  # pylint: disable=import-error
+from storage import LocalStorage  # pylint: disable=import-error
+import watch_schedule  # pylint: disable=import-error
+
+NOW = 1000000.0
+
+
+class NextCheckAtTest(unittest.TestCase):
+
+    def test_cold_start_backs_off_with_elapsed_time(self):
+        self.assertEqual(next_check_at(NOW - 60, NOW), NOW + MIN_INTERVAL)
+        self.assertEqual(next_check_at(NOW - 1200, NOW), NOW + 300)
+        self.assertEqual(next_check_at(NOW - 10 * 3600, NOW), NOW + MAX_INTERVAL)
+
+    def test_first_check_before_estimate(self):
+        # 90% of the estimated 1000 seconds have not passed yet
+        self.assertEqual(next_check_at(NOW - 100, NOW, estimate=1000), NOW + 800)
+
+    def test_overrun_backs_off(self):
+        self.assertEqual(next_check_at(NOW - 2900, NOW, estimate=1000), NOW + 500)
+
+    def test_clamp(self):
+        self.assertEqual(next_check_at(NOW - 880, NOW, estimate=1000), NOW + MIN_INTERVAL)
+        self.assertEqual(next_check_at(NOW, NOW, estimate=10 * 3600), NOW + MAX_INTERVAL)
+        self.assertEqual(next_check_at(NOW, NOW, estimate=1000, min_interval=10, max_interval=20), NOW + 20)
+
+
+class EstimateDurationTest(unittest.TestCase):
+
+    def test_scaled_by_size(self):
+        samples = [{'Seconds': 100, 'Size': 10}, {'Seconds': 300, 'Size': 10}, {'Seconds': 200, 'Size': 100}]
+        # Median of 10, 30 and 2 seconds per byte
+        self.assertEqual(estimate_duration(samples, 50), 500)
+
+    def test_median_seconds_without_sizes(self):
+        samples = [{'Seconds': 100, 'Size': None}, {'Seconds': 300, 'Size': None}, {'Seconds': 200, 'Size': 10}]
+        self.assertEqual(estimate_duration(samples), 200)
+        self.assertEqual(estimate_duration(samples[:2], 50), 200)
+
+    def test_no_samples(self):
+        self.assertIsNone(estimate_duration([], 50))
+
+
+class DurationHistoryTest(unittest.TestCase):
+
+    def test_record(self):
+        history = DurationHistory()
+        self.assertTrue(history.record('Predictors', 'arn-0', 10.0, 5))
+        self.assertFalse(history.record('Predictors', 'arn-0', 20.0, 5))
+        for i in range(1, MAX_SAMPLES + 5):
+            history.record('Predictors', 'arn-{}'.format(i), 10.0, 5)
+        samples = history.samples('Predictors')
+        self.assertEqual(len(samples), MAX_SAMPLES)
+        self.assertEqual(samples[-1]['Arn'], 'arn-{}'.format(MAX_SAMPLES + 4))
+        self.assertEqual(history.samples('Forecasts'), [])
+
+    def test_load_and_save(self):
+        with tempfile.TemporaryDirectory() as root:
+            storage = LocalStorage(root)
+            history = DurationHistory.load(storage, 'pipeline/history/durations.json')
+            self.assertEqual(history.data, {})
+            history.record('Forecasts', 'arn', 60.0, 100)
+            self.assertTrue(history.changed)
+            history.save(storage, 'pipeline/history/durations.json')
+            self.assertFalse(history.changed)
+            loaded = DurationHistory.load(storage, 'pipeline/history/durations.json')
+        self.assertEqual(loaded.samples('Forecasts'), [{'Arn': 'arn', 'Seconds': 60.0, 'Size': 100}])
+
+    def test_duration(self):
+        created = datetime.datetime(2020, 1, 1, tzinfo=datetime.timezone.utc)
+        self.assertEqual(duration({'CreationTime': created,
+                                   'LastModificationTime': created + datetime.timedelta(minutes=5)}), 300)
+
+    def test_dataset_size(self):
+        with tempfile.TemporaryDirectory() as root, mock.patch.dict(os.environ, {'S3_SRC_FOLDER': 'source'}):
+            storage = LocalStorage(root)
+            storage.put_bytes('source/a.csv', b'12345')
+            storage.put_bytes('source/b.csv', b'123')
+            event = {'DatasetImportJobs': [{'Filename': 'a.csv'}, {'Filename': 'b.csv'}, {'Filename': 'c.csv'}]}
+            self.assertEqual(dataset_size(storage, event), 8)
+            self.assertIsNone(dataset_size(storage, {'DatasetImportJobs': [{'Filename': 'c.csv'}]}))
+
+
+class WatchScheduleTest(unittest.TestCase):
+
+    def test_rate_expression(self):
+        self.assertEqual(watch_schedule.rate_expression(0), 'rate(1 minute)')
+        self.assertEqual(watch_schedule.rate_expression(61), 'rate(2 minutes)')
+        self.assertEqual(watch_schedule.rate_expression(10 * 3600), 'rate(30 minutes)')
+
+    def test_schedule_and_stop(self):
+        events = mock.Mock()
+        with mock.patch.object(watch_schedule, 'events_client', events), \
+                mock.patch.dict(os.environ, {watch_schedule.RULE_NAME_VARIABLE: 'stack-WatchPendingResources'}):
+            self.assertEqual(watch_schedule.schedule_watcher(300), 'rate(5 minutes)')
+            watch_schedule.stop_watcher()
+        events.put_rule.assert_called_once_with(
+            Name='stack-WatchPendingResources', ScheduleExpression='rate(5 minutes)', State='ENABLED')
+        events.disable_rule.assert_called_once_with(Name='stack-WatchPendingResources')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,60 @@
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from predictor_registry import PredictorRegistry, registry_key  # pylint: disable=import-error
+from storage import LocalStorage  # pylint: disable=import-error
+
+PROJECT_NAME = 'project'
+PREDICTOR_ARN = 'arn:aws:forecast:us-east-1:123456789012:predictor/project_{}'
+DATASETS = [{
+    'DatasetType': 'TARGET_TIME_SERIES',
+    'DatasetArn': 'arn:aws:forecast:us-east-1:123456789012:dataset/project_target',
+    'DatasetName': 'project_target',
+    'Status': 'ACTIVE',
+    'Schema': {'Attributes': []}
+}]
+
+
+@mock.patch.dict(os.environ, {'S3_WORK_FOLDER': 'pipeline'})
+class PredictorRegistryTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.registry = PredictorRegistry(LocalStorage(self.directory.name))
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_nothing_recorded(self):
+        self.assertIsNone(self.registry.latest(PROJECT_NAME))
+
+    def test_record(self):
+        triggered_at = '2021_01_01_00_00_00'
+        self.assertTrue(self.registry.record(
+            PROJECT_NAME, PREDICTOR_ARN.format(triggered_at), triggered_at, DATASETS))
+        self.assertEqual(self.registry.latest(PROJECT_NAME), {
+            'PredictorArn': PREDICTOR_ARN.format(triggered_at),
+            'TriggeredAt': triggered_at,
+            'Datasets': [{
+                'DatasetType': 'TARGET_TIME_SERIES',
+                'DatasetArn': 'arn:aws:forecast:us-east-1:123456789012:dataset/project_target',
+                'DatasetName': 'project_target'
+            }]
+        })
+        self.assertEqual(registry_key(PROJECT_NAME), 'pipeline/registry/project/latest_predictor.json')
+        self.assertIsNone(self.registry.latest('other_project'))
+
+    def test_older_predictor_is_not_recorded(self):
+        newer, older = '2021_01_02_00_00_00', '2021_01_01_00_00_00'
+        self.registry.record(PROJECT_NAME, PREDICTOR_ARN.format(newer), newer, DATASETS)
+        self.assertFalse(self.registry.record(PROJECT_NAME, PREDICTOR_ARN.format(older), older, DATASETS))
+        self.assertEqual(self.registry.latest(PROJECT_NAME)['PredictorArn'], PREDICTOR_ARN.format(newer))
+
+        # A retry of the same execution records its predictor again.
+        self.assertTrue(self.registry.record(PROJECT_NAME, PREDICTOR_ARN.format(newer), newer, DATASETS))
+
+
+if __name__ == '__main__':
+    unittest.main()
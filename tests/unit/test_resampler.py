@@ -0,0 +1,137 @@
+import tempfile
+import unittest
+from unittest import mock
+
+import numpy as np
+from resampler import regularize_rows, regularize_file, horizon_end, series_end  # pylint: disable=import-error
+from storage import LocalStorage  # pylint: disable=import-error
+
+DATASET = {
+    'DatasetType': 'TARGET_TIME_SERIES',
+    'DataFrequency': 'H',
+    'Schema': {'Attributes': [
+        {'AttributeName': 'timestamp', 'AttributeType': 'timestamp'},
+        {'AttributeName': 'target_value', 'AttributeType': 'float'},
+        {'AttributeName': 'item_id', 'AttributeType': 'string'},
+    ]}
+}
+TIMESTAMP_FORMAT = 'yyyy-MM-dd HH:mm:ss'
+
+
+def regularize(lines, aggregation='sum', fill='nan', end=None, dataset=DATASET):
+    rows = [line.split(',') for line in lines]
+    output, last = regularize_rows(rows, dataset, TIMESTAMP_FORMAT, aggregation, fill, end)
+    return [list(row) for row in zip(*[list(column) for column in output])], last
+
+
+class RegularizeRowsTest(unittest.TestCase):
+
+    def test_gaps_are_filled_with_nan(self):
+        rows, last = regularize(['2020-01-01 00:00:00,1,a', '2020-01-01 02:00:00,3,a'])
+        self.assertEqual(rows, [
+            ['2020-01-01 00:00:00', '1.0', 'a'],
+            ['2020-01-01 01:00:00', '', 'a'],
+            ['2020-01-01 02:00:00', '3.0', 'a'],
+        ])
+        self.assertEqual(last, np.datetime64('2020-01-01T02:00:00'))
+
+    def test_gaps_are_filled_with_zero(self):
+        rows, _ = regularize(['2020-01-01 00:00:00,1,a', '2020-01-01 02:00:00,3,a'], fill='zero')
+        self.assertEqual([row[1] for row in rows], ['1.0', '0.0', '3.0'])
+
+    def test_forward_fill_stops_at_items(self):
+        rows, _ = regularize([
+            '2020-01-01 00:00:00,1,a', '2020-01-01 02:00:00,3,a',
+            '2020-01-01 00:00:00,,b', '2020-01-01 01:00:00,5,b',
+        ], fill='ffill')
+        self.assertEqual(rows, [
+            ['2020-01-01 00:00:00', '1.0', 'a'],
+            ['2020-01-01 01:00:00', '1.0', 'a'],
+            ['2020-01-01 02:00:00', '3.0', 'a'],
+            ['2020-01-01 00:00:00', '', 'b'],
+            ['2020-01-01 01:00:00', '5.0', 'b'],
+        ])
+
+    def test_duplicates_are_summed(self):
+        rows, _ = regularize(['2020-01-01 00:10:00,1,a', '2020-01-01 00:50:00,2,a', '2020-01-01 00:00:00,,a'])
+        self.assertEqual(rows, [['2020-01-01 00:00:00', '3.0', 'a']])
+
+    def test_duplicates_are_averaged(self):
+        rows, _ = regularize(['2020-01-01 00:10:00,1,a', '2020-01-01 00:50:00,2,a', '2020-01-01 00:00:00,,a'],
+                             aggregation='mean')
+        self.assertEqual(rows, [['2020-01-01 00:00:00', '1.5', 'a']])
+
+    def test_bad_values(self):
+        rows, _ = regularize(['2020-01-01 00:00:00,abc,a', '2020/01/01 01:00:00,1,a', '2020-01-01 01:00:00,2', ''])
+        self.assertEqual(rows, [['2020-01-01 00:00:00', '', 'a']])
+
+    def test_no_valid_rows(self):
+        rows, last = regularize(['2020/01/01 00:00:00,1,a'])
+        self.assertEqual((rows, last), ([], None))
+
+    def test_extended_to_end(self):
+        rows, _ = regularize(['2020-01-01 00:00:00,1,a'], fill='zero',
+                             end=np.datetime64('2020-01-01T02:00:00'))
+        self.assertEqual([row[0] for row in rows],
+                         ['2020-01-01 00:00:00', '2020-01-01 01:00:00', '2020-01-01 02:00:00'])
+
+    def test_integers_are_rounded(self):
+        dataset = {'DataFrequency': 'H', 'Schema': {'Attributes': [
+            {'AttributeName': 'item_id', 'AttributeType': 'string'},
+            {'AttributeName': 'timestamp', 'AttributeType': 'timestamp'},
+            {'AttributeName': 'demand', 'AttributeType': 'integer'},
+        ]}}
+        rows, _ = regularize(['a,2020-01-01 00:00:00,1', 'a,2020-01-01 00:30:00,2'],
+                             aggregation='mean', dataset=dataset)
+        self.assertEqual(rows, [['a', '2020-01-01 00:00:00', '2']])
+
+    def test_unsupported_settings(self):
+        with self.assertRaises(Exception):
+            regularize([], aggregation='max')
+        with self.assertRaises(Exception):
+            regularize([], fill='bfill')
+
+
+class RegularizeFileTest(unittest.TestCase):
+
+    def test_partitions_give_the_same_rows(self):
+        text = ''.join('2020-01-01 0{}:00:00,{},{}\n'.format(h, h, item)
+                       for item in 'abcdef' for h in (0, 3))
+        results = []
+        for partitions in (1, 3):
+            with tempfile.TemporaryDirectory() as root, \
+                    mock.patch('resampler.partition_count', return_value=partitions):
+                storage = LocalStorage(root)
+                storage.put_bytes('source/target.csv', text.encode('utf-8'))
+                result = regularize_file(storage, 'source/target.csv', 'work/target.csv', DATASET,
+                                         TIMESTAMP_FORMAT, 'sum', 'zero')
+                lines = storage.get_bytes('work/target.csv').decode('utf-8').splitlines()
+            results.append((result, sorted(lines)))
+        (single, single_lines), (partitioned, partitioned_lines) = results
+        self.assertEqual(single['Partitions'], 1)
+        self.assertEqual(partitioned['Partitions'], 3)
+        self.assertEqual(single_lines, partitioned_lines)
+        self.assertEqual((single['OutputRows'], single['End']), (24, '2020-01-01T03:00:00'))
+
+    def test_series_end_is_end_of_regularized_file(self):
+        text = '2020-01-01 05:30:00,1,a\n2020-01-01 00:00:00,2,b\nbad,3,a\n2020-01-01 02:00:00,4\n'
+        with tempfile.TemporaryDirectory() as root, mock.patch('resampler.ROWS_PER_WRITE', 2):
+            storage = LocalStorage(root)
+            storage.put_bytes('source/target.csv', text.encode('utf-8'))
+            result = regularize_file(storage, 'source/target.csv', 'work/target.csv', DATASET,
+                                     TIMESTAMP_FORMAT, 'sum', 'zero')
+            self.assertEqual(series_end(storage, 'source/target.csv', DATASET, TIMESTAMP_FORMAT), result['End'])
+            self.assertEqual(result['End'], '2020-01-01T05:00:00')
+
+            storage.put_bytes('source/empty.csv', b'bad,1,a\n')
+            self.assertIsNone(series_end(storage, 'source/empty.csv', DATASET, TIMESTAMP_FORMAT))
+
+
+class HorizonEndTest(unittest.TestCase):
+
+    def test_horizon_end(self):
+        self.assertEqual(horizon_end(np.datetime64('2020-01-01T05:00:00'), 'D', 2), np.datetime64('2020-01-03'))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,50 @@
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from staging import staging_key, delete_staged, expire_staged  # pylint: disable=import-error
+from storage import LocalStorage  # pylint: disable=import-error
+
+OLD_RUN = '2021_01_01_00_00_00'
+RUN = '2021_01_02_00_00_00'
+
+
+@mock.patch.dict(os.environ, {'S3_WORK_FOLDER': 'pipeline'})
+class StagingTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.storage = LocalStorage(self.directory.name)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def stage(self, triggered_at, name):
+        key = staging_key(triggered_at, name)
+        self.storage.put_bytes(key, b'2021-01-01 00:00:00,1,a\n')
+        return key
+
+    def test_delete_staged_of_a_run(self):
+        self.assertEqual(staging_key(RUN, 'TARGET_TIME_SERIES.csv'),
+                         'pipeline/staging/2021_01_02_00_00_00/TARGET_TIME_SERIES.csv')
+        keys = [self.stage(RUN, 'TARGET_TIME_SERIES.csv'), self.stage(RUN, 'TARGET_TIME_SERIES.parquet')]
+        other = self.stage(OLD_RUN, 'TARGET_TIME_SERIES.csv')
+
+        self.assertEqual(sorted(delete_staged(self.storage, RUN)), sorted(keys))
+        self.assertEqual(self.storage.list_keys('pipeline/'), [other])
+        self.assertEqual(delete_staged(self.storage, RUN), [])
+
+    def test_expire_staged(self):
+        old = self.stage(OLD_RUN, 'TARGET_TIME_SERIES.csv')
+        new = self.stage(RUN, 'TARGET_TIME_SERIES.csv')
+        os.utime(self.storage.path(old), (0, 0))
+        self.storage.put_bytes('pipeline/ledger/dataset_digests.json', b'{}')
+        os.utime(self.storage.path('pipeline/ledger/dataset_digests.json'), (0, 0))
+
+        self.assertEqual(expire_staged(self.storage), [old])
+        self.assertEqual(self.storage.list_keys('pipeline/'), ['pipeline/ledger/dataset_digests.json', new])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,161 @@
+import json
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from actions import ResourcePending  # pylint: disable=import-error
+from storage import LocalStorage  # pylint: disable=import-error
+from task_callback import (  # pylint: disable=import-error
+    task_callback, load_watches, watch_key, describe_resource, resource_type, MAX_CAUSE_LENGTH)
+
+TOKEN = 'token'
+EVENT = {'TriggeredAt': '2021_01_01_00_00_00'}
+PREDICTOR = 'arn:aws:forecast:us-east-1:123456789012:predictor/project_2021_01_01_00_00_00'
+IMPORT_JOB = 'arn:aws:forecast:us-east-1:123456789012:dataset-import-job/project_target/project_2021_01_01_00_00_00'
+
+
+class TaskTimedOut(Exception):
+    pass
+
+
+class InvalidToken(Exception):
+    pass
+
+
+class FakeStepFunctionsClient:
+    """
+    Records the results sent with task tokens. `error` is raised by every call when it is set.
+    """
+
+    class exceptions:  # pylint: disable=invalid-name
+        pass
+
+    exceptions.TaskTimedOut = TaskTimedOut
+    exceptions.InvalidToken = InvalidToken
+
+    def __init__(self, error=None):
+        self.error = error
+        self.calls = []
+
+    def _send(self, method, **kwargs):
+        self.calls.append((method, kwargs))
+        if self.error:
+            raise self.error
+
+    def send_task_success(self, **kwargs):
+        self._send('send_task_success', **kwargs)
+
+    def send_task_failure(self, **kwargs):
+        self._send('send_task_failure', **kwargs)
+
+
+class ResourceNotFoundException(Exception):
+    pass
+
+
+class FakeForecastClient:
+
+    class exceptions:  # pylint: disable=invalid-name
+        pass
+
+    exceptions.ResourceNotFoundException = ResourceNotFoundException
+
+    def __init__(self, statuses):
+        self.statuses = statuses
+
+    def describe_predictor(self, PredictorArn):  # pylint: disable=invalid-name
+        if PredictorArn not in self.statuses:
+            raise ResourceNotFoundException(PredictorArn)
+        return {'PredictorArn': PredictorArn, 'Status': self.statuses[PredictorArn]}
+
+
+class Context:
+    function_name = 'stack-CreatePredictor'
+
+
+@mock.patch.dict(os.environ, {'S3_WORK_FOLDER': 'pipeline'})
+class TaskCallbackTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.storage = LocalStorage(self.directory.name)
+        self.stepfunctions_client = FakeStepFunctionsClient()
+        for patch in [mock.patch.dict(os.environ, {'LOCAL_STORAGE_ROOT': self.directory.name}),
+                      mock.patch('task_callback.stepfunctions_client', self.stepfunctions_client)]:
+            patch.start()
+            self.addCleanup(patch.stop)
+        patch = mock.patch('task_callback.schedule_watcher')
+        self.schedule_watcher = patch.start()
+        self.addCleanup(patch.stop)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def invoke(self, func, event=None):
+        handler = task_callback(func)
+        return handler(event or {'Event': EVENT, 'TaskToken': TOKEN}, Context())
+
+    def test_event_without_token(self):
+        def func(event, _):
+            raise ResourcePending([PREDICTOR])
+
+        with self.assertRaises(ResourcePending):
+            self.invoke(func, EVENT)
+        self.assertEqual(load_watches(self.storage), [])
+        self.assertEqual(self.stepfunctions_client.calls, [])
+
+    def test_result_is_sent(self):
+        self.assertEqual(self.invoke(lambda event, _: dict(event, Done=True)), dict(EVENT, Done=True))
+        self.assertEqual(self.stepfunctions_client.calls, [
+            ('send_task_success', {'taskToken': TOKEN, 'output': json.dumps(dict(EVENT, Done=True))})])
+
+    def test_watch_saved_on_resource_pending(self):
+        def func(event, _):
+            raise ResourcePending([PREDICTOR])
+
+        self.assertIsNone(self.invoke(func))
+        self.assertEqual(load_watches(self.storage), [(watch_key(TOKEN), {
+            'FunctionName': Context.function_name,
+            'TaskToken': TOKEN,
+            'Resources': [PREDICTOR],
+            'Event': EVENT
+        })])
+        self.schedule_watcher.assert_called_once_with()
+        self.assertEqual(self.stepfunctions_client.calls, [])
+
+    def test_failure_is_sent_with_truncated_cause(self):
+        def func(event, _):
+            raise ValueError('x' * MAX_CAUSE_LENGTH)
+
+        self.assertIsNone(self.invoke(func))
+        [(method, kwargs)] = self.stepfunctions_client.calls
+        self.assertEqual(method, 'send_task_failure')
+        self.assertEqual(kwargs['error'], 'ValueError')
+        self.assertEqual(kwargs['cause'], repr(ValueError('x' * MAX_CAUSE_LENGTH))[:MAX_CAUSE_LENGTH])
+        self.assertEqual(load_watches(self.storage), [])
+        self.schedule_watcher.assert_not_called()
+
+    def test_timed_out_execution_is_ignored(self):
+        for error in [TaskTimedOut('timed out'), InvalidToken('stopped')]:
+            self.stepfunctions_client.error = error
+            self.assertEqual(self.invoke(lambda event, _: event), EVENT)
+            self.assertIsNone(self.invoke(lambda event, _: 1 / 0))
+        self.assertEqual([method for method, _ in self.stepfunctions_client.calls],
+                         ['send_task_success', 'send_task_failure'] * 2)
+
+
+class DescribeResourceTest(unittest.TestCase):
+
+    def test_resource_type(self):
+        self.assertEqual(resource_type(PREDICTOR), 'Predictors')
+        self.assertEqual(resource_type(IMPORT_JOB), 'DatasetImportJobs')
+
+    def test_describe_resource(self):
+        forecast_client = FakeForecastClient({PREDICTOR: 'ACTIVE'})
+        self.assertEqual(describe_resource(forecast_client, PREDICTOR)['Status'], 'ACTIVE')
+        self.assertIsNone(describe_resource(forecast_client, PREDICTOR.replace('2021', '2020')))
+
+
+if __name__ == '__main__':
+    unittest.main()
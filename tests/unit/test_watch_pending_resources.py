@@ -0,0 +1,154 @@
+import datetime
+import importlib.util
+import json
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from poll_schedule import DurationHistory, HISTORY_NAME, next_check_at  # pylint: disable=import-error
+from storage import LocalStorage, work_key  # pylint: disable=import-error
+from task_callback import save_watch, load_watches, watch_key  # pylint: disable=import-error
+
+APP_PATH = os.path.join(os.path.dirname(__file__), '..', '..', 'functions', 'watch_pending_resources', 'app.py')
+NOW = 1609459200.0
+PREDICTOR = 'arn:aws:forecast:us-east-1:123456789012:predictor/project_2021_01_01_00_00_00'
+FORECAST = 'arn:aws:forecast:us-east-1:123456789012:forecast/project_2021_01_01_00_00_00'
+FUNCTION_NAME = 'stack-CreateForecast'
+EVENT = {'TriggeredAt': '2021_01_01_00_00_00'}
+
+
+def load_app():
+    spec = importlib.util.spec_from_file_location('watch_pending_resources_app', APP_PATH)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+class ResourceNotFoundException(Exception):
+    pass
+
+
+class FakeForecastClient:
+    """
+    Resources {arn: (status, seconds since creation)}. Missing resources do not exist.
+    """
+
+    class exceptions:  # pylint: disable=invalid-name
+        pass
+
+    exceptions.ResourceNotFoundException = ResourceNotFoundException
+
+    def __init__(self, resources):
+        self.resources = resources
+        self.described = []
+
+    def _describe(self, arn):
+        self.described.append(arn)
+        if arn not in self.resources:
+            raise ResourceNotFoundException(arn)
+        status, age = self.resources[arn]
+        created_at = datetime.datetime.fromtimestamp(NOW - age, datetime.timezone.utc)
+        return {'Status': status, 'CreationTime': created_at,
+                'LastModificationTime': created_at + datetime.timedelta(seconds=age / 2)}
+
+    def describe_predictor(self, PredictorArn):  # pylint: disable=invalid-name
+        return self._describe(PredictorArn)
+
+    def describe_forecast(self, ForecastArn):  # pylint: disable=invalid-name
+        return self._describe(ForecastArn)
+
+
+@mock.patch.dict(os.environ, {'S3_WORK_FOLDER': 'pipeline'})
+class WatchPendingResourcesTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.app = load_app()
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.storage = LocalStorage(self.directory.name)
+        self.lambda_client = mock.Mock()
+        self.schedule_watcher = mock.Mock(return_value='rate(1 minute)')
+        self.stop_watcher = mock.Mock()
+        for patch in [mock.patch.dict(os.environ, {'LOCAL_STORAGE_ROOT': self.directory.name}),
+                      mock.patch.object(self.app, 'lambda_client', self.lambda_client),
+                      mock.patch.object(self.app, 'schedule_watcher', self.schedule_watcher),
+                      mock.patch.object(self.app, 'stop_watcher', self.stop_watcher),
+                      mock.patch.object(self.app.time, 'time', return_value=NOW)]:
+            patch.start()
+            self.addCleanup(patch.stop)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def watch(self, token, resources, **fields):
+        save_watch(self.storage, FUNCTION_NAME, EVENT, token, resources)
+        key = watch_key(token)
+        watch = dict(json.loads(self.storage.get_bytes(key).decode('utf-8')), Size=100, **fields)
+        self.storage.put_bytes(key, json.dumps(watch).encode('utf-8'))
+        return key
+
+    def run_watcher(self, resources):
+        forecast_client = FakeForecastClient(resources)
+        with mock.patch.object(self.app, 'forecast_client', forecast_client):
+            self.app.lambda_handler({'source': 'aws.events'}, None)
+        return forecast_client
+
+    def test_resumed_when_every_resource_is_settled(self):
+        self.watch('token', [PREDICTOR, FORECAST])
+        # The forecast has been deleted in the meantime
+        self.run_watcher({PREDICTOR: ('ACTIVE', 600)})
+
+        self.assertEqual(load_watches(self.storage), [])
+        self.lambda_client.invoke.assert_called_once_with(
+            FunctionName=FUNCTION_NAME,
+            InvocationType='Event',
+            Payload=json.dumps({'Event': EVENT, 'TaskToken': 'token'}).encode('utf-8'))
+        self.stop_watcher.assert_called_once_with()
+        self.schedule_watcher.assert_not_called()
+        history = DurationHistory.load(self.storage, work_key(HISTORY_NAME))
+        self.assertEqual(history.samples('Predictors'), [{'Arn': PREDICTOR, 'Seconds': 300.0, 'Size': 100}])
+
+    def test_waits_while_a_resource_is_pending(self):
+        key = self.watch('token', [PREDICTOR, FORECAST])
+        self.run_watcher({PREDICTOR: ('ACTIVE', 600), FORECAST: ('CREATE_IN_PROGRESS', 300)})
+
+        [(_, watch)] = load_watches(self.storage)
+        self.assertEqual(watch['NextCheckAt'], next_check_at(NOW - 300, NOW))
+        self.lambda_client.invoke.assert_not_called()
+        self.schedule_watcher.assert_called_once_with(watch['NextCheckAt'] - NOW)
+        self.stop_watcher.assert_not_called()
+        self.assertEqual(load_watches(self.storage)[0][0], key)
+        self.assertIsNone(self.storage.stat(work_key(HISTORY_NAME)))
+
+    def test_resources_being_deleted_are_waited_for(self):
+        self.watch('token', [PREDICTOR])
+        self.run_watcher({PREDICTOR: ('DELETE_IN_PROGRESS', 600)})
+
+        [(_, watch)] = load_watches(self.storage)
+        # Checked again from the start of the deletion
+        self.assertEqual(watch['NextCheckAt'], next_check_at(NOW - 300, NOW))
+        self.lambda_client.invoke.assert_not_called()
+
+    def test_watches_not_due_are_not_described(self):
+        self.watch('later', [PREDICTOR], NextCheckAt=NOW + 600)
+        self.watch('now', [FORECAST])
+        forecast_client = self.run_watcher({PREDICTOR: ('ACTIVE', 600), FORECAST: ('ACTIVE', 600)})
+
+        self.assertEqual(forecast_client.described, [FORECAST])
+        self.assertEqual([watch['TaskToken'] for _, watch in load_watches(self.storage)], ['later'])
+        self.assertEqual(self.lambda_client.invoke.call_count, 1)
+        self.schedule_watcher.assert_called_once_with(600)
+        self.stop_watcher.assert_not_called()
+
+    def test_no_watch(self):
+        self.run_watcher({})
+        self.stop_watcher.assert_called_once_with()
+        self.schedule_watcher.assert_not_called()
+        self.lambda_client.invoke.assert_not_called()
+
+
+if __name__ == '__main__':
+    unittest.main()
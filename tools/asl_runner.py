@@ -0,0 +1,720 @@
+"""
+Run the state machines (statemachine/*.asl.json) locally against the Lambda handlers in functions/*/app.py.
+
+The ${...Arn} placeholders are resolved with the DefinitionSubstitutions of template.yaml, and every Lambda function is
+called in-process with the environment variables of its template resource. Amazon Forecast is replaced with
+tools/forecast_simulator.py, S3 with a local directory (LOCAL_STORAGE_ROOT), and the other AWS services the functions
+call (STS, CloudWatch, SNS, Step Functions task callbacks, EventBridge rules of Schedule events and Lambda invocations
+by WatchPendingResources) with recorders in this module.
+
+Time is virtual: Retry backoff, Wait states, the rules of Schedule events (e.g. of WatchPendingResources, as scheduled
+by the functions) and time.sleep() in handlers advance a simulated clock instead of sleeping, so a whole flow runs in
+seconds. Invocations, retries, virtual time and wall-clock
+time are reported per state; --profile adds a cProfile report of the run.
+A Lambda function which runs longer than the Timeout of its template resource (in virtual time) fails with
+Sandbox.Timedout, and the task results it sent are dropped, as Lambda stops the function before it could send them.
+
+Usage:
+  python tools/asl_runner.py update_model --root /tmp/bucket
+  python tools/asl_runner.py update_model update_forecast --root /tmp/bucket --profile
+State machines given together run one after another against the same simulated Forecast resources.
+The dataset files of params.json must be in <root>/source/ (see tools/generate_dataset.py).
+"""
+import os
+import re
+import sys
+import copy
+import json
+import time
+import uuid
+import pstats
+import cProfile
+import argparse
+import contextlib
+import collections
+import importlib.util
+import yaml
+import numpy as np
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+SHARED = os.path.join(ROOT, 'functions', 'shared', 'python')
+sys.path.append(SHARED)
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+from forecast_simulator import ForecastSimulator, SimulatedClock, install  # noqa: E402 pylint: disable=wrong-import-position
+from dataset_schema import find_dataset, attributes  # noqa: E402 pylint: disable=import-error,wrong-import-position
+from time_series import parse_timestamps, to_periods, from_periods  # noqa: E402 pylint: disable=import-error,wrong-import-position
+
+TEMPLATE = os.path.join(ROOT, 'template.yaml')
+STATEMACHINE_DIR = os.path.join(ROOT, 'statemachine')
+STACK_NAME = 'local-pipeline'
+REGION = 'us-east-1'
+BUCKET = 'local-bucket'
+WAIT_FOR_TASK_TOKEN = 'arn:aws:states:::lambda:invoke.waitForTaskToken'
+SNS_PUBLISH = 'arn:aws:states:::sns:publish'
+FUNCTION_PREFIX = 'local:function:'
+# Retry defaults of the Amazon States Language
+DEFAULT_INTERVAL_SECONDS = 1
+DEFAULT_MAX_ATTEMPTS = 3
+DEFAULT_BACKOFF_RATE = 2.0
+PROFILE_LINES = 30
+# Error of a Lambda function which ran longer than its Timeout
+TIMED_OUT = 'Sandbox.Timedout'
+
+
+class StateError(Exception):
+    """
+    Error of a state, named like the errors of Step Functions (the exception class name of a Lambda function,
+    States.Timeout etc.).
+    """
+
+    def __init__(self, error, cause=''):
+        super().__init__('{}: {}'.format(error, cause))
+        self.error = error
+        self.cause = cause
+
+
+# ---- template ----
+
+class _TemplateLoader(yaml.SafeLoader):
+    pass
+
+
+def _tag(loader, tag_suffix, node):
+    if isinstance(node, yaml.ScalarNode):
+        value = loader.construct_scalar(node)
+    elif isinstance(node, yaml.SequenceNode):
+        value = loader.construct_sequence(node, deep=True)
+    else:
+        value = loader.construct_mapping(node, deep=True)
+    return {tag_suffix: value}
+
+
+_TemplateLoader.add_multi_constructor('!', _tag)
+
+
+def load_template(path=TEMPLATE):
+    with open(path) as f:
+        return yaml.load(f, Loader=_TemplateLoader)
+
+
+def resolve(value, template, parameters):
+    """
+    Resolve the intrinsic functions used in environment variables and definition substitutions.
+    """
+    if not isinstance(value, dict):
+        return value
+    if 'Ref' in value:
+        name = value['Ref']
+        if name in parameters:
+            return parameters[name]
+        if name == 'AWS::StackName':
+            return STACK_NAME
+        return 'local:{}:{}'.format(template['Resources'].get(name, {}).get('Type', 'ref'), name)
+    if 'FindInMap' in value:
+        mapping, key, field = value['FindInMap']
+        return template['Mappings'][mapping][key][field]
+    if 'Join' in value:
+        separator, values = value['Join']
+        return separator.join(str(resolve(item, template, parameters)) for item in values)
+    if 'GetAtt' in value:
+        name = value['GetAtt'].split('.')[0]
+        if template['Resources'][name]['Type'] == 'AWS::Serverless::Function':
+            return FUNCTION_PREFIX + name
+        return 'local:{}'.format(name)
+    raise ValueError('unsupported intrinsic function: {}'.format(value))
+
+
+class FunctionSpec:
+
+    def __init__(self, name, code_dir, timeout, environment, schedule):
+        self.name = name
+        self.code_dir = code_dir
+        self.timeout = timeout
+        self.environment = environment
+        self.schedule = schedule
+        self.module = None
+
+    def handler(self):
+        if self.module is None:
+            spec = importlib.util.spec_from_file_location(
+                '{}_app'.format(os.path.basename(self.code_dir.rstrip('/'))),
+                os.path.join(self.code_dir, 'app.py'))
+            self.module = importlib.util.module_from_spec(spec)
+            spec.loader.exec_module(self.module)
+        return self.module.lambda_handler
+
+
+class Schedule:
+    """
+    EventBridge rule of a Schedule event.
+    """
+
+    def __init__(self, rule_name, seconds, enabled):
+        self.rule_name = rule_name
+        self.seconds = seconds
+        self.enabled = enabled
+
+
+def _schedule_seconds(expression):
+    result = re.match(r'^rate\(([0-9]+) (minute|minutes|hour|hours)\)$', expression)
+    return int(result.group(1)) * (60 if result.group(2).startswith('minute') else 3600)
+
+
+def load_functions(template, parameters):
+    """
+    Return {logical id: FunctionSpec} of the Lambda functions.
+    """
+    globals_ = template.get('Globals', {}).get('Function', {})
+    functions = {}
+    for name, resource in template['Resources'].items():
+        if resource['Type'] != 'AWS::Serverless::Function':
+            continue
+        properties = resource['Properties']
+        environment = {}
+        for variables in (globals_.get('Environment', {}).get('Variables', {}),
+                          properties.get('Environment', {}).get('Variables', {})):
+            environment.update({key: str(resolve(value, template, parameters)) for key, value in variables.items()})
+        schedule = None
+        for event in properties.get('Events', {}).values():
+            if event['Type'] == 'Schedule':
+                event_properties = event['Properties']
+                schedule = Schedule(
+                    str(resolve(event_properties.get('Name', '{}-{}'.format(STACK_NAME, name)), template, parameters)),
+                    _schedule_seconds(event_properties['Schedule']), event_properties.get('Enabled', True))
+        functions[name] = FunctionSpec(
+            name, os.path.join(ROOT, properties['CodeUri']),
+            properties.get('Timeout', globals_.get('Timeout', 3)), environment, schedule)
+    return functions
+
+
+def load_definition(template, name, parameters):
+    """
+    Return the definition of a state machine (e.g. 'update_model') with its substitutions applied.
+    """
+    for resource in template['Resources'].values():
+        properties = resource.get('Properties', {})
+        if resource['Type'] == 'AWS::Serverless::StateMachine' and \
+                os.path.basename(properties['DefinitionUri']) == name + '.asl.json':
+            with open(os.path.join(ROOT, properties['DefinitionUri'])) as f:
+                text = f.read()
+            for key, value in properties.get('DefinitionSubstitutions', {}).items():
+                text = text.replace('${' + key + '}', str(resolve(value, template, parameters)))
+            return json.loads(text)
+    raise ValueError('state machine not found: {}'.format(name))
+
+
+# ---- local services ----
+
+class _StsService:
+
+    def __init__(self, account):
+        self.account = account
+
+    def get_caller_identity(self):
+        return {'Account': self.account}
+
+
+class _CloudWatchService:
+
+    def __init__(self):
+        self.metrics = []
+
+    def put_metric_data(self, Namespace, MetricData):  # pylint: disable=invalid-name
+        self.metrics.extend(dict(metric, Namespace=Namespace) for metric in MetricData)
+
+
+class _StepFunctionsExceptions:
+
+    class TaskTimedOut(Exception):
+        pass
+
+    class InvalidToken(Exception):
+        pass
+
+
+class _StepFunctionsService:
+    exceptions = _StepFunctionsExceptions
+
+    def __init__(self):
+        self.results = {}
+
+    def send_task_success(self, taskToken, output):  # pylint: disable=invalid-name
+        self.results[taskToken] = ('SUCCEEDED', json.loads(output))
+
+    def send_task_failure(self, taskToken, error, cause):  # pylint: disable=invalid-name
+        self.results[taskToken] = ('FAILED', StateError(error, cause))
+
+
+class _EventsService:
+    """
+    Rules of Schedule events. An enabled rule fires every `seconds` of virtual time from when it was put.
+    """
+
+    def __init__(self, clock):
+        self.clock = clock
+        # rule name -> {'FunctionName', 'Seconds', 'NextAt' (None when disabled)}
+        self.rules = {}
+
+    def add(self, function_name, schedule):
+        self.rules[schedule.rule_name] = {
+            'FunctionName': function_name,
+            'Seconds': schedule.seconds,
+            'NextAt': self.clock.now() + schedule.seconds if schedule.enabled else None
+        }
+
+    def put_rule(self, Name, ScheduleExpression, State='ENABLED'):  # pylint: disable=invalid-name
+        rule = self.rules[Name]
+        rule['Seconds'] = _schedule_seconds(ScheduleExpression)
+        rule['NextAt'] = self.clock.now() + rule['Seconds'] if State == 'ENABLED' else None
+        return {'RuleArn': 'local:rule/{}'.format(Name)}
+
+    def disable_rule(self, Name):  # pylint: disable=invalid-name
+        self.rules[Name]['NextAt'] = None
+
+    def next_rule(self):
+        """
+        Return the enabled rule which fires first, or None.
+        """
+        enabled = [rule for rule in self.rules.values() if rule['NextAt'] is not None]
+        return min(enabled, key=lambda rule: rule['NextAt']) if enabled else None
+
+
+class _LambdaService:
+    """
+    Asynchronous invocations are queued and run by the runner.
+    """
+
+    def __init__(self):
+        self.queue = collections.deque()
+
+    def invoke(self, FunctionName, InvocationType, Payload):  # pylint: disable=invalid-name
+        self.queue.append((FunctionName, json.loads(Payload)))
+        return {'StatusCode': 202 if InvocationType == 'Event' else 200}
+
+
+class LambdaContext:
+
+    def __init__(self, function_name, timeout, clock):
+        self.function_name = function_name
+        self.invoked_function_arn = FUNCTION_PREFIX + function_name
+        self.aws_request_id = str(uuid.uuid4())
+        self.memory_limit_in_mb = 128
+        self.clock = clock
+        self.deadline = clock.now() + timeout
+
+    def get_remaining_time_in_millis(self):
+        return int(max(self.deadline - self.clock.now(), 0) * 1000)
+
+
+@contextlib.contextmanager
+def virtual_time(clock):
+    """
+    Make time.time(), time.monotonic() and time.sleep() of the handlers use the simulated clock.
+    """
+    saved = time.time, time.monotonic, time.sleep
+    time.time, time.monotonic, time.sleep = clock.now, clock.now, clock.sleep
+    try:
+        yield
+    finally:
+        time.time, time.monotonic, time.sleep = saved
+
+
+def export_writer(storage, params):
+    """
+    Return an on_active hook of the simulator which writes a naive forecast (the last value of each item for every
+    quantile) to the destination of a forecast export job, in the layout of Amazon Forecast.
+    """
+    from storage import iter_lines, source_key  # pylint: disable=import-error,import-outside-toplevel
+
+    def write(resource_type, description):
+        if resource_type != 'ForecastExportJobs':
+            return
+        dataset = find_dataset(params['Datasets'], 'TARGET_TIME_SERIES')
+        names = [name for name, _ in attributes(dataset)]
+        filename = [job['Filename'] for job in params['DatasetImportJobs']
+                    if job['DatasetType'] == 'TARGET_TIME_SERIES'][0]
+        latest = {}
+        stream = storage.open_read(source_key(filename))
+        for line in iter_lines(stream):
+            if not line:
+                continue
+            row = dict(zip(names, line.split(',')))
+            if row['item_id'] not in latest or row['timestamp'] > latest[row['item_id']][0]:
+                latest[row['item_id']] = (row['timestamp'], row['target_value'])
+        stream.close()
+
+        frequency = params['Predictor']['FeaturizationConfig']['ForecastFrequency']
+        horizon = params['Predictor']['ForecastHorizon']
+        columns = [value if value == 'mean' else 'p{}'.format(int(round(float(value) * 100)))
+                   for value in params['Forecast']['ForecastTypes']]
+        items = sorted(latest)
+        periods = to_periods(parse_timestamps(
+            [latest[item][0] for item in items], params['DatasetTimestampFormat']), frequency)
+        path = description['Destination']['S3Config']['Path']
+        folder = path.split('/', 3)[3].rstrip('/')
+        key = '{}/{}_{}_part0.csv'.format(
+            folder, description['ForecastExportJobName'], time.strftime('%Y-%m-%dT%H-%M-%SZ', time.gmtime()))
+        with storage.open_write(key) as f:
+            f.write((','.join(['item_id', 'date'] + columns) + '\n').encode('utf-8'))
+            for step in range(1, horizon + 1):
+                dates = np.datetime_as_string(from_periods(periods + step, frequency), unit='s')
+                for item, date in zip(items, dates):
+                    values = [latest[item][1]] * len(columns)
+                    f.write((','.join([item, date + 'Z'] + values) + '\n').encode('utf-8'))
+    return write
+
+
+# ---- interpreter ----
+
+def _get_path(data, path, context=None):
+    if path.startswith('$$.'):
+        node, path = context, path[1:]
+    else:
+        node = data
+    if path == '$':
+        return node
+    for part in path[2:].split('.'):
+        if not isinstance(node, dict) or part not in node:
+            raise StateError('States.Runtime', 'path not found: {}'.format(path))
+        node = node[part]
+    return node
+
+
+def _set_path(data, path, value):
+    if path is None:
+        return data
+    if path == '$':
+        return value
+    data = copy.deepcopy(data)
+    node = data
+    parts = path[2:].split('.')
+    for part in parts[:-1]:
+        node = node.setdefault(part, {})
+    node[parts[-1]] = value
+    return data
+
+
+def _parameters(template, data, context):
+    if isinstance(template, dict):
+        resolved = {}
+        for key, value in template.items():
+            if key.endswith('.$'):
+                resolved[key[:-2]] = _get_path(data, value, context)
+            else:
+                resolved[key] = _parameters(value, data, context)
+        return resolved
+    if isinstance(template, list):
+        return [_parameters(value, data, context) for value in template]
+    return template
+
+
+def _choice(rule, data):
+    if 'And' in rule:
+        return all(_choice(sub, data) for sub in rule['And'])
+    if 'Or' in rule:
+        return any(_choice(sub, data) for sub in rule['Or'])
+    if 'Not' in rule:
+        return not _choice(rule['Not'], data)
+    if 'IsPresent' in rule:
+        try:
+            _get_path(data, rule['Variable'])
+            return rule['IsPresent']
+        except StateError:
+            return not rule['IsPresent']
+    value = _get_path(data, rule['Variable'])
+    comparisons = {
+        'StringEquals': lambda a, b: a == b,
+        'BooleanEquals': lambda a, b: a is b,
+        'NumericEquals': lambda a, b: a == b,
+        'NumericLessThan': lambda a, b: a < b,
+        'NumericLessThanEquals': lambda a, b: a <= b,
+        'NumericGreaterThan': lambda a, b: a > b,
+        'NumericGreaterThanEquals': lambda a, b: a >= b,
+        'IsNull': lambda a, b: (a is None) == b,
+    }
+    for operator, compare in comparisons.items():
+        if operator in rule:
+            return compare(value, rule[operator])
+    raise StateError('States.Runtime', 'unsupported choice rule: {}'.format(rule))
+
+
+def _matches(error, error_equals):
+    return error in error_equals or ('States.ALL' in error_equals and not error.startswith('States.Runtime'))
+
+
+class StateStatistics:
+
+    def __init__(self):
+        self.invocations = 0
+        self.retries = 0
+        self.virtual_seconds = 0.0
+        self.wall_seconds = 0.0
+
+
+class Runner:
+    """
+    Interpreter of the Amazon States Language for the state machines of this project.
+    """
+
+    def __init__(self, root, params_path=None, simulator=None, template=None):
+        from storage import LocalStorage  # pylint: disable=import-error,import-outside-toplevel
+        self.template = template or load_template()
+        self.parameters = {'S3BucketName': BUCKET, 'EmailAddress': 'local@example.com'}
+        self.functions = load_functions(self.template, self.parameters)
+        self.root = root
+        self.params_path = params_path or os.path.join(SHARED, 'params.json')
+        with open(self.params_path) as f:
+            params = json.load(f)
+        self.clock = simulator.clock if simulator else SimulatedClock(time.time())
+        self.simulator = simulator or ForecastSimulator(
+            clock=self.clock, on_active=export_writer(LocalStorage(root), params))
+        self.sts = _StsService(self.simulator.account)
+        self.cloudwatch = _CloudWatchService()
+        self.stepfunctions = _StepFunctionsService()
+        self.lambda_ = _LambdaService()
+        self.events = _EventsService(self.clock)
+        self.notifications = []
+        self.statistics = collections.defaultdict(StateStatistics)
+        self.invocations = collections.Counter()
+        for spec in self.functions.values():
+            if spec.schedule:
+                self.events.add(spec.name, spec.schedule)
+        self.environ = {
+            'AWS_REGION': REGION,
+            'LOCAL_STORAGE_ROOT': root,
+            'PARAMS_PATH': self.params_path,
+        }
+
+    def install(self):
+        import clients  # pylint: disable=import-error,import-outside-toplevel
+        install(self.simulator)
+        clients._clients.update({  # pylint: disable=protected-access
+            'sts': self.sts,
+            'cloudwatch': self.cloudwatch,
+            'stepfunctions': self.stepfunctions,
+            'lambda': self.lambda_,
+            'events': self.events,
+        })
+
+    def invoke(self, function_name, payload):
+        """
+        Invoke a Lambda function synchronously with its environment variables.
+        Raise StateError(TIMED_OUT) when it runs longer than its Timeout.
+        """
+        spec = self.functions[function_name]
+        self.invocations[function_name] += 1
+        saved = dict(os.environ)
+        os.environ.update(spec.environment)
+        os.environ.update(self.environ)
+        started_at = self.clock.now()
+        sent = set(self.stepfunctions.results)
+        try:
+            result = spec.handler()(payload, LambdaContext(function_name, spec.timeout, self.clock))
+        except Exception:
+            self._check_timeout(spec, started_at, sent)
+            raise
+        finally:
+            os.environ.clear()
+            os.environ.update(saved)
+        self._check_timeout(spec, started_at, sent)
+        return result
+
+    def _check_timeout(self, spec, started_at, sent):
+        """
+        Raise StateError(TIMED_OUT) when an invocation started at `started_at` ran longer than its Timeout, dropping
+        the task results sent by the invocation (the tokens not in `sent`).
+        """
+        elapsed = self.clock.now() - started_at
+        if elapsed <= spec.timeout:
+            return
+        for token in set(self.stepfunctions.results) - sent:
+            del self.stepfunctions.results[token]
+        raise StateError(TIMED_OUT, '{} timed out after {:.1f} seconds (Timeout: {} seconds)'.format(
+            spec.name, elapsed, spec.timeout))
+
+    def _invoke_event(self, function_name, payload):
+        """
+        Invoke a Lambda function asynchronously (with a task token or by a rule). A timeout is not reported to the
+        caller, so the task waits for a result until its TimeoutSeconds.
+        """
+        try:
+            self.invoke(function_name, payload)
+        except StateError as e:
+            if e.error != TIMED_OUT:
+                raise
+
+    def _drain(self):
+        while self.lambda_.queue:
+            function_name, payload = self.lambda_.queue.popleft()
+            try:
+                self.invoke(function_name, payload)
+            except Exception:  # pylint: disable=broad-except
+                # Errors of asynchronous invocations are only logged by Lambda
+                pass
+
+    def _wait_for_task_token(self, state, data, token):
+        parameters = _parameters(state['Parameters'], data, {'Task': {'Token': token}})
+        function_name = parameters['FunctionName'][len(FUNCTION_PREFIX):]
+        started_at = self.clock.now()
+        self._invoke_event(function_name, parameters['Payload'])
+        while True:
+            self._drain()
+            if token in self.stepfunctions.results:
+                status, result = self.stepfunctions.results.pop(token)
+                if status == 'FAILED':
+                    raise result
+                return result
+            if 'TimeoutSeconds' in state and self.clock.now() - started_at >= state['TimeoutSeconds']:
+                raise StateError('States.Timeout')
+            rule = self.events.next_rule()
+            if rule is None:
+                raise StateError('States.Timeout', 'no scheduled function resumes the task')
+            self.clock.advance(max(rule['NextAt'] - self.clock.now(), 0))
+            # The rule fires again after its rate unless the function puts or disables it
+            rule['NextAt'] += rule['Seconds']
+            self._invoke_event(rule['FunctionName'], {'source': 'aws.events'})
+
+    def _task(self, name, state, data):
+        resource = state['Resource']
+        if resource.startswith(FUNCTION_PREFIX):
+            try:
+                payload = _parameters(state['Parameters'], data, {}) if 'Parameters' in state else data
+                return self.invoke(resource[len(FUNCTION_PREFIX):], copy.deepcopy(payload))
+            except StateError:
+                raise
+            except Exception as e:  # pylint: disable=broad-except
+                raise StateError(e.__class__.__name__, repr(e))
+        if resource == WAIT_FOR_TASK_TOKEN:
+            try:
+                return self._wait_for_task_token(state, copy.deepcopy(data), '{}-{}'.format(name, uuid.uuid4()))
+            except StateError:
+                raise
+            except Exception as e:  # pylint: disable=broad-except
+                raise StateError(e.__class__.__name__, repr(e))
+        if resource == SNS_PUBLISH:
+            message = _parameters(state['Parameters'], data, {})
+            self.notifications.append(message)
+            return {'MessageId': str(uuid.uuid4())}
+        raise StateError('States.Runtime', 'unsupported resource: {}'.format(resource))
+
+    def _run_task(self, name, state, data):
+        """
+        Run a Task state with its Retry. Return the result.
+        """
+        attempts = collections.Counter()
+        statistics = self.statistics[name]
+        while True:
+            statistics.invocations += 1
+            try:
+                return self._task(name, state, data)
+            except StateError as e:
+                for index, retrier in enumerate(state.get('Retry', [])):
+                    if _matches(e.error, retrier['ErrorEquals']):
+                        if attempts[index] >= retrier.get('MaxAttempts', DEFAULT_MAX_ATTEMPTS):
+                            raise
+                        interval = retrier.get('IntervalSeconds', DEFAULT_INTERVAL_SECONDS) * \
+                            retrier.get('BackoffRate', DEFAULT_BACKOFF_RATE) ** attempts[index]
+                        attempts[index] += 1
+                        statistics.retries += 1
+                        self.clock.advance(interval)
+                        break
+                else:
+                    raise
+
+    def run(self, definition, execution_input):
+        """
+        Run an execution. Return (status, output).
+        """
+        name = definition['StartAt']
+        data = execution_input
+        with virtual_time(self.clock):
+            while True:
+                state = definition['States'][name]
+                statistics = self.statistics[name]
+                started_at, wall_started_at = self.clock.now(), time.perf_counter()
+                next_name = state.get('Next')
+                try:
+                    if state['Type'] == 'Task':
+                        result = self._run_task(name, state, data)
+                        data = _set_path(data, state.get('ResultPath', '$'), result)
+                    elif state['Type'] == 'Pass':
+                        statistics.invocations += 1
+                        data = _set_path(data, state.get('ResultPath', '$'), state.get('Result', data))
+                    elif state['Type'] == 'Wait':
+                        statistics.invocations += 1
+                        self.clock.advance(state['Seconds'] if 'Seconds' in state
+                                           else _get_path(data, state['SecondsPath']))
+                    elif state['Type'] == 'Choice':
+                        statistics.invocations += 1
+                        next_name = next((rule['Next'] for rule in state['Choices'] if _choice(rule, data)),
+                                         state.get('Default'))
+                        if next_name is None:
+                            raise StateError('States.NoChoiceMatched')
+                    elif state['Type'] == 'Succeed':
+                        statistics.invocations += 1
+                        return 'SUCCEEDED', data
+                    elif state['Type'] == 'Fail':
+                        statistics.invocations += 1
+                        return 'FAILED', data
+                    else:
+                        raise StateError('States.Runtime', 'unsupported state type: {}'.format(state['Type']))
+                except StateError as e:
+                    catcher = next((catcher for catcher in state.get('Catch', [])
+                                    if _matches(e.error, catcher['ErrorEquals'])), None)
+                    if catcher is None:
+                        return 'FAILED', {'Error': e.error, 'Cause': e.cause}
+                    data = _set_path(data, catcher.get('ResultPath', '$'), {'Error': e.error, 'Cause': e.cause})
+                    next_name = catcher['Next']
+                finally:
+                    statistics.virtual_seconds += self.clock.now() - started_at
+                    statistics.wall_seconds += time.perf_counter() - wall_started_at
+                if state.get('End'):
+                    return 'SUCCEEDED', data
+                name = next_name
+
+    def report(self):
+        lines = ['{:<30} {:>11} {:>8} {:>14} {:>11}'.format(
+            'state', 'invocations', 'retries', 'virtual [s]', 'wall [s]')]
+        for name, statistics in self.statistics.items():
+            lines.append('{:<30} {:>11} {:>8} {:>14.1f} {:>11.3f}'.format(
+                name, statistics.invocations, statistics.retries, statistics.virtual_seconds,
+                statistics.wall_seconds))
+        lines.append('')
+        lines.append('Lambda invocations: {}'.format(dict(self.invocations)))
+        lines.append('Amazon Forecast calls: {}'.format(dict(self.simulator.calls)))
+        return '\n'.join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Run a state machine locally.')
+    parser.add_argument('statemachines', nargs='+', choices=['update_model', 'update_forecast'])
+    parser.add_argument('--root', required=True, help='directory standing in for the S3 bucket')
+    parser.add_argument('--params', help='params.json (default: functions/shared/python/params.json)')
+    parser.add_argument('--input', default='{}', help='execution input (JSON)')
+    parser.add_argument('--profile', action='store_true', help='print a cProfile report of the run')
+    args = parser.parse_args()
+
+    runner = Runner(args.root, args.params)
+    runner.install()
+    profiler = cProfile.Profile() if args.profile else None
+    status = 'SUCCEEDED'
+    for name in args.statemachines:
+        definition = load_definition(runner.template, name, runner.parameters)
+        wall_started_at = time.perf_counter()
+        if profiler:
+            profiler.enable()
+        status, output = runner.run(definition, json.loads(args.input))
+        if profiler:
+            profiler.disable()
+        print('{}: {} in {:.2f} s (wall clock)'.format(name, status, time.perf_counter() - wall_started_at))
+        if status != 'SUCCEEDED':
+            print(json.dumps(output.get('serviceError', output), indent=2, default=str))
+            break
+    print(runner.report())
+    if profiler:
+        pstats.Stats(profiler, stream=sys.stdout).sort_stats('cumulative').print_stats(PROFILE_LINES)
+    return 0 if status == 'SUCCEEDED' else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,555 @@
+"""
+In-process fake of the Amazon Forecast API used by the Lambda functions, for offline end-to-end runs and for measuring
+the control flow of the pipeline (API call counts, retries, cleanup scaling) without AWS.
+
+Supported operations:
+  create_/describe_/delete_ dataset_group, dataset, dataset_import_job, predictor, forecast, forecast_export_job
+  list_ of the same resources (with Filters, MaxResults and NextToken), get_paginator and get_accuracy_metrics
+Errors are raised as the exceptions of a boto3 client (simulator.exceptions.ResourceNotFoundException etc.).
+
+Resources go through CREATE_PENDING -> CREATE_IN_PROGRESS -> ACTIVE (or CREATE_FAILED) and
+DELETE_PENDING -> DELETE_IN_PROGRESS -> (not found), driven by a clock. With SimulatedClock, time only passes when the
+caller advances it (or when api_latency is set), so a whole flow runs in milliseconds and deterministically.
+
+Usage:
+  from forecast_simulator import ForecastSimulator, SimulatedClock, install
+  simulator = ForecastSimulator(clock=SimulatedClock())
+  install(simulator)   # client('forecast') of the Lambda functions now returns the simulator
+  ...
+  simulator.clock.advance(600)
+  print(simulator.calls)
+"""
+import os
+import sys
+import time
+import zlib
+import datetime
+import threading
+import collections
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'functions', 'shared', 'python'))
+
+REGION = 'us-east-1'
+ACCOUNT = '123456789012'
+# Resource type -> (seconds in CREATE_PENDING, seconds in CREATE_IN_PROGRESS, seconds to delete)
+DEFAULT_LATENCIES = {
+    'DatasetGroups': (0, 1, 5),
+    'Datasets': (0, 1, 5),
+    'DatasetImportJobs': (60, 600, 30),
+    'Predictors': (120, 3600, 60),
+    'Forecasts': (60, 1200, 60),
+    'ForecastExportJobs': (30, 300, 30),
+}
+# Resource type -> (ARN parameter, name parameter, ARN resource, parent resource type, parent ARN parameter)
+RESOURCE_SPECS = {
+    'DatasetGroups': ('DatasetGroupArn', 'DatasetGroupName', 'dataset-group/{name}', None, None),
+    'Datasets': ('DatasetArn', 'DatasetName', 'dataset/{name}', None, None),
+    'DatasetImportJobs': ('DatasetImportJobArn', 'DatasetImportJobName', 'dataset-import-job/{parent}/{name}',
+                          'Datasets', 'DatasetArn'),
+    'Predictors': ('PredictorArn', 'PredictorName', 'predictor/{name}', 'DatasetGroups', 'DatasetGroupArn'),
+    'Forecasts': ('ForecastArn', 'ForecastName', 'forecast/{name}', 'Predictors', 'PredictorArn'),
+    'ForecastExportJobs': ('ForecastExportJobArn', 'ForecastExportJobName', 'forecast-export-job/{parent}/{name}',
+                           'Forecasts', 'ForecastArn'),
+}
+# Resource type -> fields of list_ results
+SUMMARY_FIELDS = {
+    'DatasetGroups': ['DatasetGroupArn', 'DatasetGroupName', 'CreationTime', 'LastModificationTime'],
+    'Datasets': ['DatasetArn', 'DatasetName', 'DatasetType', 'Domain', 'CreationTime', 'LastModificationTime'],
+    'DatasetImportJobs': ['DatasetImportJobArn', 'DatasetImportJobName', 'DataSource', 'Status',
+                          'CreationTime', 'LastModificationTime'],
+    'Predictors': ['PredictorArn', 'PredictorName', 'DatasetGroupArn', 'Status', 'CreationTime',
+                   'LastModificationTime'],
+    'Forecasts': ['ForecastArn', 'ForecastName', 'PredictorArn', 'DatasetGroupArn', 'Status', 'CreationTime',
+                  'LastModificationTime'],
+    'ForecastExportJobs': ['ForecastExportJobArn', 'ForecastExportJobName', 'Destination', 'Status',
+                           'CreationTime', 'LastModificationTime'],
+}
+DELETABLE_STATUSES = {'ACTIVE', 'CREATE_FAILED'}
+DEFAULT_FORECAST_TYPES = ['0.10', '0.50', '0.90']
+MAX_RESULTS = 100
+# Shortest advance of SimulatedClock.sleep()
+MIN_SLEEP = 0.001
+
+
+class ForecastError(Exception):
+    """
+    Error of the simulated API, shaped like botocore's ClientError.
+    """
+
+    def __init__(self, message):
+        super().__init__(message)
+        self.response = {'Error': {'Code': self.__class__.__name__, 'Message': message}}
+
+
+class ResourceNotFoundException(ForecastError):
+    pass
+
+
+class ResourceAlreadyExistsException(ForecastError):
+    pass
+
+
+class ResourceInUseException(ForecastError):
+    pass
+
+
+class LimitExceededException(ForecastError):
+    pass
+
+
+class InvalidInputException(ForecastError):
+    pass
+
+
+class InvalidNextTokenException(ForecastError):
+    pass
+
+
+class _Exceptions:
+    ClientError = ForecastError
+    ResourceNotFoundException = ResourceNotFoundException
+    ResourceAlreadyExistsException = ResourceAlreadyExistsException
+    ResourceInUseException = ResourceInUseException
+    LimitExceededException = LimitExceededException
+    InvalidInputException = InvalidInputException
+    InvalidNextTokenException = InvalidNextTokenException
+
+
+class SimulatedClock:
+    """
+    Clock which only moves when it is advanced (sleep() advances it too).
+    """
+
+    def __init__(self, start=1600000000.0):
+        self.current = float(start)
+        self.lock = threading.Lock()
+
+    def now(self):
+        return self.current
+
+    def advance(self, seconds):
+        with self.lock:
+            self.current += seconds
+
+    def sleep(self, seconds):
+        # A sleep shorter than the precision of the epoch seconds would not move the clock, and a caller waiting for
+        # the time to pass (e.g. TokenBucket.acquire) would spin forever.
+        self.advance(max(seconds, MIN_SLEEP))
+
+
+class RealClock:
+    """
+    Wall clock. Latencies can be shortened with `scale` (e.g. 0.01 turns an hour into 36 seconds).
+    """
+
+    def __init__(self, scale=1.0):
+        self.scale = scale
+        self.started_at = time.time()
+
+    def now(self):
+        return self.started_at + (time.time() - self.started_at) / self.scale
+
+    def sleep(self, seconds):
+        time.sleep(seconds * self.scale)
+
+
+class _Paginator:
+
+    def __init__(self, method, key):
+        self.method = method
+        self.key = key
+
+    def paginate(self, **kwargs):
+        next_token = None
+        while True:
+            if next_token is not None:
+                kwargs['NextToken'] = next_token
+            page = self.method(**kwargs)
+            yield page
+            next_token = page.get('NextToken')
+            if next_token is None:
+                return
+
+
+def _timestamp(seconds):
+    return datetime.datetime.fromtimestamp(seconds, tz=datetime.timezone.utc)
+
+
+def _match(resource, filters):
+    for condition in filters or []:
+        matched = resource.get(condition['Key']) == condition['Value']
+        if matched != (condition.get('Condition', 'IS') == 'IS'):
+            return False
+    return True
+
+
+class ForecastSimulator:
+    """
+    Fake Amazon Forecast client.
+      latencies: {resource type: (pending seconds, in-progress seconds, delete seconds)}, merged into DEFAULT_LATENCIES
+      api_latency: seconds each call takes (slept on the clock)
+      failing_names: names of resources which end in CREATE_FAILED
+      max_running_import_jobs: quota of parallel running dataset import jobs (LimitExceededException when exceeded)
+      on_active: called with (resource type, description) once when a resource becomes ACTIVE
+    `calls` counts the calls per operation.
+    """
+    exceptions = _Exceptions
+
+    def __init__(self, clock=None, latencies=None, api_latency=0.0, failing_names=None,
+                 max_running_import_jobs=None, on_active=None, region=REGION, account=ACCOUNT):
+        self.clock = clock or SimulatedClock()
+        self.latencies = dict(DEFAULT_LATENCIES, **(latencies or {}))
+        self.api_latency = api_latency
+        self.failing_names = set(failing_names or [])
+        self.max_running_import_jobs = max_running_import_jobs
+        self.on_active = on_active
+        self.region = region
+        self.account = account
+        self.resources = {resource_type: collections.OrderedDict() for resource_type in RESOURCE_SPECS}
+        # Parent ARN -> {(resource type, ARN): None} of the resources created under it, in the order of creation
+        self.children = collections.defaultdict(collections.OrderedDict)
+        self.calls = collections.Counter()
+        self.lock = threading.RLock()
+
+    # ---- internals ----
+
+    def _call(self, operation):
+        self.calls[operation] += 1
+        if self.api_latency:
+            self.clock.sleep(self.api_latency)
+
+    def _arn(self, resource_type, name, parent_arn=None):
+        resource = RESOURCE_SPECS[resource_type][2].format(
+            name=name, parent=parent_arn.split('/')[-1] if parent_arn else '')
+        return 'arn:aws:forecast:{}:{}:{}'.format(self.region, self.account, resource)
+
+    def _refresh(self, resource_type, arn):
+        """
+        Update the status of a resource from the clock. Return its record, or None when it has been deleted.
+        """
+        record = self.resources[resource_type].get(arn)
+        if record is None:
+            return None
+        pending, in_progress, delete = self.latencies[resource_type]
+        now = self.clock.now()
+        if record['DeletedAt'] is not None:
+            elapsed = now - record['DeletedAt']
+            if elapsed >= delete:
+                del self.resources[resource_type][arn]
+                self._detach(resource_type, arn, record)
+                return None
+            status, changed_at = ('DELETE_PENDING', record['DeletedAt']) if elapsed < delete / 2 else \
+                ('DELETE_IN_PROGRESS', record['DeletedAt'] + delete / 2)
+        else:
+            elapsed = now - record['CreatedAt']
+            if elapsed < pending:
+                status, changed_at = 'CREATE_PENDING', record['CreatedAt']
+            elif elapsed < pending + in_progress:
+                status, changed_at = 'CREATE_IN_PROGRESS', record['CreatedAt'] + pending
+            else:
+                status = 'CREATE_FAILED' if record['Name'] in self.failing_names else 'ACTIVE'
+                changed_at = record['CreatedAt'] + pending + in_progress
+        if record['Description']['Status'] != status:
+            record['Description']['Status'] = status
+            record['Description']['LastModificationTime'] = _timestamp(changed_at)
+            if status == 'ACTIVE':
+                self._activated(resource_type, record)
+                if self.on_active is not None:
+                    self.on_active(resource_type, dict(record['Description']))
+        return record
+
+    def _activated(self, resource_type, record):
+        description = record['Description']
+        if resource_type == 'DatasetImportJobs':
+            description['DataSize'] = 1.0
+        if resource_type == 'Predictors':
+            # Dataset import jobs used for training
+            group = self._refresh('DatasetGroups', description['DatasetGroupArn'])
+            description['DatasetImportJobArns'] = [
+                arn for dataset_arn in (group['Description']['DatasetArns'] if group else [])
+                for arn in self._latest_import_jobs(dataset_arn)]
+
+    def _latest_import_jobs(self, dataset_arn):
+        jobs = [arn for child_type, arn in list(self.children.get(dataset_arn, ()))
+                if child_type == 'DatasetImportJobs'
+                for record in [self._refresh(child_type, arn)]
+                if record is not None and record['Description']['Status'] == 'ACTIVE']
+        return jobs[-1:]
+
+    def _detach(self, resource_type, arn, record):
+        """
+        Remove a deleted resource from the index of children (and a deleted dataset from its dataset groups).
+        """
+        if record['Parent'] is not None:
+            self.children[record['Parent']].pop((resource_type, arn), None)
+        if resource_type == 'Datasets':
+            for group in self.resources['DatasetGroups'].values():
+                arns = group['Description']['DatasetArns']
+                if record['Description']['DatasetArn'] in arns:
+                    arns.remove(record['Description']['DatasetArn'])
+
+    def _get(self, resource_type, arn):
+        record = self._refresh(resource_type, arn)
+        if record is None:
+            raise ResourceNotFoundException('{} not found: {}'.format(resource_type, arn))
+        return record
+
+    def _all(self, resource_type):
+        records = [self._refresh(resource_type, arn) for arn in list(self.resources[resource_type])]
+        return [record for record in records if record is not None]
+
+    def _require_active(self, resource_type, arn):
+        record = self._get(resource_type, arn)
+        if record['Description']['Status'] != 'ACTIVE':
+            raise ResourceInUseException('{} is not ACTIVE: {}'.format(resource_type, arn))
+        return record
+
+    def _create(self, resource_type, kwargs, required, extra=None):
+        arn_name, name_param, _, parent_type, parent_param = RESOURCE_SPECS[resource_type]
+        for param in [name_param] + required:
+            if param not in kwargs:
+                raise InvalidInputException('{} is required'.format(param))
+        name = kwargs[name_param]
+        parent_arn = kwargs.get(parent_param) if parent_param else None
+        if parent_type is not None:
+            self._require_active(parent_type, parent_arn)
+        arn = self._arn(resource_type, name, parent_arn)
+        if self._refresh(resource_type, arn) is not None:
+            raise ResourceAlreadyExistsException('{} already exists: {}'.format(resource_type, arn))
+        now = _timestamp(self.clock.now())
+        description = dict(kwargs, **(extra or {}))
+        description.update({arn_name: arn, 'Status': 'CREATE_PENDING', 'CreationTime': now,
+                            'LastModificationTime': now})
+        self.resources[resource_type][arn] = {
+            'Name': name, 'Parent': parent_arn, 'CreatedAt': self.clock.now(), 'DeletedAt': None,
+            'Description': description}
+        if parent_arn is not None:
+            self.children[parent_arn][(resource_type, arn)] = None
+        self._refresh(resource_type, arn)
+        return {arn_name: arn}
+
+    def _describe(self, resource_type, arn):
+        return dict(self._get(resource_type, arn)['Description'])
+
+    def _delete(self, resource_type, arn, dependents):
+        record = self._get(resource_type, arn)
+        if record['DeletedAt'] is not None:
+            return {}
+        if record['Description']['Status'] not in DELETABLE_STATUSES:
+            raise ResourceInUseException('{} is {}: {}'.format(
+                resource_type, record['Description']['Status'], arn))
+        for dependent_type, dependent_arn in list(self.children.get(arn, ())):
+            if dependent_type in dependents and self._refresh(dependent_type, dependent_arn) is not None:
+                raise ResourceInUseException('{} of {} remain: {}'.format(dependent_type, resource_type, arn))
+        record['DeletedAt'] = self.clock.now()
+        self._refresh(resource_type, arn)
+        return {}
+
+    def _list(self, resource_type, kwargs):
+        records = [record['Description'] for record in self._all(resource_type)
+                   if _match(record['Description'], kwargs.get('Filters'))]
+        try:
+            offset = int(kwargs.get('NextToken') or 0)
+        except ValueError:
+            raise InvalidNextTokenException(kwargs['NextToken'])
+        max_results = kwargs.get('MaxResults', MAX_RESULTS)
+        page = records[offset:offset + max_results]
+        response = {resource_type: [{field: item[field] for field in SUMMARY_FIELDS[resource_type] if field in item}
+                                    for item in page]}
+        if offset + max_results < len(records):
+            response['NextToken'] = str(offset + max_results)
+        return response
+
+    # ---- dataset groups ----
+
+    def create_dataset_group(self, **kwargs):
+        with self.lock:
+            self._call('create_dataset_group')
+            for dataset_arn in kwargs.get('DatasetArns', []):
+                self._get('Datasets', dataset_arn)
+            return self._create('DatasetGroups', kwargs, ['Domain'],
+                                {'DatasetArns': list(kwargs.get('DatasetArns', []))})
+
+    def describe_dataset_group(self, DatasetGroupArn):  # pylint: disable=invalid-name
+        with self.lock:
+            self._call('describe_dataset_group')
+            return self._describe('DatasetGroups', DatasetGroupArn)
+
+    def list_dataset_groups(self, **kwargs):
+        with self.lock:
+            self._call('list_dataset_groups')
+            return self._list('DatasetGroups', kwargs)
+
+    def delete_dataset_group(self, DatasetGroupArn):  # pylint: disable=invalid-name
+        with self.lock:
+            self._call('delete_dataset_group')
+            return self._delete('DatasetGroups', DatasetGroupArn, ['Predictors'])
+
+    # ---- datasets ----
+
+    def create_dataset(self, **kwargs):
+        with self.lock:
+            self._call('create_dataset')
+            return self._create('Datasets', kwargs, ['Domain', 'DatasetType', 'Schema'])
+
+    def describe_dataset(self, DatasetArn):  # pylint: disable=invalid-name
+        with self.lock:
+            self._call('describe_dataset')
+            return self._describe('Datasets', DatasetArn)
+
+    def list_datasets(self, **kwargs):
+        with self.lock:
+            self._call('list_datasets')
+            return self._list('Datasets', kwargs)
+
+    def delete_dataset(self, DatasetArn):  # pylint: disable=invalid-name
+        with self.lock:
+            self._call('delete_dataset')
+            return self._delete('Datasets', DatasetArn, ['DatasetImportJobs'])
+
+    # ---- dataset import jobs ----
+
+    def create_dataset_import_job(self, **kwargs):
+        with self.lock:
+            self._call('create_dataset_import_job')
+            if self.max_running_import_jobs is not None:
+                running = [record for record in self._all('DatasetImportJobs')
+                           if record['Description']['Status'] in ('CREATE_PENDING', 'CREATE_IN_PROGRESS')]
+                if len(running) >= self.max_running_import_jobs:
+                    raise LimitExceededException('too many running dataset import jobs')
+            return self._create('DatasetImportJobs', kwargs, ['DatasetArn', 'DataSource'])
+
+    def describe_dataset_import_job(self, DatasetImportJobArn):  # pylint: disable=invalid-name
+        with self.lock:
+            self._call('describe_dataset_import_job')
+            return self._describe('DatasetImportJobs', DatasetImportJobArn)
+
+    def list_dataset_import_jobs(self, **kwargs):
+        with self.lock:
+            self._call('list_dataset_import_jobs')
+            return self._list('DatasetImportJobs', kwargs)
+
+    def delete_dataset_import_job(self, DatasetImportJobArn):  # pylint: disable=invalid-name
+        with self.lock:
+            self._call('delete_dataset_import_job')
+            return self._delete('DatasetImportJobs', DatasetImportJobArn, [])
+
+    # ---- predictors ----
+
+    def create_predictor(self, **kwargs):
+        with self.lock:
+            self._call('create_predictor')
+            if 'DatasetGroupArn' not in kwargs.get('InputDataConfig', {}):
+                raise InvalidInputException('InputDataConfig.DatasetGroupArn is required')
+            dataset_group_arn = kwargs['InputDataConfig']['DatasetGroupArn']
+            group = self._require_active('DatasetGroups', dataset_group_arn)
+            for dataset_arn in group['Description']['DatasetArns']:
+                if not self._latest_import_jobs(dataset_arn):
+                    raise ResourceInUseException('dataset has no ACTIVE dataset import job: ' + dataset_arn)
+            return self._create('Predictors', dict(kwargs, DatasetGroupArn=dataset_group_arn), ['ForecastHorizon'], {
+                'ForecastTypes': kwargs.get('ForecastTypes', DEFAULT_FORECAST_TYPES),
+                'DatasetImportJobArns': []
+            })
+
+    def describe_predictor(self, PredictorArn):  # pylint: disable=invalid-name
+        with self.lock:
+            self._call('describe_predictor')
+            return self._describe('Predictors', PredictorArn)
+
+    def list_predictors(self, **kwargs):
+        with self.lock:
+            self._call('list_predictors')
+            return self._list('Predictors', kwargs)
+
+    def delete_predictor(self, PredictorArn):  # pylint: disable=invalid-name
+        with self.lock:
+            self._call('delete_predictor')
+            return self._delete('Predictors', PredictorArn, ['Forecasts'])
+
+    def get_accuracy_metrics(self, PredictorArn):  # pylint: disable=invalid-name
+        """
+        Return metrics derived from the ARN, so that they are stable across runs.
+        """
+        with self.lock:
+            self._call('get_accuracy_metrics')
+            description = self._require_active('Predictors', PredictorArn)['Description']
+            seed = zlib.crc32(PredictorArn.encode('utf-8'))
+            loss = 0.05 + (seed % 1000) / 10000
+            return {'PredictorEvaluationResults': [{
+                'AlgorithmArn': 'arn:aws:forecast:::algorithm/Deep_AR_Plus',
+                'TestWindows': [{
+                    'EvaluationType': 'SUMMARY',
+                    'Metrics': {
+                        'RMSE': loss * 100,
+                        'WeightedQuantileLosses': [
+                            {'Quantile': float(quantile), 'LossValue': loss * (1 + abs(float(quantile) - 0.5))}
+                            for quantile in description['ForecastTypes'] if quantile != 'mean']
+                    }
+                }]
+            }]}
+
+    # ---- forecasts ----
+
+    def create_forecast(self, **kwargs):
+        with self.lock:
+            self._call('create_forecast')
+            self._require_active('Predictors', kwargs.get('PredictorArn'))
+            predictor = self._describe('Predictors', kwargs['PredictorArn'])
+            return self._create('Forecasts', kwargs, ['PredictorArn'], {
+                'ForecastTypes': kwargs.get('ForecastTypes', predictor['ForecastTypes']),
+                'DatasetGroupArn': predictor['DatasetGroupArn']
+            })
+
+    def describe_forecast(self, ForecastArn):  # pylint: disable=invalid-name
+        with self.lock:
+            self._call('describe_forecast')
+            return self._describe('Forecasts', ForecastArn)
+
+    def list_forecasts(self, **kwargs):
+        with self.lock:
+            self._call('list_forecasts')
+            return self._list('Forecasts', kwargs)
+
+    def delete_forecast(self, ForecastArn):  # pylint: disable=invalid-name
+        with self.lock:
+            self._call('delete_forecast')
+            return self._delete('Forecasts', ForecastArn, ['ForecastExportJobs'])
+
+    # ---- forecast export jobs ----
+
+    def create_forecast_export_job(self, **kwargs):
+        with self.lock:
+            self._call('create_forecast_export_job')
+            return self._create('ForecastExportJobs', kwargs, ['ForecastArn', 'Destination'])
+
+    def describe_forecast_export_job(self, ForecastExportJobArn):  # pylint: disable=invalid-name
+        with self.lock:
+            self._call('describe_forecast_export_job')
+            return self._describe('ForecastExportJobs', ForecastExportJobArn)
+
+    def list_forecast_export_jobs(self, **kwargs):
+        with self.lock:
+            self._call('list_forecast_export_jobs')
+            return self._list('ForecastExportJobs', kwargs)
+
+    def delete_forecast_export_job(self, ForecastExportJobArn):  # pylint: disable=invalid-name
+        with self.lock:
+            self._call('delete_forecast_export_job')
+            return self._delete('ForecastExportJobs', ForecastExportJobArn, [])
+
+    # ---- pagination ----
+
+    def get_paginator(self, operation_name):
+        resource_type = ''.join(word.capitalize() for word in operation_name.split('_')[1:])
+        if resource_type not in RESOURCE_SPECS:
+            raise InvalidInputException('unsupported paginator: ' + operation_name)
+        return _Paginator(getattr(self, operation_name), resource_type)
+
+
+def install(simulator, service_name='forecast'):
+    """
+    Make client('forecast') and get_client('forecast') of the Lambda functions return the simulator.
+    """
+    import clients  # pylint: disable=import-error,import-outside-toplevel
+    clients._clients[service_name] = simulator  # pylint: disable=protected-access
+    return simulator
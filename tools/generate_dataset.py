@@ -0,0 +1,120 @@
+"""
+Generate large synthetic dataset files in the layout of /samples for load tests.
+  target_time_series.csv   timestamp,target_value,item_id
+  related_time_series.csv  timestamp,price,item_id
+  item_metadata.csv        item_id, location
+
+Items are generated in blocks of a bounded number of rows and written out immediately, so memory does not depend on
+the number of items. The output only depends on the arguments (including --seed).
+
+Usage:
+  python tools/generate_dataset.py --items 100000 --length 2160 --output /tmp/dataset
+"""
+import os
+import sys
+import argparse
+import numpy as np
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'functions', 'shared', 'python'))
+from time_series import parse_timestamps, format_timestamps, to_periods, from_periods, \
+    frequency_unit  # noqa: E402 pylint: disable=import-error,wrong-import-position
+
+TIMESTAMP_FORMAT = 'yyyy-MM-dd hh:mm:ss'
+ITEM_NAME = 'client_{}'
+LOCATIONS = ['Tokyo', 'Osaka', 'Nagoya', 'Fukuoka', 'Sapporo', 'Sendai']
+# Maximum number of rows generated at once
+BLOCK_ROWS = 1000000
+
+
+def seasonal_periods(frequency):
+    """
+    Return the number of periods in a day and in a week (0 when the season is shorter than the frequency).
+    """
+    unit, step = frequency_unit(frequency)
+    minutes = {'m': step, 'h': 60 * step, 'D': 24 * 60 * step}.get(unit)
+    if minutes is None:
+        return 0, 0
+    return 24 * 60 // minutes, 7 * 24 * 60 // minutes
+
+
+def generate_block(first_item, items, length, frequency, seed):
+    """
+    Return (target values, prices, locations) of `items` items as arrays of shape (items, length).
+    """
+    rng = np.random.RandomState([seed, first_item])
+    daily, weekly = seasonal_periods(frequency)
+    t = np.arange(length)
+
+    level = rng.lognormal(mean=4.0, sigma=0.6, size=(items, 1))
+    trend = rng.normal(0.0, 0.0002, size=(items, 1))
+    seasonality = np.zeros((items, length))
+    if daily > 1:
+        amplitude = rng.uniform(0.1, 0.6, size=(items, 1))
+        phase = rng.uniform(0, daily, size=(items, 1))
+        seasonality += amplitude * np.sin(2 * np.pi * (t + phase) / daily)
+    if weekly > 1:
+        amplitude = rng.uniform(0.0, 0.3, size=(items, 1))
+        seasonality += amplitude * np.sin(2 * np.pi * t / weekly)
+    noise = rng.normal(0.0, 0.1, size=(items, length))
+    target = np.maximum(level * (1 + trend * t + seasonality + noise), 0.0)
+
+    base_price = rng.uniform(10.0, 200.0, size=(items, 1))
+    promotion = rng.random_sample((items, length)) < 0.05
+    price = base_price * np.where(promotion, 0.8, 1.0) * (1 + rng.normal(0.0, 0.01, size=(items, length)))
+
+    locations = np.array(LOCATIONS)[rng.randint(0, len(LOCATIONS), size=items)]
+    return target, price, locations
+
+
+def write_rows(f, timestamps, values, item_names):
+    """
+    Write rows of a block item by item (the layout of /samples).
+    """
+    items, length = values.shape
+    rows = np.char.add(np.char.add(np.tile(timestamps, items), ','),
+                       np.char.mod('%.6f', values.ravel()))
+    rows = np.char.add(np.char.add(rows, ','), np.repeat(item_names, length))
+    f.write('\n'.join(rows.tolist()))
+    f.write('\n')
+
+
+def generate(output, items, length, start, frequency, seed):
+    """
+    Generate the dataset files into the output directory.
+    """
+    os.makedirs(output, exist_ok=True)
+    first_period = to_periods(parse_timestamps([start], TIMESTAMP_FORMAT), frequency)[0]
+    timestamps = format_timestamps(
+        from_periods(first_period + np.arange(length), frequency), TIMESTAMP_FORMAT)
+    items_per_block = max(1, BLOCK_ROWS // length)
+
+    with open(os.path.join(output, 'target_time_series.csv'), 'w') as target_file, \
+            open(os.path.join(output, 'related_time_series.csv'), 'w') as related_file, \
+            open(os.path.join(output, 'item_metadata.csv'), 'w') as metadata_file:
+        for first_item in range(0, items, items_per_block):
+            block_items = min(items_per_block, items - first_item)
+            item_names = np.array([ITEM_NAME.format(i)
+                                   for i in range(first_item, first_item + block_items)])
+            target, price, locations = generate_block(
+                first_item, block_items, length, frequency, seed)
+            write_rows(target_file, timestamps, target, item_names)
+            write_rows(related_file, timestamps, price, item_names)
+            metadata_file.write('\n'.join(
+                '{}, {}'.format(name, location) for name, location in zip(item_names, locations)))
+            metadata_file.write('\n')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--output', required=True, help='output directory')
+    parser.add_argument('--items', type=int, default=1000, help='number of items')
+    parser.add_argument('--length', type=int, default=24 * 90, help='number of timestamps per item')
+    parser.add_argument('--start', default='2014-01-01 01:00:00', help='first timestamp')
+    parser.add_argument('--frequency', default='H', help='DataFrequency (e.g. H, D, 15min)')
+    parser.add_argument('--seed', type=int, default=0, help='random seed')
+    args = parser.parse_args()
+    generate(args.output, args.items, args.length, args.start, args.frequency, args.seed)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,93 @@
+"""
+Profile the import time (the cold start before the first invocation) of the Lambda handlers in functions/*/app.py.
+
+Each app.py is imported in a fresh interpreter with `python -X importtime`, with the shared layer on the path like on
+Lambda. The self time of every module is summed per top-level package (boto3, botocore, numpy, aws_lambda_powertools,
+aws_xray_sdk, the modules of the shared layer etc.), so the packages which make up a cold start can be compared between
+handlers and before/after a change. The minimum of --repeat runs is reported per handler.
+
+Usage:
+  python tools/import_profile.py
+  python tools/import_profile.py create_predictor convert_dataset_files --top 10 --repeat 5
+  python tools/import_profile.py --json /tmp/import_profile.json
+"""
+import os
+import re
+import sys
+import json
+import argparse
+import subprocess
+import collections
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+FUNCTIONS_DIR = os.path.join(ROOT, 'functions')
+SHARED = os.path.join(FUNCTIONS_DIR, 'shared', 'python')
+# import time:       self [us] |  cumulative | imported package
+IMPORTTIME_PATTERN = r'^import time:\s+([0-9]+) \|\s+([0-9]+) \| (\s*)(\S+)$'
+DEFAULT_TOP = 5
+DEFAULT_REPEAT = 3
+
+compiled_importtime_pattern = re.compile(IMPORTTIME_PATTERN)
+
+
+def handler_names():
+    return sorted(name for name in os.listdir(FUNCTIONS_DIR)
+                  if os.path.isfile(os.path.join(FUNCTIONS_DIR, name, 'app.py')))
+
+
+def import_app(name):
+    """
+    Import app.py of a handler in a fresh interpreter. Return {top-level package: self microseconds}.
+    """
+    code_dir = os.path.join(FUNCTIONS_DIR, name)
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join([SHARED, code_dir]), PYTHONDONTWRITEBYTECODE='1',
+               AWS_DEFAULT_REGION=os.environ.get('AWS_DEFAULT_REGION', 'us-east-1'))
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', 'import app'],
+                            cwd=code_dir, env=env, stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+                            universal_newlines=True, check=False)
+    if result.returncode != 0:
+        raise RuntimeError('failed to import {}: {}'.format(name, result.stderr[-2000:]))
+    packages = collections.Counter()
+    for line in result.stderr.splitlines():
+        matched = compiled_importtime_pattern.match(line)
+        if matched:
+            packages[matched.group(4).split('.')[0]] += int(matched.group(1))
+    return packages
+
+
+def profile(name, repeat=DEFAULT_REPEAT):
+    """
+    Return {top-level package: self microseconds} of the fastest of `repeat` imports.
+    """
+    return min((import_app(name) for _ in range(repeat)), key=lambda packages: sum(packages.values()))
+
+
+def format_profile(profiles, top=DEFAULT_TOP):
+    lines = ['{:<30} {:>10}  {}'.format('handler', 'total [ms]', 'top packages [ms]')]
+    for name, packages in profiles.items():
+        lines.append('{:<30} {:>10.1f}  {}'.format(
+            name, sum(packages.values()) / 1000,
+            ', '.join('{} {:.1f}'.format(package, microseconds / 1000)
+                      for package, microseconds in packages.most_common(top))))
+    return '\n'.join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('handlers', nargs='*', help='directories under functions/ (default: all)')
+    parser.add_argument('--top', type=int, default=DEFAULT_TOP, help='packages shown per handler')
+    parser.add_argument('--repeat', type=int, default=DEFAULT_REPEAT, help='imports per handler')
+    parser.add_argument('--json', help='write {handler: {package: microseconds}} to this file')
+    args = parser.parse_args()
+
+    profiles = collections.OrderedDict(
+        (name, profile(name, args.repeat)) for name in args.handlers or handler_names())
+    print(format_profile(profiles, args.top))
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(profiles, f, indent=4)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())